@@ -1,7 +1,7 @@
 import os
 os.environ["TESTING"] = os.getenv("TESTING", "0")  # Ensure TESTING is set before imports
 
-from fastapi import FastAPI, Request, Depends, HTTPException, status, Form
+from fastapi import FastAPI, Request, Depends, HTTPException, status, Form, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
@@ -9,6 +9,8 @@ from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
+import hmac
 import logging
 
 # Configure logging
@@ -16,12 +18,24 @@ logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 from backend.utils.database import init_db, get_db
-from backend.models.schemas.user import UserCreate, UserUpdate, UserResponse, UserLogin
+from backend.models.schemas.user import UserCreate, UserUpdate, UserResponse, UserLogin, Principal
 from backend.services.user_service import UserService
-from backend.utils.auth import create_access_token, get_current_user
+from backend.utils.password_hashing import HashingPoolBusy
+from backend.utils.auth import create_access_token, build_token_claims, require_current_user, get_current_principal
+from backend.utils.metrics import collect_metrics
+from backend.utils.rate_limit import enforce_login_rate, enforce_guest_login_rate
+from backend.utils.background import start_periodic_task, stop_background_tasks
+from backend.services.maintenance_service import (
+    run_guest_purge, GUEST_PURGE_INTERVAL_SECONDS, run_cart_sweep, CART_SWEEP_INTERVAL_SECONDS
+)
+from backend.services.revocation_service import run_revocation_refresh, REVOCATION_REFRESH_SECONDS
+from backend.services.guest_cart_service import guest_cart_store, run_guest_cart_flush, GUEST_CART_FLUSH_SECONDS
+from backend.services.kitchen_service import run_kitchen_restore
 from backend.api.routes.menu import router as menu_router
 from backend.api.routes.cart import router as cart_router
 from backend.api.routes.ratings import router as ratings_router
+from backend.api.routes.orders import router as orders_router
+from backend.api.routes.kitchen import router as kitchen_router, _require_staff
 
 # Load environment variables
 load_dotenv()
@@ -124,12 +138,19 @@ from fastapi import APIRouter
 user_router = APIRouter(prefix="/api/users", tags=["users"])
 
 @user_router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
-    """Register a new user"""
+async def register_user(
+    user_data: UserCreate,
+    current_user: Optional[Principal] = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Register a new user, upgrading the caller's guest session if there is one"""
     try:
         logger.debug(f"Received registration request: {user_data}")
         service = UserService(db)
-        user = service.create_user(user_data)
+        if current_user and current_user.is_guest:
+            user = await service.upgrade_guest_user_async(current_user.id, user_data)
+        else:
+            user = await service.create_user_async(user_data)
         logger.info(f"User created successfully: {user.to_dict()}")
         return user
     except ValueError as e:
@@ -138,6 +159,12 @@ def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except HashingPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many password operations in progress, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         logger.error(f"Unexpected error during registration: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -148,13 +175,16 @@ def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
 @user_router.post("/login", response_model=dict)
 async def login_user(
     user_login: UserLogin,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """Authenticate a user and return a token"""
+    # Throttle before touching the database or bcrypt
+    enforce_login_rate(request, user_login.email)
     try:
         logger.debug(f"Login attempt for email: {user_login.email}")  
         service = UserService(db)
-        user = service.authenticate_user(user_login.email, user_login.password)  
+        user = await service.authenticate_user_async(user_login.email, user_login.password)  
         if not user:
             logger.warning(f"Failed login attempt for email: {user_login.email}")
             raise HTTPException(
@@ -163,7 +193,7 @@ async def login_user(
             )
         
         # Create access token
-        token = create_access_token(data={"sub": user.email})
+        token = create_access_token(data=build_token_claims(user))
         logger.info(f"Successful login for user: {user_login.email}")
         return {
             "access_token": token,
@@ -172,6 +202,12 @@ async def login_user(
         }
     except HTTPException:
         raise
+    except HashingPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         logger.error(f"Login error: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -182,13 +218,14 @@ async def login_user(
 @user_router.post("/guest-login", tags=["users"])
 async def guest_login(request: Request, db: Session = Depends(get_db)):
     """Create and login as a guest user"""
+    enforce_guest_login_rate(request)
     try:
         logger.debug("Guest login attempt")
         service = UserService(db)
-        guest_user, password = service.authenticate_guest()
+        guest_user, _ = service.authenticate_guest()
         
         # Create access token
-        token = create_access_token(data={"sub": guest_user.email})
+        token = create_access_token(data=build_token_claims(guest_user))
         logger.info(f"Successful guest login: {guest_user.email}")
         
         # Convert user data to dictionary and ensure all required fields are present
@@ -225,20 +262,20 @@ async def guest_login(request: Request, db: Session = Depends(get_db)):
         )
 
 @user_router.get("/me", response_model=UserResponse)
-def get_current_user_info(current_user: UserResponse = Depends(get_current_user)):
+def get_current_user_info(current_user: UserResponse = Depends(require_current_user)):
     """Get information about the currently logged-in user"""
     return current_user
 
 @user_router.put("/me", response_model=UserResponse)
-def update_user_info(
+async def update_user_info(
     user_update: UserUpdate,
-    current_user: UserResponse = Depends(get_current_user),
+    current_user: UserResponse = Depends(require_current_user),
     db: Session = Depends(get_db)
 ):
     """Update the current user's information"""
     try:
         service = UserService(db)
-        updated_user = service.update_user(current_user.id, user_update)
+        updated_user = await service.update_user_async(current_user.id, user_update)
         logger.info(f"User {current_user.id} updated successfully")
         return updated_user
     except ValueError as e:
@@ -247,10 +284,16 @@ def update_user_info(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except HashingPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many password operations in progress, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
 
 @user_router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
 def deactivate_account(
-    current_user: UserResponse = Depends(get_current_user),
+    current_user: UserResponse = Depends(require_current_user),
     db: Session = Depends(get_db)
 ):
     """Deactivate the current user's account"""
@@ -288,6 +331,16 @@ logger.info("Registering ratings router...")
 app.include_router(ratings_router)
 logger.debug(f"Ratings router routes: {[route.path for route in ratings_router.routes]}")
 
+# Register orders router
+logger.info("Registering orders router...")
+app.include_router(orders_router)
+logger.debug(f"Orders router routes: {[route.path for route in orders_router.routes]}")
+
+# Register kitchen router
+logger.info("Registering kitchen router...")
+app.include_router(kitchen_router)
+logger.debug(f"Kitchen router routes: {[route.path for route in kitchen_router.routes]}")
+
 @app.get("/test", tags=["test"])
 def test_endpoint():
     """Test endpoint to verify routing"""
@@ -308,6 +361,24 @@ async def startup_event():
         elif hasattr(route, "path"):    # For other routes like mounted static files
             logger.info(f"Mount: {route.path}")
 
+    if os.getenv("TESTING") != "1":
+        # Load revoked tokens before serving, then follow changes from other workers
+        run_revocation_refresh()
+        # The kitchen queue lives in memory; pick up orders placed before a restart
+        run_kitchen_restore()
+        start_periodic_task("token_revocation", REVOCATION_REFRESH_SECONDS, run_revocation_refresh)
+        start_periodic_task("guest_purge", GUEST_PURGE_INTERVAL_SECONDS, run_guest_purge)
+        start_periodic_task("cart_sweep", CART_SWEEP_INTERVAL_SECONDS, run_cart_sweep)
+        if guest_cart_store.enabled:
+            start_periodic_task("guest_cart_flush", GUEST_CART_FLUSH_SECONDS, run_guest_cart_flush)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background maintenance tasks and write out pending guest carts."""
+    await stop_background_tasks()
+    if guest_cart_store.enabled:
+        run_guest_cart_flush()
+
 @app.get("/", tags=["system"])
 def root():
     """Root endpoint that lists all available routes"""
@@ -329,3 +400,19 @@ def root():
 @app.get("/health", tags=["system"])
 def health_check():
     return {"status": "healthy", "timestamp": str(datetime.now())}
+
+# Lets a metrics scraper read /metrics without a staff login; unset disables it
+METRICS_SCRAPE_TOKEN = os.getenv("METRICS_SCRAPE_TOKEN")
+
+@app.get("/metrics", tags=["system"])
+def metrics(
+    x_metrics_token: Optional[str] = Header(None),
+    current_user: Optional[Principal] = Depends(get_current_principal)
+):
+    """In-process cache, limiter and worker pool metrics, for staff or a scraper holding the token"""
+    scraper = METRICS_SCRAPE_TOKEN and x_metrics_token and hmac.compare_digest(
+        x_metrics_token.encode(), METRICS_SCRAPE_TOKEN.encode()
+    )
+    if not scraper:
+        _require_staff(current_user)
+    return collect_metrics()
@@ -1,23 +1,58 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response
 from sqlalchemy.orm import Session
 import logging
 from datetime import datetime
 from typing import Optional
 
-from backend.models.schemas.cart import CartResponse, CartItemCreate, CartItemUpdate
-from backend.services.cart_service import CartService
+from backend.models.schemas.cart import CartResponse, CartItemCreate, CartItemUpdate, CartBatchRequest, CartEta
+from backend.services.cart_service import CartService, CartVersionConflict
+from backend.services.guest_cart_service import GuestCartService, guest_cart_store
+from backend.services.wait_time_service import wait_time_estimator
 from backend.utils.database import get_db
-from backend.utils.auth import get_current_user
-from backend.models.schemas.user import UserResponse
+from backend.utils.auth import get_current_principal
+from backend.models.schemas.user import Principal
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/cart", tags=["cart"])
 
+def _expected_version(if_match: Optional[str]) -> Optional[int]:
+    """Parse an If-Match header carrying a cart version (quoted or weak ETag forms)"""
+    if if_match is None:
+        return None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="If-Match must be a cart version ETag"
+        )
+
+def _cart_service(current_user: Principal, db: Session):
+    """Guests use the in-memory write-behind store when it is enabled"""
+    if current_user.is_guest and guest_cart_store.enabled:
+        return GuestCartService(db)
+    return CartService(db)
+
+def _with_etag(response: Response, cart):
+    response.headers["ETag"] = f'"{cart.version}"'
+    return cart
+
+def _conflict(e: CartVersionConflict) -> HTTPException:
+    logger.info(f"Cart write rejected: {str(e)}")
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Cart was modified by another request; reload it and retry"
+    )
+
 @router.get("", response_model=CartResponse)
 async def get_cart(
-    current_user: UserResponse = Depends(get_current_user),
+    response: Response,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get the current user's shopping cart"""
@@ -30,9 +65,9 @@ async def get_cart(
             )
         
         logger.debug(f"Fetching cart for user {current_user.id}")
-        service = CartService(db)
+        service = _cart_service(current_user, db)
         cart = service.get_or_create_cart(current_user.id)
-        return cart
+        return _with_etag(response, cart)
     except HTTPException:
         raise
     except Exception as e:
@@ -45,15 +80,20 @@ async def get_cart(
 @router.post("/items", response_model=CartResponse)
 async def add_item_to_cart(
     item: CartItemCreate,
-    current_user: UserResponse = Depends(get_current_user),
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Add an item to the shopping cart"""
+    expected_version = _expected_version(if_match)
     try:
         logger.debug(f"Adding item to cart for user {current_user.id}: {item}")
-        service = CartService(db)
-        cart = service.add_item(current_user.id, item)
-        return cart
+        service = _cart_service(current_user, db)
+        cart = service.add_item(current_user.id, item, expected_version)
+        return _with_etag(response, cart)
+    except CartVersionConflict as e:
+        raise _conflict(e)
     except ValueError as e:
         logger.error(f"Validation error adding item to cart: {str(e)}")
         raise HTTPException(
@@ -71,15 +111,20 @@ async def add_item_to_cart(
 async def update_cart_item(
     item_id: int,
     item_update: CartItemUpdate,
-    current_user: UserResponse = Depends(get_current_user),
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Update a cart item's quantity or customizations"""
+    expected_version = _expected_version(if_match)
     try:
         logger.debug(f"Updating cart item {item_id} for user {current_user.id}: {item_update}")
-        service = CartService(db)
-        cart = service.update_item(current_user.id, item_id, item_update)
-        return cart
+        service = _cart_service(current_user, db)
+        cart = service.update_item(current_user.id, item_id, item_update, expected_version)
+        return _with_etag(response, cart)
+    except CartVersionConflict as e:
+        raise _conflict(e)
     except ValueError as e:
         logger.error(f"Validation error updating cart item: {str(e)}")
         raise HTTPException(
@@ -96,15 +141,20 @@ async def update_cart_item(
 @router.delete("/items/{item_id}", response_model=CartResponse)
 async def remove_cart_item(
     item_id: int,
-    current_user: UserResponse = Depends(get_current_user),
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Remove an item from the shopping cart"""
+    expected_version = _expected_version(if_match)
     try:
         logger.debug(f"Removing item {item_id} from cart for user {current_user.id}")
-        service = CartService(db)
-        cart = service.remove_item(current_user.id, item_id)
-        return cart
+        service = _cart_service(current_user, db)
+        cart = service.remove_item(current_user.id, item_id, expected_version)
+        return _with_etag(response, cart)
+    except CartVersionConflict as e:
+        raise _conflict(e)
     except ValueError as e:
         logger.error(f"Validation error removing cart item: {str(e)}")
         raise HTTPException(
@@ -120,15 +170,20 @@ async def remove_cart_item(
 
 @router.delete("", response_model=CartResponse)
 async def clear_cart(
-    current_user: UserResponse = Depends(get_current_user),
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Clear all items from the shopping cart"""
+    expected_version = _expected_version(if_match)
     try:
         logger.debug(f"Clearing cart for user {current_user.id}")
-        service = CartService(db)
-        cart = service.clear_cart(current_user.id)
-        return cart
+        service = _cart_service(current_user, db)
+        cart = service.clear_cart(current_user.id, expected_version)
+        return _with_etag(response, cart)
+    except CartVersionConflict as e:
+        raise _conflict(e)
     except Exception as e:
         logger.error(f"Error clearing cart: {str(e)}")
         raise HTTPException(
@@ -136,15 +191,67 @@ async def clear_cart(
             detail=str(e)
         )
 
+@router.post("/batch", response_model=CartResponse)
+async def apply_cart_batch(
+    batch: CartBatchRequest,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Apply several cart operations in order, all or nothing"""
+    expected_version = _expected_version(if_match)
+    try:
+        if not current_user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not authenticated"
+            )
+
+        logger.debug(f"Applying {len(batch.operations)} cart operations for user {current_user.id}")
+        service = _cart_service(current_user, db)
+        cart = service.apply_batch(current_user.id, batch.operations, expected_version)
+        return _with_etag(response, cart)
+    except HTTPException:
+        raise
+    except CartVersionConflict as e:
+        raise _conflict(e)
+    except ValueError as e:
+        logger.error(f"Validation error applying cart batch: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error applying cart batch: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.get("/eta", response_model=CartEta)
+async def get_cart_eta(
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Estimate how long the cart would take to prepare if ordered now"""
+    if not current_user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+    cart = _cart_service(current_user, db).get_or_create_cart(current_user.id)
+    return wait_time_estimator.estimate(db, cart)
+
 @router.get("/total", response_model=float)
 async def get_cart_total(
-    current_user: UserResponse = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get the total price of all items in the cart"""
     try:
         logger.debug(f"Calculating cart total for user {current_user.id}")
-        service = CartService(db)
+        service = _cart_service(current_user, db)
         total = service.calculate_total(current_user.id)
         return total
     except Exception as e:
@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+import asyncio
+import json
+import logging
+import os
+
+from backend.services.kitchen_service import KitchenService, kitchen_queue
+from backend.utils.database import get_db
+from backend.utils.auth import get_current_principal
+from backend.models.schemas.user import Principal
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/kitchen", tags=["kitchen"])
+
+KITCHEN_STREAM_POLL_SECONDS = float(os.getenv("KITCHEN_STREAM_POLL_SECONDS", "1"))
+# Resend the snapshot this often even when nothing changed, so ETAs keep counting down
+KITCHEN_STREAM_REFRESH_SECONDS = float(os.getenv("KITCHEN_STREAM_REFRESH_SECONDS", "15"))
+
+KITCHEN_ROLES = ("staff", "admin")
+
+def _require_staff(current_user: Optional[Principal]) -> Principal:
+    if not current_user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+    if not (current_user.is_admin or current_user.role in KITCHEN_ROLES):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Staff only"
+        )
+    return current_user
+
+@router.get("/queue")
+def get_queue():
+    """Current queue depth, cooking batches and ready-in estimates per open order"""
+    return kitchen_queue.snapshot()
+
+async def queue_events(request: Request, poll: float = KITCHEN_STREAM_POLL_SECONDS,
+                       refresh: float = KITCHEN_STREAM_REFRESH_SECONDS):
+    """Server-sent events carrying a queue snapshot whenever the queue changes."""
+    version, waited = None, 0.0
+    while not await request.is_disconnected():
+        if kitchen_queue.version != version or waited >= refresh:
+            snapshot = kitchen_queue.snapshot()
+            version, waited = snapshot["version"], 0.0
+            yield f"event: queue\ndata: {json.dumps(snapshot)}\n\n"
+        await asyncio.sleep(poll)
+        waited += poll
+
+@router.get("/queue/stream")
+async def stream_queue(request: Request):
+    """Live queue depth and ETAs as a text/event-stream"""
+    return StreamingResponse(
+        queue_events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/batches/next")
+def start_next_batch(
+    response: Response,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Give the next batch of tickets to a free cook (204 if nothing can start)"""
+    _require_staff(current_user)
+    batch = KitchenService(db).start_next()
+    if batch is None:
+        response.status_code = status.HTTP_204_NO_CONTENT
+        return None
+    return batch.to_dict(kitchen_queue.clock())
+
+@router.post("/batches/{batch_id}/complete")
+def complete_batch(
+    batch_id: int,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Mark a batch as cooked; orders with nothing left to cook become ready"""
+    _require_staff(current_user)
+    try:
+        ready = KitchenService(db).complete(batch_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    return {"batch_id": batch_id, "ready_order_ids": ready}
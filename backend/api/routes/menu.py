@@ -12,9 +12,10 @@ from backend.models.schemas.menu import (
     MenuItem, MenuItemCreate, MenuItemUpdate,
     Allergen, AllergenCreate, AllergenUpdate,
     MenuResponse, CategoryWithItems, MenuItemFilters,
-    RatingCreate
+    RatingCreate, CustomizedMenuItem
 )
 from backend.services.menu_service import MenuService
+from backend.services.pricing_service import InvalidCustomization, pricing_engine
 from backend.utils.database import get_db
 
 # Configure logging
@@ -169,13 +170,17 @@ def rate_menu_item(
         "rating_count": item.rating_count
     }
 
-@router.post("/items/{item_id}/customize", response_model=MenuItem)
+@router.post("/items/{item_id}/customize", response_model=CustomizedMenuItem)
 def customize_menu_item(
     item_id: int,
     customization: dict,
     db: Session = Depends(get_db)
 ):
-    """Customize a menu item with selected options"""
+    """Validate and price a selection of options for a menu item.
+
+    Nothing is stored: the menu item is shared by every customer, so the
+    chosen options are echoed back and persisted only on cart lines.
+    """
     item = MenuService.get_menu_item(db, item_id)
     if not item.is_active:
         raise HTTPException(status_code=404, detail="Menu item not found")
@@ -187,36 +192,18 @@ def customize_menu_item(
             detail="This item does not support customization"
         )
     
-    # Validate each customization option
-    for option, value in customization.items():
-        if option not in item.customization_options:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid customization option: {option}"
-            )
-        
-        valid_values = item.customization_options[option]
-        if isinstance(value, list):
-            for v in value:
-                if v not in valid_values:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Invalid value '{v}' for option '{option}'"
-                    )
-        else:
-            if value not in valid_values:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Invalid value '{value}' for option '{option}'"
-                )
-    
-    # Store customization with the menu item
-    item.selected_customization = customization
-    db.commit()
-    db.refresh(item)
+    # Validate against the item's compiled options
+    try:
+        price_delta = pricing_engine.price_delta(item, customization)
+    except InvalidCustomization as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Return the item with the category name as a string
-    return MenuItem.from_orm(item)
+    return CustomizedMenuItem.from_orm(item).model_copy(update={
+        "selected_customization": customization,
+        "price_delta": price_delta,
+        "unit_price": item.price + price_delta,
+    })
 
 @router.get("/full", response_model=List[CategoryWithItems])
 def get_full_menu(
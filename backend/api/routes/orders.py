@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+import logging
+
+from backend.api.routes.cart import _expected_version
+from backend.models.schemas.order import OrderResponse
+from backend.services.cart_service import CartVersionConflict
+from backend.services.order_service import OrderService
+from backend.utils.database import get_db
+from backend.utils.auth import get_current_principal
+from backend.models.schemas.user import Principal
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/orders", tags=["orders"])
+
+MAX_IDEMPOTENCY_KEY_LENGTH = 100
+
+def _require_user(current_user: Optional[Principal]) -> Principal:
+    if not current_user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+    return current_user
+
+@router.post("/checkout", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+def checkout(
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+    if_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Place an order for everything in the cart and empty the cart.
+
+    Send an Idempotency-Key header to make retries safe: repeating a key
+    returns the order it created (200, Idempotent-Replayed: true). Send the
+    cart's ETag as If-Match to order only the cart the customer reviewed;
+    a cart changed since then is refused with 409.
+    """
+    current_user = _require_user(current_user)
+    expected_version = _expected_version(if_match)
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1-{MAX_IDEMPOTENCY_KEY_LENGTH} characters"
+        )
+    try:
+        order, created = OrderService(db).checkout(current_user.id, idempotency_key, expected_version)
+    except CartVersionConflict as e:
+        logger.info(f"Checkout rejected: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Cart was modified during checkout; review it and retry"
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if not created:
+        response.status_code = status.HTTP_200_OK
+        response.headers["Idempotent-Replayed"] = "true"
+    return order
+
+@router.get("", response_model=List[OrderResponse])
+def get_orders(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Get the current user's orders, newest first"""
+    current_user = _require_user(current_user)
+    return OrderService(db).get_orders(current_user.id, skip, limit)
+
+@router.get("/{order_id}", response_model=OrderResponse)
+def get_order(
+    order_id: int,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Get one of the current user's orders"""
+    current_user = _require_user(current_user)
+    try:
+        return OrderService(db).get_order(current_user.id, order_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
@@ -1,33 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 from backend.utils.database import get_db
-from backend.utils.auth import get_current_user
+from backend.utils.auth import get_current_principal
 from backend.services.rating_service import RatingService
 from backend.models.schemas.rating import (
-    MenuItemRatingCreate, MenuItemRatingResponse,
+    MenuItemRatingCreate, MenuItemRatingResponse, MenuItemRatingStats, MenuItemRatingSummary,
     RestaurantFeedbackCreate, RestaurantFeedbackResponse,
     RestaurantFeedbackStats
 )
-from backend.models.schemas.user import UserResponse
+from backend.models.schemas.user import Principal
 
 router = APIRouter(prefix="/api/ratings", tags=["ratings"])
 
+# The frontend splits larger requests by the same limit (MAX_BATCH_RATING_IDS in
+# frontend/src/constants/api.ts)
+MAX_BATCH_RATING_IDS = 200
+
+# Registered before the /menu-items/{menu_item_id} routes, which would otherwise match "averages"
+@router.get("/menu-items/averages", response_model=List[MenuItemRatingSummary])
+def get_menu_items_average_ratings(
+    ids: str = Query(..., description="Comma-separated menu item ids"),
+    current_user: Optional[Principal] = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Get average ratings for several menu items, plus the current user's own ratings"""
+    try:
+        menu_item_ids = list(dict.fromkeys(int(value) for value in ids.split(",") if value.strip()))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
+        )
+    if not 0 < len(menu_item_ids) <= MAX_BATCH_RATING_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"ids must name 1-{MAX_BATCH_RATING_IDS} menu items"
+        )
+
+    service = RatingService(db)
+    averages = service.get_menu_items_average_ratings(menu_item_ids)
+    own = service.get_user_menu_item_ratings(current_user.id, menu_item_ids) if current_user else {}
+    no_ratings = {"average_rating": 0.0, "total_ratings": 0}
+    return [
+        {
+            "menu_item_id": menu_item_id,
+            "average": averages.get(menu_item_id, no_ratings)["average_rating"],
+            "total": averages.get(menu_item_id, no_ratings)["total_ratings"],
+            "user_rating": own.get(menu_item_id)
+        }
+        for menu_item_id in menu_item_ids
+    ]
+
 @router.post("/menu-items/{menu_item_id}", response_model=MenuItemRatingResponse)
 def rate_menu_item(
     menu_item_id: int,
     rating: MenuItemRatingCreate,
-    current_user: UserResponse = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create or update a rating for a menu item"""
-    service = RatingService(db)
+    if not current_user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required"
+        )
     try:
-        return service.create_menu_item_rating(rating, current_user.id)
+        db_rating, _ = RatingService(db).upsert_menu_item_rating(current_user.id, menu_item_id, rating)
     except ValueError as e:
-        # If rating exists, try to update it
-        return service.update_menu_item_rating(current_user.id, menu_item_id, rating)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    return db_rating
 
 @router.get("/menu-items/{menu_item_id}", response_model=List[MenuItemRatingResponse])
 def get_menu_item_ratings(
@@ -41,7 +87,7 @@ def get_menu_item_ratings(
 @router.get("/menu-items/{menu_item_id}/user", response_model=MenuItemRatingResponse)
 def get_user_menu_item_rating(
     menu_item_id: int,
-    current_user: UserResponse = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get the current user's rating for a menu item"""
@@ -57,7 +103,7 @@ def get_user_menu_item_rating(
 @router.delete("/menu-items/{menu_item_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_menu_item_rating(
     menu_item_id: int,
-    current_user: UserResponse = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Delete a user's rating for a menu item"""
@@ -74,19 +120,29 @@ def get_menu_item_average_rating(
     db: Session = Depends(get_db)
 ):
     """Get the average rating for a menu item"""
-    service = RatingService(db)
-    ratings = service.get_menu_item_ratings(menu_item_id)
-    if not ratings:
-        return {"average": 0.0, "total": 0}
-    
-    total = len(ratings)
-    average = sum(r.rating for r in ratings) / total
-    return {"average": round(average, 1), "total": total}
+    stats = RatingService(db).get_menu_item_rating_stats(menu_item_id)
+    return {"average": stats["average"], "total": stats["total"]}
+
+@router.get("/menu-items/{menu_item_id}/distribution", response_model=MenuItemRatingStats)
+def get_menu_item_rating_distribution(
+    menu_item_id: int,
+    db: Session = Depends(get_db)
+):
+    """Get the average, count and number of ratings per star for a menu item"""
+    return RatingService(db).get_menu_item_rating_stats(menu_item_id)
+
+@router.get("/menu-items/{menu_item_id}/count", response_model=Dict[str, int])
+def get_menu_item_rating_count(
+    menu_item_id: int,
+    db: Session = Depends(get_db)
+):
+    """Get the number of ratings for a menu item"""
+    return {"total": RatingService(db).get_menu_item_rating_stats(menu_item_id)["total"]}
 
 @router.post("/restaurant-feedback", response_model=RestaurantFeedbackResponse, status_code=status.HTTP_201_CREATED)
 def create_restaurant_feedback(
     feedback: RestaurantFeedbackCreate,
-    current_user: UserResponse = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create new restaurant feedback"""
@@ -100,7 +156,7 @@ def create_restaurant_feedback(
 
 @router.get("/restaurant-feedback", response_model=List[RestaurantFeedbackResponse])
 def get_restaurant_feedback(
-    current_user: UserResponse = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get all restaurant feedback"""
@@ -114,7 +170,7 @@ def get_restaurant_feedback(
 
 @router.get("/restaurant-feedback/user", response_model=List[RestaurantFeedbackResponse])
 def get_user_restaurant_feedback(
-    current_user: UserResponse = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get all feedback from the current user"""
@@ -128,7 +184,7 @@ def get_user_restaurant_feedback(
 
 @router.get("/restaurant-feedback/stats", response_model=RestaurantFeedbackStats)
 def get_restaurant_feedback_stats(
-    current_user: UserResponse = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get statistics for restaurant feedback"""
@@ -142,7 +198,7 @@ def get_restaurant_feedback_stats(
 
 @router.get("/restaurant-feedback/recent", response_model=List[RestaurantFeedbackResponse])
 def get_recent_restaurant_feedback(
-    current_user: UserResponse = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     limit: int = 5,
     db: Session = Depends(get_db)
 ):
@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Form, Request
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import logging
 
-from backend.models.schemas.user import UserCreate, UserUpdate, UserResponse, UserLogin
+from backend.models.schemas.user import UserCreate, UserUpdate, UserResponse, UserLogin, Principal
 from backend.services.user_service import UserService
+from backend.utils.password_hashing import HashingPoolBusy
 from backend.utils.database import get_db
-from backend.utils.auth import create_access_token, get_current_user
+from backend.utils.auth import create_access_token, build_token_claims, get_current_user, get_current_principal
+from backend.utils.rate_limit import enforce_login_rate, enforce_guest_login_rate
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -18,8 +20,13 @@ router = APIRouter(
 )
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED, tags=["users"])
-async def register_user(request: Request, user_data: UserCreate, db: Session = Depends(get_db)):
-    """Register a new user"""
+async def register_user(
+    request: Request,
+    user_data: UserCreate,
+    current_user: Optional[Principal] = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Register a new user, upgrading the caller's guest session if there is one"""
     try:
         # Log request details
         body = await request.json()
@@ -27,7 +34,10 @@ async def register_user(request: Request, user_data: UserCreate, db: Session = D
         logger.debug(f"Request headers: {request.headers}")
         
         service = UserService(db)
-        user = service.create_user(user_data)
+        if current_user and current_user.is_guest:
+            user = await service.upgrade_guest_user_async(current_user.id, user_data)
+        else:
+            user = await service.create_user_async(user_data)
         logger.info(f"User created successfully: {user.to_dict()}")
         return user
     except ValueError as e:
@@ -36,6 +46,12 @@ async def register_user(request: Request, user_data: UserCreate, db: Session = D
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except HashingPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many password operations in progress, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         logger.error(f"Unexpected error during registration: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -44,12 +60,13 @@ async def register_user(request: Request, user_data: UserCreate, db: Session = D
         )
 
 @router.post("/login", tags=["users"])
-async def login_user(email: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
+async def login_user(request: Request, email: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
     """Authenticate a user and return a token"""
+    enforce_login_rate(request, email)
     try:
         logger.debug(f"Login attempt for email: {email}")
         service = UserService(db)
-        user = service.authenticate_user(email, password)
+        user = await service.authenticate_user_async(email, password)
         if not user:
             logger.warning(f"Failed login attempt for email: {email}")
             raise HTTPException(
@@ -58,11 +75,17 @@ async def login_user(email: str = Form(...), password: str = Form(...), db: Sess
             )
         
         # Create access token
-        token = create_access_token(data={"sub": user.email})
+        token = create_access_token(data=build_token_claims(user))
         logger.info(f"Successful login for user: {email}")
         return {"access_token": token, "token_type": "bearer"}
     except HTTPException:
         raise
+    except HashingPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         logger.error(f"Login error: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -73,20 +96,20 @@ async def login_user(email: str = Form(...), password: str = Form(...), db: Sess
 @router.post("/guest-login", tags=["users"])
 async def guest_login(request: Request, db: Session = Depends(get_db)):
     """Create and login as a guest user"""
+    enforce_guest_login_rate(request)
     try:
         logger.debug("Guest login attempt")
         service = UserService(db)
-        guest_user, password = service.authenticate_guest()
+        guest_user, _ = service.authenticate_guest()
         
         # Create access token
-        token = create_access_token(data={"sub": guest_user.email})
+        token = create_access_token(data=build_token_claims(guest_user))
         logger.info(f"Successful guest login: {guest_user.email}")
         
         return {
             "access_token": token,
             "token_type": "bearer",
-            "user": guest_user,
-            "temp_password": password  # Only for guest users to enable immediate access
+            "user": guest_user
         }
     except Exception as e:
         logger.error(f"Guest login error: {str(e)}", exc_info=True)
@@ -109,7 +132,7 @@ async def update_user_info(
     """Update the current user's information"""
     try:
         service = UserService(db)
-        updated_user = service.update_user(current_user.id, user_update)
+        updated_user = await service.update_user_async(current_user.id, user_update)
         logger.info(f"User {current_user.id} updated successfully")
         return updated_user
     except ValueError as e:
@@ -118,6 +141,12 @@ async def update_user_info(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except HashingPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many password operations in progress, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
 
 @router.delete("/me", status_code=status.HTTP_204_NO_CONTENT, tags=["users"])
 async def deactivate_account(
@@ -0,0 +1,23 @@
+"""add token_version to users
+
+Revision ID: 011
+Revises: e82bb45ddca9
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = 'e82bb45ddca9'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Per-user counter embedded in access tokens; bumping it revokes older tokens
+    op.add_column('users', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+def downgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('token_version')
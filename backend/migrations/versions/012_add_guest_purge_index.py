@@ -0,0 +1,21 @@
+"""add index for stale guest purge
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index('ix_users_is_guest_created_at', 'users', ['is_guest', 'created_at'])
+
+def downgrade():
+    op.drop_index('ix_users_is_guest_created_at', table_name='users')
@@ -0,0 +1,21 @@
+"""add index on users.updated_at for token revocation refresh
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index('ix_users_updated_at', 'users', ['updated_at'])
+
+def downgrade():
+    op.drop_index('ix_users_updated_at', table_name='users')
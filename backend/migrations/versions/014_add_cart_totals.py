@@ -0,0 +1,39 @@
+"""add denormalized subtotal and item_count to shopping_carts
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '014'
+down_revision = '013'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('shopping_carts', sa.Column('subtotal', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('shopping_carts', sa.Column('item_count', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill from the existing cart lines
+    op.execute("""
+        UPDATE shopping_carts SET
+            subtotal = (
+                SELECT COALESCE(SUM(menu_items.price * cart_items.quantity), 0)
+                FROM cart_items JOIN menu_items ON menu_items.id = cart_items.menu_item_id
+                WHERE cart_items.cart_id = shopping_carts.id
+            ),
+            item_count = (
+                SELECT COALESCE(SUM(cart_items.quantity), 0)
+                FROM cart_items
+                WHERE cart_items.cart_id = shopping_carts.id
+            )
+    """)
+
+def downgrade():
+    with op.batch_alter_table('shopping_carts') as batch_op:
+        batch_op.drop_column('item_count')
+        batch_op.drop_column('subtotal')
@@ -0,0 +1,39 @@
+"""make cart lines unique per (cart_id, menu_item_id)
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '015'
+down_revision = '014'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Fold duplicate lines into the oldest one before adding the constraint
+    op.execute("""
+        UPDATE cart_items SET quantity = (
+            SELECT SUM(dup.quantity) FROM cart_items AS dup
+            WHERE dup.cart_id = cart_items.cart_id AND dup.menu_item_id = cart_items.menu_item_id
+        )
+        WHERE id IN (
+            SELECT MIN(id) FROM cart_items GROUP BY cart_id, menu_item_id HAVING COUNT(*) > 1
+        )
+    """)
+    op.execute("""
+        DELETE FROM cart_items WHERE id NOT IN (
+            SELECT MIN(id) FROM cart_items GROUP BY cart_id, menu_item_id
+        )
+    """)
+
+    with op.batch_alter_table('cart_items') as batch_op:
+        batch_op.create_unique_constraint('uq_cart_item_menu_item', ['cart_id', 'menu_item_id'])
+
+def downgrade():
+    with op.batch_alter_table('cart_items') as batch_op:
+        batch_op.drop_constraint('uq_cart_item_menu_item', type_='unique')
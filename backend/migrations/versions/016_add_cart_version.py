@@ -0,0 +1,22 @@
+"""add version to shopping_carts for optimistic concurrency
+
+Revision ID: 016
+Revises: 015
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '016'
+down_revision = '015'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('shopping_carts', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+def downgrade():
+    with op.batch_alter_table('shopping_carts') as batch_op:
+        batch_op.drop_column('version')
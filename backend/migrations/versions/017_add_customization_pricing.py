@@ -0,0 +1,26 @@
+"""add customization prices to menu_items and price_delta to cart_items
+
+Revision ID: 017
+Revises: 016
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import sqlite
+
+# revision identifiers, used by Alembic.
+revision = '017'
+down_revision = '016'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('menu_items', sa.Column('customization_prices', sqlite.JSON, nullable=True))
+    op.add_column('cart_items', sa.Column('price_delta', sa.Float(), nullable=False, server_default='0'))
+
+def downgrade():
+    with op.batch_alter_table('cart_items') as batch_op:
+        batch_op.drop_column('price_delta')
+    with op.batch_alter_table('menu_items') as batch_op:
+        batch_op.drop_column('customization_prices')
@@ -0,0 +1,24 @@
+"""drop selected_customization from menu_items
+
+Revision ID: 018
+Revises: 017
+Create Date: 2026-10-19 15:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import sqlite
+
+# revision identifiers, used by Alembic.
+revision = '018'
+down_revision = '017'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('menu_items') as batch_op:
+        batch_op.drop_column('selected_customization')
+
+def downgrade():
+    with op.batch_alter_table('menu_items') as batch_op:
+        batch_op.add_column(sa.Column('selected_customization', sqlite.JSON, nullable=True))
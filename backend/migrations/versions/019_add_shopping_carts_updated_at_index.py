@@ -0,0 +1,21 @@
+"""add index on shopping_carts.updated_at for the abandoned-cart sweep
+
+Revision ID: 019
+Revises: 018
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '019'
+down_revision = '018'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index('ix_shopping_carts_updated_at', 'shopping_carts', ['updated_at'])
+
+def downgrade():
+    op.drop_index('ix_shopping_carts_updated_at', table_name='shopping_carts')
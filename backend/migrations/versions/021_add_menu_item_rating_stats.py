@@ -0,0 +1,51 @@
+"""add menu_item_rating_stats table with per-item rating totals and histogram
+
+Revision ID: 021
+Revises: 020
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '021'
+down_revision = '020'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'menu_item_rating_stats',
+        sa.Column('menu_item_id', sa.Integer(), nullable=False),
+        sa.Column('rating_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rating_sum', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('stars_1', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('stars_2', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('stars_3', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('stars_4', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('stars_5', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.ForeignKeyConstraint(['menu_item_id'], ['menu_items.id'], ),
+        sa.PrimaryKeyConstraint('menu_item_id')
+    )
+
+    # Backfill from the existing ratings
+    op.execute("""
+        INSERT INTO menu_item_rating_stats
+            (menu_item_id, rating_count, rating_sum, stars_1, stars_2, stars_3, stars_4, stars_5)
+        SELECT
+            menu_item_id,
+            COUNT(*),
+            SUM(rating),
+            SUM(CASE WHEN rating = 1 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN rating = 2 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN rating = 3 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN rating = 4 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN rating = 5 THEN 1 ELSE 0 END)
+        FROM menu_item_ratings
+        GROUP BY menu_item_id
+    """)
+
+def downgrade():
+    op.drop_table('menu_item_rating_stats')
@@ -1,7 +1,8 @@
 from .menu import Category, MenuItem, Allergen
 from .user import User
-from .rating import MenuItemRating, RestaurantFeedback
+from .rating import MenuItemRating, MenuItemRatingStats, RestaurantFeedback
 from .shopping_cart import ShoppingCart, CartItem
+from .order import Order, OrderItem
 
 __all__ = [
     'Category', 
@@ -9,7 +10,10 @@ __all__ = [
     'Allergen', 
     'User',
     'MenuItemRating',
+    'MenuItemRatingStats',
     'RestaurantFeedback',
     'ShoppingCart',
-    'CartItem'
+    'CartItem',
+    'Order',
+    'OrderItem'
 ]
@@ -55,14 +55,19 @@ class MenuItem(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     customization_options = Column(JSON, default=dict)
-    selected_customization = Column(JSON, default=dict)
+    # option -> value -> price change per unit; values not listed cost nothing extra
+    customization_prices = Column(JSON, default=dict)
     average_rating = Column(Float, default=0.0)
     rating_count = Column(Integer, default=0)
     image_url = Column(String, nullable=True)
 
+    __mapper_args__ = {"eager_defaults": True}
+
     category = relationship("Category", back_populates="menu_items")
     allergens = relationship("Allergen", secondary=menu_item_allergens, back_populates="menu_items")
     ratings = relationship("MenuItemRating", back_populates="menu_item", cascade="all, delete-orphan")
+    rating_stats = relationship("MenuItemRatingStats", back_populates="menu_item", uselist=False,
+                                cascade="all, delete-orphan")
 
     def __init__(self, **kwargs):
         if 'price' in kwargs and kwargs['price'] < 0:
@@ -87,7 +92,7 @@ class MenuItem(Base):
             "is_active": self.is_active,
             "is_available": self.is_available,
             "customization_options": self.customization_options,
-            "selected_customization": self.selected_customization,
+            "customization_prices": self.customization_prices,
             "average_rating": self.average_rating,
             "rating_count": self.rating_count,
             "image_url": self.image_url,
@@ -0,0 +1,80 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, JSON, UniqueConstraint, func
+from sqlalchemy.orm import relationship
+
+from backend.utils.database import Base
+
+class Order(Base):
+    __tablename__ = "orders"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default="placed")
+    subtotal = Column(Float, nullable=False, default=0.0)
+    item_count = Column(Integer, nullable=False, default=0)
+    # Client-chosen key; a retried checkout with the same key returns this order
+    idempotency_key = Column(String(100), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'idempotency_key', name='uq_order_user_idempotency_key'),
+    )
+    __mapper_args__ = {"eager_defaults": True}
+
+    # Relationships
+    user = relationship("User", back_populates="orders")
+    items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
+
+    def __repr__(self):
+        return f"<Order id={self.id} user_id={self.user_id} status={self.status}>"
+
+    def to_dict(self):
+        """Convert order to dictionary"""
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "status": self.status,
+            "items": [item.to_dict() for item in self.items],
+            "subtotal": self.subtotal,
+            "item_count": self.item_count,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class OrderItem(Base):
+    __tablename__ = "order_items"
+
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    menu_item_id = Column(Integer, ForeignKey("menu_items.id"), nullable=False, index=True)
+    # Name and prices are copied at checkout so later menu edits leave orders alone
+    name = Column(String, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    unit_price = Column(Float, nullable=False)
+    price_delta = Column(Float, nullable=False, default=0.0)
+    customizations = Column(JSON, nullable=True)
+
+    # Relationships
+    order = relationship("Order", back_populates="items")
+    menu_item = relationship("MenuItem")
+
+    def __repr__(self):
+        return f"<OrderItem id={self.id} order_id={self.order_id} menu_item_id={self.menu_item_id}>"
+
+    @property
+    def line_total(self) -> float:
+        return (self.unit_price + self.price_delta) * self.quantity
+
+    def to_dict(self):
+        """Convert order item to dictionary"""
+        return {
+            "id": self.id,
+            "order_id": self.order_id,
+            "menu_item_id": self.menu_item_id,
+            "name": self.name,
+            "quantity": self.quantity,
+            "unit_price": self.unit_price,
+            "price_delta": self.price_delta,
+            "customizations": self.customizations,
+            "line_total": self.line_total
+        }
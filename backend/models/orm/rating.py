@@ -19,6 +19,7 @@ class MenuItemRating(Base):
         CheckConstraint('rating >= 1 AND rating <= 5', name='check_rating_range'),
         UniqueConstraint('user_id', 'menu_item_id', name='uq_user_menu_item_rating'),
     )
+    __mapper_args__ = {"eager_defaults": True}
 
     # Use string references to avoid circular imports
     user = relationship("User", back_populates="menu_item_ratings")
@@ -29,6 +30,30 @@ class MenuItemRating(Base):
             raise ValueError("Rating must be between 1 and 5")
         super().__init__(**kwargs)
 
+class MenuItemRatingStats(Base):
+    """Running rating totals per menu item, kept in step by RatingService."""
+    __tablename__ = "menu_item_rating_stats"
+
+    menu_item_id = Column(Integer, ForeignKey("menu_items.id"), primary_key=True)
+    rating_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    stars_1 = Column(Integer, nullable=False, default=0)
+    stars_2 = Column(Integer, nullable=False, default=0)
+    stars_3 = Column(Integer, nullable=False, default=0)
+    stars_4 = Column(Integer, nullable=False, default=0)
+    stars_5 = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    menu_item = relationship("MenuItem", back_populates="rating_stats")
+
+    @property
+    def average(self) -> float:
+        return round(self.rating_sum / self.rating_count, 1) if self.rating_count else 0.0
+
+    @property
+    def distribution(self) -> dict:
+        return {star: getattr(self, f"stars_{star}") for star in range(1, 6)}
+
 class RestaurantFeedback(Base):
     __tablename__ = "restaurant_feedback"
 
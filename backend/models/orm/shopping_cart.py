@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, JSON, func
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, JSON, UniqueConstraint, Index, func
 from sqlalchemy.orm import relationship
 
 from backend.utils.database import Base
@@ -9,9 +9,20 @@ class ShoppingCart(Base):
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True, index=True)
+    # Maintained by CartService whenever lines or menu prices change
+    subtotal = Column(Float, nullable=False, default=0.0)
+    item_count = Column(Integer, nullable=False, default=0)
+    # Bumped on every change; clients send it back in If-Match
+    version = Column(Integer, nullable=False, default=1)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
+    __table_args__ = (
+        # Oldest-first scans by the abandoned-cart sweep
+        Index('ix_shopping_carts_updated_at', 'updated_at'),
+    )
+    __mapper_args__ = {"eager_defaults": True}
+
     # Relationships
     user = relationship("User", back_populates="shopping_cart")
     items = relationship("CartItem", back_populates="cart", cascade="all, delete-orphan")
@@ -25,6 +36,9 @@ class ShoppingCart(Base):
             "id": self.id,
             "user_id": self.user_id,
             "items": [item.to_dict() for item in self.items],
+            "subtotal": self.subtotal,
+            "item_count": self.item_count,
+            "version": self.version,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
@@ -37,9 +51,17 @@ class CartItem(Base):
     menu_item_id = Column(Integer, ForeignKey("menu_items.id"), nullable=False, index=True)
     quantity = Column(Integer, nullable=False, default=1)
     customizations = Column(JSON, nullable=True)
+    # Per-unit price of the chosen customizations, set when they are validated
+    price_delta = Column(Float, nullable=False, default=0.0)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
+    __table_args__ = (
+        # One line per menu item; repeated adds upsert into it
+        UniqueConstraint('cart_id', 'menu_item_id', name='uq_cart_item_menu_item'),
+    )
+    __mapper_args__ = {"eager_defaults": True}
+
     # Relationships
     cart = relationship("ShoppingCart", back_populates="items")
     menu_item = relationship("MenuItem")
@@ -56,6 +78,7 @@ class CartItem(Base):
             "menu_item": self.menu_item.to_dict() if self.menu_item else None,
             "quantity": self.quantity,
             "customizations": self.customizations,
+            "price_delta": self.price_delta,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
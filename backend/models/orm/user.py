@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 import re
 
@@ -19,13 +19,22 @@ class User(Base):
     is_guest = Column(Boolean, nullable=False, default=False)
     is_admin = Column(Boolean, nullable=False, default=False)
     phone_number = Column(String(20), nullable=True)
+    token_version = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Serves the stale-guest purge scan
+        Index('ix_users_is_guest_created_at', 'is_guest', 'created_at'),
+        # Serves the incremental token revocation refresh
+        Index('ix_users_updated_at', 'updated_at'),
+    )
+
     # Use string references to avoid circular imports
     shopping_cart = relationship("ShoppingCart", back_populates="user", uselist=False)
     menu_item_ratings = relationship("MenuItemRating", back_populates="user")
     restaurant_feedback = relationship("RestaurantFeedback", back_populates="user")
+    orders = relationship("Order", back_populates="user")
 
     VALID_ROLES = ["admin", "staff", "customer"]
     EMAIL_REGEX = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
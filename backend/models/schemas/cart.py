@@ -1,5 +1,5 @@
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel
+from typing import List, Optional, Dict, Any, Literal
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
 
 class CartItemBase(BaseModel):
@@ -14,9 +14,29 @@ class CartItemUpdate(BaseModel):
     quantity: Optional[int] = None
     customizations: Optional[Dict[str, Any]] = None
 
+class CartOperation(BaseModel):
+    """One step of a batched cart edit"""
+    op: Literal["add", "update", "remove", "clear"]
+    menu_item_id: Optional[int] = None
+    item_id: Optional[int] = None
+    quantity: Optional[int] = None
+    customizations: Optional[Dict[str, Any]] = None
+
+    @model_validator(mode="after")
+    def check_required_fields(self):
+        if self.op == "add" and (self.menu_item_id is None or not self.quantity or self.quantity < 1):
+            raise ValueError("add requires menu_item_id and a positive quantity")
+        if self.op in ("update", "remove") and self.item_id is None:
+            raise ValueError(f"{self.op} requires item_id")
+        return self
+
+class CartBatchRequest(BaseModel):
+    operations: List[CartOperation] = Field(..., min_length=1, max_length=100)
+
 class CartItem(CartItemBase):
     id: int
     cart_id: int
+    price_delta: float = 0.0
     created_at: datetime
     updated_at: datetime
 
@@ -42,8 +62,26 @@ class CartResponse(BaseModel):
     id: Optional[int] = None
     user_id: Optional[int] = None
     items: List[CartItem] = []
+    subtotal: float = 0.0
+    item_count: int = 0
+    version: int = 1
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
+
+class CartEtaLine(BaseModel):
+    menu_item_id: int
+    quantity: int
+    prep_minutes: float
+    station: Optional[int] = None
+    station_backlog_minutes: float = 0.0
+
+class CartEta(BaseModel):
+    """Estimated wait for the cart if it were ordered now"""
+    cart_version: int
+    queue_wait_minutes: float
+    prep_minutes: float
+    eta_minutes: float
+    lines: List[CartEtaLine] = []
@@ -39,6 +39,7 @@ class MenuItemBase(BaseModel):
     spice_level: Optional[int] = Field(0, ge=0, le=3)
     preparation_time: Optional[int] = None
     customization_options: Optional[Dict[str, List[str]]] = Field(default_factory=dict)
+    customization_prices: Optional[Dict[str, Dict[str, float]]] = Field(default_factory=dict)
     image_url: Optional[str] = None
 
 class MenuItemCreate(MenuItemBase):
@@ -56,6 +57,7 @@ class MenuItemUpdate(BaseModel):
     preparation_time: Optional[int] = None
     is_active: Optional[bool] = None
     customization_options: Optional[Dict[str, List[str]]] = None
+    customization_prices: Optional[Dict[str, Dict[str, float]]] = None
     allergen_ids: Optional[List[int]] = None
     average_rating: Optional[float] = None
     rating_count: Optional[int] = None
@@ -68,7 +70,6 @@ class MenuItem(MenuItemBase, TimestampedModel):
     average_rating: float = 0.0
     rating_count: int = 0
     allergens: List[Allergen] = []
-    selected_customization: Optional[Dict[str, str]] = None
 
     class Config:
         from_attributes = True
@@ -88,6 +89,7 @@ class MenuItem(MenuItemBase, TimestampedModel):
             'spice_level': obj.spice_level,
             'preparation_time': obj.preparation_time,
             'customization_options': obj.customization_options,
+            'customization_prices': obj.customization_prices,
             'image_url': obj.image_url,
             'is_active': obj.is_active,
             'created_at': obj.created_at,
@@ -95,11 +97,16 @@ class MenuItem(MenuItemBase, TimestampedModel):
             'average_rating': obj.average_rating,
             'rating_count': obj.rating_count,
             'allergens': obj.allergens,
-            'category': obj.category.name if obj.category else None,
-            'selected_customization': obj.selected_customization
+            'category': obj.category.name if obj.category else None
         }
         return cls(**obj_dict)
 
+class CustomizedMenuItem(MenuItem):
+    """A menu item priced for one selection of options; never stored"""
+    selected_customization: Optional[Dict[str, Any]] = None
+    price_delta: float = 0.0
+    unit_price: float = 0.0
+
 class Category(CategoryBase, TimestampedModel):
     id: int
     is_active: bool
@@ -0,0 +1,30 @@
+from typing import List, Optional, Dict, Any
+from pydantic import BaseModel
+from datetime import datetime
+
+class OrderItem(BaseModel):
+    id: int
+    order_id: int
+    menu_item_id: int
+    name: str
+    quantity: int
+    unit_price: float
+    price_delta: float = 0.0
+    customizations: Optional[Dict[str, Any]] = None
+    line_total: float
+
+    class Config:
+        from_attributes = True
+
+class OrderResponse(BaseModel):
+    id: int
+    user_id: int
+    status: str
+    items: List[OrderItem] = []
+    subtotal: float
+    item_count: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, Optional
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
 
@@ -28,6 +28,19 @@ class MenuItemRating(MenuItemRatingBase):
 class MenuItemRatingResponse(MenuItemRating):
     pass
 
+class MenuItemRatingSummary(BaseModel):
+    """Average rating of one menu item, with the caller's own rating if any"""
+    menu_item_id: int
+    average: float
+    total: int
+    user_rating: Optional[int] = None
+
+class MenuItemRatingStats(BaseModel):
+    menu_item_id: int
+    average: float
+    total: int
+    distribution: Dict[int, int]
+
 class RestaurantFeedbackBase(BaseModel):
     feedback_text: str = Field(..., min_length=1, max_length=1000)
     service_rating: int = Field(..., ge=1, le=5)
@@ -53,6 +53,15 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+# Authenticated caller as carried in access-token claims
+class Principal(BaseModel):
+    id: int
+    email: str
+    role: str
+    is_admin: bool = False
+    is_guest: bool = False
+    token_version: int = 0
+
 # Properties to receive via API on login
 class UserLogin(BaseModel):
     email: str
@@ -0,0 +1,66 @@
+"""Microbenchmark for per-request token authentication.
+
+Compares verifying the JWT on every call with the verified-token cache used
+by ``decode_access_token``, both on their own and through
+``get_current_principal``.
+
+Usage (from the project root):
+    python backend/scripts/bench_auth.py [iterations]
+"""
+import asyncio
+import sys
+
+from bench_common import SessionLocal, compare, measure
+
+from jose import jwt
+
+from backend.models.orm.user import User
+from backend.utils.auth import (
+    ALGORITHM, SECRET_KEY, build_token_claims, create_access_token,
+    decode_access_token, get_current_principal, verified_token_cache
+)
+
+
+def seed(db):
+    user = User(
+        username="bench",
+        email="bench@example.com",
+        password_hash="x",
+        first_name="Bench",
+        last_name="User",
+        role="customer"
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def resolve(loop, token, db, cached: bool):
+    if not cached:
+        verified_token_cache.clear()
+    return loop.run_until_complete(get_current_principal(token, db))
+
+
+def main(iterations: int) -> None:
+    db = SessionLocal()
+    loop = asyncio.new_event_loop()
+    try:
+        token = create_access_token(data=build_token_claims(seed(db)))
+
+        compare(
+            "decode_access_token",
+            measure(lambda: jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]), iterations),
+            measure(lambda: decode_access_token(token), iterations),
+        )
+        compare(
+            "get_current_principal",
+            measure(lambda: resolve(loop, token, db, cached=False), iterations),
+            measure(lambda: resolve(loop, token, db, cached=True), iterations),
+        )
+    finally:
+        loop.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
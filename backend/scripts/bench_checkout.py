@@ -0,0 +1,131 @@
+"""Throughput benchmark for concurrent checkouts against SQLite.
+
+Every simulated customer has a filled cart and checks out from a thread pool.
+Each checkout is sent twice with the same Idempotency-Key, as a client retrying
+after a timeout would, and the run verifies that exactly one order per
+customer was placed. The legacy flow (read the cart, write the order line by
+line, clear the cart in a separate transaction) is timed for comparison.
+
+Usage (from the project root):
+    python backend/scripts/bench_checkout.py [customers] [workers] [lines]
+"""
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_common import SessionLocal
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+from backend.models.orm.menu import Category, MenuItem
+from backend.models.orm.order import Order, OrderItem
+from backend.models.orm.shopping_cart import ShoppingCart, CartItem
+from backend.models.orm.user import User
+from backend.services.cart_service import CartService, CartVersionConflict, recalculate_cart_totals
+from backend.services.order_service import OrderService
+
+
+def seed(prefix: str, customers: int, lines: int) -> list:
+    db = SessionLocal()
+    try:
+        category = Category(name=f"{prefix} Category")
+        db.add(category)
+        db.flush()
+        items = [MenuItem(name=f"{prefix} Item {i}", price=5.0 + i, category_id=category.id) for i in range(lines)]
+        users = [
+            User(username=f"{prefix}{i}", email=f"{prefix}{i}@example.com", password_hash="x",
+                 first_name="Bench", last_name="User", role="customer")
+            for i in range(customers)
+        ]
+        db.add_all(items + users)
+        db.flush()
+        carts = [ShoppingCart(user_id=user.id) for user in users]
+        db.add_all(carts)
+        db.flush()
+        db.add_all([
+            CartItem(cart_id=cart.id, menu_item_id=item.id, quantity=1 + i % 3)
+            for cart in carts for i, item in enumerate(items)
+        ])
+        db.flush()
+        recalculate_cart_totals(db, ShoppingCart.id.in_([cart.id for cart in carts]))
+        db.commit()
+        return [user.id for user in users]
+    finally:
+        db.close()
+
+
+def legacy_checkout(user_id: int) -> None:
+    db = SessionLocal()
+    try:
+        cart = CartService(db).get_or_create_cart(user_id)
+        if not cart.items:
+            return
+        order = Order(user_id=user_id, subtotal=cart.subtotal, item_count=cart.item_count)
+        db.add(order)
+        db.commit()
+        for line in cart.items:
+            db.add(OrderItem(order_id=order.id, menu_item_id=line.menu_item_id, name=line.menu_item.name,
+                             quantity=line.quantity, unit_price=line.menu_item.price))
+            db.commit()
+        CartService(db).clear_cart(user_id)
+    finally:
+        db.close()
+
+
+def current_checkout(user_id: int) -> None:
+    key = f"checkout-{user_id}"
+    # The second call stands in for a client retrying the same request
+    for _ in range(2):
+        db = SessionLocal()
+        try:
+            OrderService(db).checkout(user_id, idempotency_key=key)
+        finally:
+            db.close()
+
+
+def run(name: str, checkout, user_ids: list, workers: int) -> None:
+    latencies, failures = [], []
+
+    def task(user_id):
+        start = time.perf_counter()
+        try:
+            checkout(user_id)
+        except (OperationalError, ValueError, CartVersionConflict) as e:
+            failures.append(type(e).__name__)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(task, user_ids))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    db = SessionLocal()
+    try:
+        placed = db.scalar(select(func.count(Order.id)).where(Order.user_id.in_(user_ids)))
+        duplicates = db.scalar(
+            select(func.count()).select_from(
+                select(Order.user_id).where(Order.user_id.in_(user_ids))
+                .group_by(Order.user_id).having(func.count(Order.id) > 1).subquery()
+            )
+        )
+    finally:
+        db.close()
+    print(
+        f"{name:<10} {len(user_ids) / elapsed:8.1f} checkouts/s  "
+        f"p50={statistics.median(latencies):7.1f}ms  p95={latencies[int(len(latencies) * 0.95)]:7.1f}ms  "
+        f"orders={placed}/{len(user_ids)}  duplicate_customers={duplicates}  failures={len(failures)}"
+    )
+
+
+def main(customers: int, workers: int, lines: int) -> None:
+    print(f"{customers} customers, {workers} workers, {lines} lines per cart")
+    run("legacy", legacy_checkout, seed("legacy", customers, lines), workers)
+    run("current", current_checkout, seed("current", customers, lines), workers)
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:4]]
+    main(*(args + [200, 8, 5][len(args):]))
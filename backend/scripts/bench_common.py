@@ -0,0 +1,61 @@
+"""Shared setup for the benchmark scripts in this directory.
+
+Importing this module points DATABASE_URL at a throwaway SQLite file, so it
+must be imported before anything from ``backend``.
+"""
+import os
+import sys
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+# Force a scratch database BEFORE importing any backend modules
+bench_dir = Path(tempfile.mkdtemp(prefix="restaurant_bench_"))
+db_file = bench_dir / "bench.db"
+os.environ["DATABASE_URL"] = f"sqlite:///{db_file}"
+os.environ.setdefault("TESTING", "1")
+
+parent_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(parent_dir))
+
+import logging
+logging.disable(logging.CRITICAL)
+
+from backend.utils.database import Base, SessionLocal, engine
+import backend.models.orm  # noqa: F401  (registers every mapper)
+
+# SQL echo would dominate every measurement
+engine.echo = False
+Base.metadata.create_all(bind=engine)
+
+
+def measure(fn, iterations: int = 2000, warmup: int = 100) -> dict:
+    """Run ``fn`` repeatedly and return per-call timings in microseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    samples.sort()
+    return {
+        "mean": statistics.fmean(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[int(len(samples) * 0.95)],
+        "iterations": iterations,
+    }
+
+
+def report(name: str, stats: dict) -> None:
+    print(
+        f"{name:<45} mean={stats['mean']:8.1f}us  p50={stats['p50']:8.1f}us  "
+        f"p95={stats['p95']:8.1f}us  (n={stats['iterations']})"
+    )
+
+
+def compare(name: str, baseline: dict, candidate: dict) -> None:
+    report(f"{name} [legacy]", baseline)
+    report(f"{name} [current]", candidate)
+    print(f"{'':<45} speedup x{baseline['mean'] / candidate['mean']:.2f}")
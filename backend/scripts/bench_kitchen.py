@@ -0,0 +1,107 @@
+"""Simulation benchmark for the kitchen ticket queue.
+
+Replays the same stream of orders through the kitchen twice: once served
+first-in-first-out one ticket at a time, and once with the queue's
+shortest-preparation-first scheduling (with aging) and same-item batching.
+Orders arrive as a Poisson process over a service period; each one has a few
+lines drawn from a menu where popular items are ordered far more often. The
+simulation runs on a virtual clock, so no real time passes.
+
+Usage (from the project root):
+    python backend/scripts/bench_kitchen.py [orders_per_hour] [cooks] [hours] [seed]
+"""
+import heapq
+import random
+import statistics
+import sys
+
+import bench_common  # noqa: F401  (sets up sys.path for the backend package)
+
+from backend.services.kitchen_service import KitchenLine, KitchenQueue
+
+# (prep minutes, station) for a small restaurant menu
+MENU = [
+    (3, 1), (4, 1), (5, 1), (6, 2), (8, 2), (8, 3),
+    (10, 3), (12, 3), (15, 4), (18, 4), (22, 4), (25, 5),
+]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def order_stream(orders_per_hour: float, hours: float, seed: int) -> list:
+    rng = random.Random(seed)
+    # Zipf-like popularity: the first items on the menu sell the most
+    weights = [1 / (rank + 1) for rank in range(len(MENU))]
+    orders, at = [], 0.0
+    while True:
+        at += rng.expovariate(orders_per_hour / 3600)
+        if at > hours * 3600:
+            return orders
+        picks = rng.choices(range(len(MENU)), weights=weights, k=rng.randint(1, 4))
+        lines = [
+            KitchenLine(item_id, f"Item {item_id}", rng.choice((1, 1, 1, 2)), *MENU[item_id])
+            for item_id in picks
+        ]
+        orders.append((at, lines))
+
+
+def simulate(queue: KitchenQueue, clock: Clock, orders: list) -> dict:
+    events = [(at, 0, order_id, lines) for order_id, (at, lines) in enumerate(orders, 1)]
+    heapq.heapify(events)
+    placed_at, ready_at = {}, {}
+    tickets = 0
+
+    while events:
+        clock.now, kind, ref, lines = heapq.heappop(events)
+        if kind == 0:
+            placed_at[ref] = clock.now
+            tickets += len(queue.submit(ref, lines))
+        else:
+            for order_id in queue.complete(ref):
+                ready_at[order_id] = clock.now
+        # Every free cook starts the next batch straight away
+        while True:
+            batch = queue.start_next()
+            if batch is None:
+                break
+            heapq.heappush(events, (batch.ready_at, 1, batch.id, None))
+
+    waits = sorted((ready_at[order_id] - placed_at[order_id]) / 60 for order_id in placed_at)
+    return {
+        "tickets_per_hour": tickets / (clock.now / 3600),
+        "makespan_hours": clock.now / 3600,
+        "batches": queue.batches_done,
+        "mean": statistics.mean(waits),
+        "p95": waits[int(len(waits) * 0.95)],
+        "max": waits[-1],
+    }
+
+
+def report(name: str, result: dict) -> None:
+    print(
+        f"{name:<9} {result['tickets_per_hour']:7.1f} tickets/h  batches={result['batches']:<5} "
+        f"drained after {result['makespan_hours']:5.2f}h  order wait (min): mean={result['mean']:6.1f} "
+        f"p95={result['p95']:6.1f} max={result['max']:6.1f}"
+    )
+
+
+def main(orders_per_hour: float, cooks: int, hours: float, seed: int) -> None:
+    orders = order_stream(orders_per_hour, hours, seed)
+    lines = sum(len(order_lines) for _, order_lines in orders)
+    print(f"{len(orders)} orders ({lines} tickets) over {hours:g}h, {cooks} cooks, seed {seed}")
+    for name, policy in (("fifo", "fifo"), ("priority", "priority")):
+        clock = Clock()
+        report(name, simulate(KitchenQueue(cooks=cooks, policy=policy, clock=clock), clock, orders))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:5]
+    defaults = [20.0, 4, 3.0, 7]
+    values = [type(default)(arg) for default, arg in zip(defaults, args)]
+    main(*(values + defaults[len(values):]))
@@ -0,0 +1,82 @@
+"""Microbenchmark for the hot single-row lookups.
+
+Compares the legacy ``db.query(...).filter(...).first()`` construct with the
+prebuilt ``select()`` statements the services use now.
+
+Usage (from the project root):
+    python backend/scripts/bench_lookups.py [iterations]
+"""
+import sys
+
+from bench_common import SessionLocal, compare, measure
+
+from backend.models.orm.menu import Allergen, Category, MenuItem
+from backend.models.orm.shopping_cart import ShoppingCart
+from backend.models.orm.user import User
+from backend.services.cart_service import CartService
+from backend.services.menu_service import MenuService
+from backend.services.user_service import UserService
+
+
+def seed(db):
+    user = User(
+        username="bench",
+        email="bench@example.com",
+        password_hash="x",
+        first_name="Bench",
+        last_name="User",
+        role="customer"
+    )
+    category = Category(name="Bench Category")
+    allergen = Allergen(name="Bench Allergen")
+    db.add_all([user, category, allergen])
+    db.flush()
+    item = MenuItem(name="Bench Item", price=9.99, category_id=category.id)
+    db.add(item)
+    db.add(ShoppingCart(user_id=user.id))
+    db.commit()
+    return user.id, user.email, category.id, item.id, allergen.id
+
+
+def main(iterations: int) -> None:
+    db = SessionLocal()
+    try:
+        user_id, email, category_id, item_id, allergen_id = seed(db)
+        users = UserService(db)
+        carts = CartService(db)
+
+        cases = [
+            (
+                "UserService.get_user_by_email",
+                lambda: db.query(User).filter(User.email == email).first(),
+                lambda: users.get_user_by_email(email),
+            ),
+            (
+                "MenuService.get_menu_item",
+                lambda: db.query(MenuItem).filter(MenuItem.id == item_id).first(),
+                lambda: MenuService.get_menu_item(db, item_id),
+            ),
+            (
+                "MenuService.get_category",
+                lambda: db.query(Category).filter(Category.id == category_id).first(),
+                lambda: MenuService.get_category(db, category_id),
+            ),
+            (
+                "MenuService.get_allergen",
+                lambda: db.query(Allergen).filter(Allergen.id == allergen_id).first(),
+                lambda: MenuService.get_allergen(db, allergen_id),
+            ),
+            (
+                "CartService.get_or_create_cart",
+                lambda: db.query(ShoppingCart).filter(ShoppingCart.user_id == user_id).first(),
+                lambda: carts.get_or_create_cart(user_id),
+            ),
+        ]
+        for name, legacy, current in cases:
+            compare(name, measure(legacy, iterations), measure(current, iterations))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
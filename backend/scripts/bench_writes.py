@@ -0,0 +1,135 @@
+"""Write-latency benchmark for the main write endpoints.
+
+Drives the API in-process and reports, per endpoint, the request latency
+and the number of SQL statements executed per call.
+
+Usage (from the project root):
+    python backend/scripts/bench_writes.py [iterations]
+"""
+import sys
+import uuid
+
+from bench_common import SessionLocal, engine, measure, report
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from backend.api.app import app
+from backend.models.orm.user import User
+from backend.utils.auth import create_access_token
+
+statement_count = 0
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statements(conn, cursor, statement, parameters, context, executemany):
+    global statement_count
+    statement_count += 1
+
+
+def timed(name: str, fn, iterations: int) -> None:
+    global statement_count
+    statement_count = 0
+    stats = measure(fn, iterations=iterations, warmup=0)
+    report(name, stats)
+    print(f"{'':<45} statements/call={statement_count / iterations:.1f}")
+
+
+def main(iterations: int) -> None:
+    client = TestClient(app)
+
+    db = SessionLocal()
+    user = User(
+        username="benchwriter",
+        email="benchwriter@example.com",
+        password_hash="x",
+        first_name="Bench",
+        last_name="Writer",
+        role="customer"
+    )
+    db.add(user)
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+    db.close()
+
+    def create_category():
+        response = client.post("/api/menu/categories/", json={"name": f"Cat {uuid.uuid4()}"})
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+
+    category_id = create_category()
+    item_ids = []
+
+    def create_menu_item():
+        response = client.post("/api/menu/items/", json={
+            "name": f"Item {uuid.uuid4()}",
+            "price": 9.5,
+            "category_id": category_id,
+        })
+        assert response.status_code == 201, response.text
+        item_ids.append(response.json()["id"])
+
+    def register_user():
+        name = uuid.uuid4().hex[:12]
+        response = client.post("/api/users/register", json={
+            "username": name,
+            "email": f"{name}@example.com",
+            "password": "benchpass123",
+            "first_name": "Bench",
+            "last_name": "User",
+            "role": "customer",
+        })
+        assert response.status_code == 201, response.text
+
+    timed("POST /api/menu/categories/", create_category, iterations)
+    timed("POST /api/menu/items/", create_menu_item, iterations)
+    # bcrypt dominates registration, so keep the sample small
+    timed("POST /api/users/register", register_user, max(5, iterations // 50))
+
+    rated = iter(item_ids)
+
+    def rate_item():
+        item_id = next(rated)
+        response = client.post(
+            f"/api/ratings/menu-items/{item_id}",
+            headers=headers,
+            json={"menu_item_id": item_id, "rating": 4},
+        )
+        assert response.status_code == 200, response.text
+
+    timed("POST /api/ratings/menu-items/{id}", rate_item, iterations)
+
+    added = iter(item_ids)
+    cart_lines = []
+
+    def add_item():
+        response = client.post(
+            "/api/cart/items",
+            headers=headers,
+            json={"menu_item_id": next(added), "quantity": 1},
+        )
+        assert response.status_code == 200, response.text
+        cart_lines.append(response.json()["items"][-1]["id"])
+
+    def update_item():
+        response = client.put(
+            f"/api/cart/items/{cart_lines[0]}", headers=headers, json={"quantity": 3}
+        )
+        assert response.status_code == 200, response.text
+
+    def remove_item():
+        response = client.delete(f"/api/cart/items/{cart_lines.pop()}", headers=headers)
+        assert response.status_code == 200, response.text
+
+    def clear_cart():
+        response = client.delete("/api/cart", headers=headers)
+        assert response.status_code == 200, response.text
+
+    timed("POST /api/cart/items", add_item, iterations)
+    timed("PUT /api/cart/items/{id}", update_item, iterations)
+    timed("DELETE /api/cart/items/{id}", remove_item, iterations // 2)
+    timed("DELETE /api/cart", clear_cart, iterations)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
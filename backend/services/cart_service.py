@@ -1,156 +1,358 @@
-from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from sqlalchemy import select, update, bindparam, func, inspect
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.exc import SQLAlchemyError
 import logging
 
 from backend.models.orm.shopping_cart import ShoppingCart, CartItem
 from backend.models.orm.menu import MenuItem
-from backend.models.schemas.cart import CartItemCreate, CartItemUpdate
+from backend.models.schemas.cart import CartItemCreate, CartItemUpdate, CartOperation
+from backend.services.pricing_service import pricing_engine
 
 logger = logging.getLogger(__name__)
 
+# Prebuilt statements for the lookups every cart request goes through. The
+# cart always comes with its lines and their menu items: one query for the
+# cart, one for lines joined to menu items, whatever the number of lines.
+_CART_BY_USER = (
+    select(ShoppingCart)
+    .where(ShoppingCart.user_id == bindparam("user_id"))
+    .options(selectinload(ShoppingCart.items).joinedload(CartItem.menu_item))
+)
+_MENU_ITEM_BY_ID = select(MenuItem).where(MenuItem.id == bindparam("menu_item_id"))
+_CART_ID_BY_USER = select(ShoppingCart.id).where(ShoppingCart.user_id == bindparam("user_id"))
+_CART_SUBTOTAL_BY_USER = select(ShoppingCart.subtotal).where(ShoppingCart.user_id == bindparam("user_id"))
+
+class CartVersionConflict(Exception):
+    """Raised when a cart changed since the version the caller last saw."""
+
+# Denormalized cart totals, recomputed from the cart's lines in one statement.
+# The subqueries correlate to the shopping_carts row being updated. Every
+# change also bumps the cart's version, which is what If-Match is checked against.
+_CART_TOTALS = {
+    "version": ShoppingCart.version + 1,
+    "subtotal": select(func.coalesce(func.sum((MenuItem.price + CartItem.price_delta) * CartItem.quantity), 0.0))
+        .select_from(CartItem)
+        .join(MenuItem, MenuItem.id == CartItem.menu_item_id)
+        .where(CartItem.cart_id == ShoppingCart.id)
+        .scalar_subquery(),
+    "item_count": select(func.coalesce(func.sum(CartItem.quantity), 0))
+        .where(CartItem.cart_id == ShoppingCart.id)
+        .scalar_subquery(),
+}
+
+def recalculate_cart_totals(db: Session, *criteria, **values):
+    """Recompute subtotal and item_count for the carts matching ``criteria``.
+
+    Runs inside the caller's transaction; pending line changes must be flushed
+    first. Extra ``values`` are written in the same statement.
+    """
+    return db.execute(
+        update(ShoppingCart)
+        .where(*criteria)
+        .values(**{**_CART_TOTALS, **values})
+        .returning(
+            ShoppingCart.id, ShoppingCart.subtotal, ShoppingCart.item_count,
+            ShoppingCart.version, ShoppingCart.updated_at
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+
+def load_available_menu_items(db: Session, menu_item_ids) -> Dict[int, MenuItem]:
+    """Load the given menu items in one query, failing if any is missing or unavailable."""
+    menu_items = {
+        menu_item.id: menu_item
+        for menu_item in db.scalars(select(MenuItem).where(MenuItem.id.in_(menu_item_ids)))
+    }
+    for menu_item_id in menu_item_ids:
+        menu_item = menu_items.get(menu_item_id)
+        if not menu_item:
+            raise ValueError(f"Menu item {menu_item_id} not found")
+        if not menu_item.is_available:
+            raise ValueError(f"Menu item {menu_item_id} is not available")
+    return menu_items
+
 class CartService:
     def __init__(self, db: Session):
         self.db = db
 
+    def _commit_cart(self, cart_id: int, expected_version: Optional[int] = None):
+        """Update totals and version, as a compare-and-swap when ``expected_version`` is given.
+
+        Raises CartVersionConflict if another writer got there first; the
+        caller's transaction then holds nothing that should be kept.
+        """
+        criteria = [ShoppingCart.id == cart_id]
+        if expected_version is not None:
+            criteria.append(ShoppingCart.version == expected_version)
+        rows = recalculate_cart_totals(self.db, *criteria)
+        if not rows:
+            raise CartVersionConflict(f"Cart {cart_id} was modified by another request")
+        return rows[0]
+
+    def _refresh_totals(self, cart: ShoppingCart, expected_version: Optional[int] = None) -> None:
+        """Flush pending line changes and bring the cart's totals and version up to date."""
+        self.db.flush()
+        row = self._commit_cart(cart.id, expected_version)
+        set_committed_value(cart, "subtotal", row.subtotal)
+        set_committed_value(cart, "item_count", row.item_count)
+        set_committed_value(cart, "version", row.version)
+        set_committed_value(cart, "updated_at", row.updated_at)
+
+    def _check_version(self, cart: ShoppingCart, expected_version: Optional[int]) -> None:
+        # Fail fast on a stale version; _commit_cart still guards against races
+        if expected_version is not None and cart.version != expected_version:
+            raise CartVersionConflict(f"Cart {cart.id} was modified by another request")
+
+    def _load_cart(self, user_id: int, reload: bool = False) -> Optional[ShoppingCart]:
+        """Load the user's cart with lines and menu items in at most two queries."""
+        stmt = _CART_BY_USER
+        if reload:
+            stmt = stmt.execution_options(populate_existing=True)
+        return self.db.scalars(stmt, {"user_id": user_id}).first()
+
+    def _loaded(self, cart: ShoppingCart, user_id: int) -> ShoppingCart:
+        """Return the cart ready to serialize without lazy loads.
+
+        Sessions that expire on commit drop everything loaded so far; reload
+        the whole graph eagerly rather than one line at a time.
+        """
+        if inspect(cart).expired_attributes:
+            return self._load_cart(user_id, reload=True)
+        return cart
+
+    def _find_line(self, cart: ShoppingCart, item_id: int) -> CartItem:
+        cart_item = next((line for line in cart.items if line.id == item_id), None)
+        if not cart_item:
+            raise ValueError(f"Cart item {item_id} not found")
+        return cart_item
+
+    def _ensure_cart_id(self, user_id: int) -> int:
+        """Return the id of the user's cart, creating the cart if needed.
+
+        Concurrent first requests race harmlessly: the insert is a no-op for
+        all but one of them.
+        """
+        cart_id = self.db.scalar(_CART_ID_BY_USER, {"user_id": user_id})
+        if cart_id is None:
+            logger.debug(f"Creating new cart for user {user_id}")
+            self.db.execute(
+                insert(ShoppingCart)
+                .values(user_id=user_id)
+                .on_conflict_do_nothing(index_elements=[ShoppingCart.user_id])
+            )
+            cart_id = self.db.scalar(_CART_ID_BY_USER, {"user_id": user_id})
+        return cart_id
+
+    def _upsert_line(self, cart_id: int, menu_item: MenuItem, item_data: CartItemCreate) -> None:
+        """Insert a cart line, or add to the quantity of the existing one, in one statement.
+
+        Customizations are validated and priced against ``menu_item`` first.
+        """
+        price_delta = pricing_engine.price_delta(menu_item, item_data.customizations)
+        stmt = insert(CartItem).values(
+            cart_id=cart_id,
+            menu_item_id=item_data.menu_item_id,
+            quantity=item_data.quantity,
+            customizations=item_data.customizations,
+            price_delta=price_delta
+        )
+        set_ = {
+            "quantity": CartItem.quantity + stmt.excluded.quantity,
+            "updated_at": func.now(),
+        }
+        if item_data.customizations:
+            set_["customizations"] = stmt.excluded.customizations
+            set_["price_delta"] = stmt.excluded.price_delta
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[CartItem.cart_id, CartItem.menu_item_id],
+            set_=set_
+        ))
+
     def get_or_create_cart(self, user_id: int) -> ShoppingCart:
         """Get the user's cart or create one if it doesn't exist"""
         try:
-            cart = self.db.query(ShoppingCart).filter(ShoppingCart.user_id == user_id).first()
+            cart = self._load_cart(user_id)
             if not cart:
-                logger.debug(f"Creating new cart for user {user_id}")
-                cart = ShoppingCart(user_id=user_id)
-                self.db.add(cart)
+                self._ensure_cart_id(user_id)
                 self.db.commit()
-                self.db.refresh(cart)
+                cart = self._load_cart(user_id)
             return cart
         except SQLAlchemyError as e:
             logger.error(f"Database error in get_or_create_cart: {str(e)}")
             self.db.rollback()
             raise
 
-    def add_item(self, user_id: int, item_data: CartItemCreate) -> ShoppingCart:
+    def _update_line(self, cart: ShoppingCart, item_id: int, item_update: CartItemUpdate) -> None:
+        cart_item = self._find_line(cart, item_id)
+        # Validate before touching the line so a bad selection changes nothing
+        price_delta = None
+        if item_update.customizations is not None:
+            price_delta = pricing_engine.price_delta(cart_item.menu_item, item_update.customizations)
+
+        if item_update.quantity is not None:
+            if item_update.quantity <= 0:
+                # Remove item if quantity is 0 or negative
+                cart.items.remove(cart_item)
+            else:
+                cart_item.quantity = item_update.quantity
+
+        if price_delta is not None:
+            cart_item.customizations = item_update.customizations
+            cart_item.price_delta = price_delta
+
+    def _remove_line(self, cart: ShoppingCart, item_id: int) -> None:
+        cart.items.remove(self._find_line(cart, item_id))
+
+    def _clear_lines(self, cart: ShoppingCart) -> None:
+        # Write out pending lines first so the bulk delete sees them too
+        self.db.flush()
+        self.db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
+        # Mark the collection as loaded-and-empty instead of reloading it
+        set_committed_value(cart, "items", [])
+
+    def add_item(self, user_id: int, item_data: CartItemCreate, expected_version: Optional[int] = None) -> ShoppingCart:
         """Add an item to the cart"""
         try:
             # Verify menu item exists
-            menu_item = self.db.query(MenuItem).get(item_data.menu_item_id)
+            menu_item = self.db.scalars(
+                _MENU_ITEM_BY_ID, {"menu_item_id": item_data.menu_item_id}
+            ).first()
             if not menu_item:
                 raise ValueError(f"Menu item {item_data.menu_item_id} not found")
             if not menu_item.is_available:
                 raise ValueError(f"Menu item {item_data.menu_item_id} is not available")
 
-            cart = self.get_or_create_cart(user_id)
-
-            # Check if item already exists in cart
-            existing_item = self.db.query(CartItem).filter(
-                CartItem.cart_id == cart.id,
-                CartItem.menu_item_id == item_data.menu_item_id
-            ).first()
-
-            if existing_item:
-                # Update quantity and customizations
-                existing_item.quantity += item_data.quantity
-                if item_data.customizations:
-                    existing_item.customizations = item_data.customizations
-            else:
-                # Create new cart item
-                cart_item = CartItem(
-                    cart_id=cart.id,
-                    menu_item_id=item_data.menu_item_id,
-                    quantity=item_data.quantity,
-                    customizations=item_data.customizations
-                )
-                self.db.add(cart_item)
-
+            # Upsert the line without reading it first, so parallel adds
+            # for the same item accumulate instead of overwriting each other
+            cart_id = self._ensure_cart_id(user_id)
+            self._upsert_line(cart_id, menu_item, item_data)
+            self._commit_cart(cart_id, expected_version)
             self.db.commit()
-            self.db.refresh(cart)
-            return cart
+            return self._load_cart(user_id, reload=True)
 
+        except (ValueError, CartVersionConflict):
+            self.db.rollback()
+            raise
         except SQLAlchemyError as e:
             logger.error(f"Database error in add_item: {str(e)}")
             self.db.rollback()
             raise
 
-    def update_item(self, user_id: int, item_id: int, item_update: CartItemUpdate) -> ShoppingCart:
+    def update_item(self, user_id: int, item_id: int, item_update: CartItemUpdate,
+                    expected_version: Optional[int] = None) -> ShoppingCart:
         """Update a cart item's quantity or customizations"""
         try:
             cart = self.get_or_create_cart(user_id)
-            cart_item = self.db.query(CartItem).filter(
-                CartItem.id == item_id,
-                CartItem.cart_id == cart.id
-            ).first()
-
-            if not cart_item:
-                raise ValueError(f"Cart item {item_id} not found")
-
-            if item_update.quantity is not None:
-                if item_update.quantity <= 0:
-                    # Remove item if quantity is 0 or negative
-                    self.db.delete(cart_item)
-                else:
-                    cart_item.quantity = item_update.quantity
-
-            if item_update.customizations is not None:
-                cart_item.customizations = item_update.customizations
-
+            self._check_version(cart, expected_version)
+            self._update_line(cart, item_id, item_update)
+            self._refresh_totals(cart, expected_version)
             self.db.commit()
-            self.db.refresh(cart)
-            return cart
+            return self._loaded(cart, user_id)
 
+        except CartVersionConflict:
+            self.db.rollback()
+            raise
         except SQLAlchemyError as e:
             logger.error(f"Database error in update_item: {str(e)}")
             self.db.rollback()
             raise
 
-    def remove_item(self, user_id: int, item_id: int) -> ShoppingCart:
+    def remove_item(self, user_id: int, item_id: int, expected_version: Optional[int] = None) -> ShoppingCart:
         """Remove an item from the cart"""
         try:
             cart = self.get_or_create_cart(user_id)
-            cart_item = self.db.query(CartItem).filter(
-                CartItem.id == item_id,
-                CartItem.cart_id == cart.id
-            ).first()
-
-            if not cart_item:
-                raise ValueError(f"Cart item {item_id} not found")
-
-            self.db.delete(cart_item)
+            self._check_version(cart, expected_version)
+            self._remove_line(cart, item_id)
+            self._refresh_totals(cart, expected_version)
             self.db.commit()
-            self.db.refresh(cart)
-            return cart
+            return self._loaded(cart, user_id)
 
+        except CartVersionConflict:
+            self.db.rollback()
+            raise
         except SQLAlchemyError as e:
             logger.error(f"Database error in remove_item: {str(e)}")
             self.db.rollback()
             raise
 
-    def clear_cart(self, user_id: int) -> ShoppingCart:
+    def clear_cart(self, user_id: int, expected_version: Optional[int] = None) -> ShoppingCart:
         """Remove all items from the cart"""
         try:
             cart = self.get_or_create_cart(user_id)
-            self.db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
+            self._check_version(cart, expected_version)
+            self._clear_lines(cart)
+            self._refresh_totals(cart, expected_version)
             self.db.commit()
-            self.db.refresh(cart)
-            return cart
+            return self._loaded(cart, user_id)
 
+        except CartVersionConflict:
+            self.db.rollback()
+            raise
         except SQLAlchemyError as e:
             logger.error(f"Database error in clear_cart: {str(e)}")
             self.db.rollback()
             raise
 
-    def calculate_total(self, user_id: int) -> float:
-        """Calculate the total price of all items in the cart"""
+    def apply_batch(self, user_id: int, operations: List[CartOperation],
+                    expected_version: Optional[int] = None) -> ShoppingCart:
+        """Apply an ordered list of cart operations in a single transaction.
+
+        Every referenced menu item is validated up front with one query. If any
+        operation fails, none of them are applied.
+        """
         try:
+            menu_item_ids = {op.menu_item_id for op in operations if op.op == "add"}
+            menu_items = load_available_menu_items(self.db, menu_item_ids) if menu_item_ids else {}
+
             cart = self.get_or_create_cart(user_id)
-            total = 0.0
+            self._check_version(cart, expected_version)
+            for op in operations:
+                if op.op == "add":
+                    # Earlier in-memory edits must reach the row the upsert changes
+                    self.db.flush()
+                    self._upsert_line(cart.id, menu_items[op.menu_item_id], CartItemCreate(
+                        menu_item_id=op.menu_item_id,
+                        quantity=op.quantity,
+                        customizations=op.customizations
+                    ))
+                    self.db.expire(cart, ["items"])
+                elif op.op == "update":
+                    self._update_line(cart, op.item_id, CartItemUpdate(
+                        quantity=op.quantity,
+                        customizations=op.customizations
+                    ))
+                elif op.op == "remove":
+                    self._remove_line(cart, op.item_id)
+                else:
+                    self._clear_lines(cart)
+
+            self._refresh_totals(cart, expected_version)
+            self.db.commit()
+            # Upserted lines changed underneath the loaded objects
+            return self._load_cart(user_id, reload=True)
+
+        except (ValueError, CartVersionConflict):
+            self.db.rollback()
+            raise
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in apply_batch: {str(e)}")
+            self.db.rollback()
+            raise
 
-            for item in cart.items:
-                menu_item = self.db.query(MenuItem).get(item.menu_item_id)
-                if menu_item:
-                    total += menu_item.price * item.quantity
+    def calculate_total(self, user_id: int) -> float:
+        """Get the total price of all items in the cart.
 
-            return total
+        Reads the subtotal kept on the cart row; a user without a cart has a
+        total of 0.
+        """
+        try:
+            subtotal = self.db.scalar(_CART_SUBTOTAL_BY_USER, {"user_id": user_id})
+            return subtotal or 0.0
 
         except SQLAlchemyError as e:
             logger.error(f"Database error in calculate_total: {str(e)}")
             self.db.rollback()
-            raise 
\ No newline at end of file
+            raise
@@ -0,0 +1,481 @@
+from collections import OrderedDict
+from datetime import datetime
+from itertools import count
+from threading import RLock
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+import logging
+import os
+import time
+
+from backend.models.orm.menu import MenuItem
+from backend.models.orm.shopping_cart import ShoppingCart, CartItem
+from backend.models.schemas.cart import CartItemCreate, CartItemUpdate, CartOperation
+from backend.services.cart_service import (
+    CartService, CartVersionConflict, load_available_menu_items, recalculate_cart_totals
+)
+from backend.services.pricing_service import pricing_engine
+from backend.utils.database import SessionLocal
+from backend.utils.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+GUEST_CART_WRITE_BEHIND = os.getenv("GUEST_CART_WRITE_BEHIND", "0") == "1"
+GUEST_CART_STORE_SIZE = int(os.getenv("GUEST_CART_STORE_SIZE", "2000"))
+# Upper bound on how long a guest cart change may live only in memory
+GUEST_CART_FLUSH_SECONDS = float(os.getenv("GUEST_CART_FLUSH_SECONDS", "2"))
+
+# Lines that have not reached the database yet get negative ids
+_temporary_ids = count(-1, -1)
+
+
+class GuestCartLine:
+    """In-memory cart line, shaped like CartItem for the response schema."""
+
+    __slots__ = ("id", "cart_id", "menu_item_id", "quantity", "customizations",
+                 "price_delta", "unit_price", "created_at", "updated_at")
+
+    def __init__(self, id: int, cart_id: int, menu_item_id: int, quantity: int,
+                 customizations: Optional[Dict[str, Any]], price_delta: float, unit_price: float,
+                 created_at: datetime, updated_at: datetime):
+        self.id = id
+        self.cart_id = cart_id
+        self.menu_item_id = menu_item_id
+        self.quantity = quantity
+        self.customizations = customizations
+        self.price_delta = price_delta
+        # Menu price plus price_delta
+        self.unit_price = unit_price
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+
+class GuestCart:
+    """In-memory guest cart, shaped like ShoppingCart for the response schema."""
+
+    def __init__(self, id: int, user_id: int, version: int, created_at: datetime,
+                 updated_at: datetime, items: List[GuestCartLine]):
+        self.id = id
+        self.user_id = user_id
+        self.version = version
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.items = items
+        self.subtotal = 0.0
+        self.item_count = 0
+        self.dirty = False
+        # Temporary line ids handed out before a flush, mapped to the real ids
+        self.aliases: Dict[int, int] = {}
+        self._recalculate()
+
+    @classmethod
+    def from_orm(cls, cart: ShoppingCart) -> "GuestCart":
+        return cls(
+            id=cart.id,
+            user_id=cart.user_id,
+            version=cart.version,
+            created_at=cart.created_at,
+            updated_at=cart.updated_at,
+            items=[
+                GuestCartLine(
+                    id=line.id,
+                    cart_id=line.cart_id,
+                    menu_item_id=line.menu_item_id,
+                    quantity=line.quantity,
+                    customizations=line.customizations,
+                    price_delta=line.price_delta or 0.0,
+                    unit_price=(line.menu_item.price or 0.0) + (line.price_delta or 0.0),
+                    created_at=line.created_at,
+                    updated_at=line.updated_at
+                )
+                for line in cart.items
+            ]
+        )
+
+    def _recalculate(self) -> None:
+        self.subtotal = sum(line.unit_price * line.quantity for line in self.items)
+        self.item_count = sum(line.quantity for line in self.items)
+
+    def touch(self) -> None:
+        """Record a change: new version, fresh totals, pending flush."""
+        self.version += 1
+        self.updated_at = datetime.utcnow()
+        self.dirty = True
+        self._recalculate()
+
+    def find_line(self, item_id: int) -> GuestCartLine:
+        item_id = self.aliases.get(item_id, item_id)
+        line = next((line for line in self.items if line.id == item_id), None)
+        if not line:
+            raise ValueError(f"Cart item {item_id} not found")
+        return line
+
+
+class GuestCartStore:
+    """Bounded LRU of guest carts whose changes are written to the database later.
+
+    Mutations only touch memory and mark the cart dirty. ``flush`` writes every
+    dirty cart in one transaction, replacing each cart's lines with upserts.
+    Carts pushed out of the LRU while dirty are parked until they are flushed,
+    so a returning guest never reads a stale copy from the database.
+    """
+
+    def __init__(self, maxsize: int, enabled: bool = False):
+        self.maxsize = maxsize
+        self.enabled = enabled
+        self._carts: "OrderedDict[int, GuestCart]" = OrderedDict()
+        self._evicted: Dict[int, GuestCart] = {}
+        self._lock = RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.flushes = 0
+        self.flushed_carts = 0
+        self.last_flush_seconds = 0.0
+
+    @property
+    def lock(self) -> RLock:
+        return self._lock
+
+    def get(self, user_id: int) -> Optional[GuestCart]:
+        with self._lock:
+            cart = self._carts.get(user_id)
+            if cart is not None:
+                self._carts.move_to_end(user_id)
+                self.hits += 1
+                return cart
+            cart = self._evicted.pop(user_id, None)
+            if cart is not None:
+                self.hits += 1
+                self._admit(cart)
+                return cart
+            self.misses += 1
+            return None
+
+    def put(self, cart: GuestCart) -> List[int]:
+        """Admit a cart unless one is already held for the user.
+
+        Returns the user ids of dirty carts that were evicted to make room.
+        """
+        with self._lock:
+            if cart.user_id in self._carts:
+                return []
+            return self._admit(cart)
+
+    def _admit(self, cart: GuestCart) -> List[int]:
+        self._carts[cart.user_id] = cart
+        evicted = []
+        while len(self._carts) > self.maxsize:
+            _, old = self._carts.popitem(last=False)
+            self.evictions += 1
+            if old.dirty:
+                self._evicted[old.user_id] = old
+                evicted.append(old.user_id)
+        return evicted
+
+    def discard(self, *user_ids: int) -> None:
+        """Forget carts without flushing them (e.g. their users were deleted)."""
+        with self._lock:
+            for user_id in user_ids:
+                self._carts.pop(user_id, None)
+                self._evicted.pop(user_id, None)
+
+    def reprice(self, menu_item: MenuItem) -> int:
+        """Reprice held lines of ``menu_item`` after its price or options change.
+
+        Repriced carts are touched, so the next flush writes the new prices
+        over the ones the menu update stored. Returns how many carts changed.
+        """
+        with self._lock:
+            repriced = 0
+            for cart in list(self._carts.values()) + list(self._evicted.values()):
+                lines = [line for line in cart.items if line.menu_item_id == menu_item.id]
+                if not lines:
+                    continue
+                for line in lines:
+                    # Choices no longer offered add nothing, as for stored lines
+                    line.price_delta = pricing_engine.price_delta(menu_item, line.customizations, strict=False)
+                    line.unit_price = (menu_item.price or 0.0) + line.price_delta
+                cart.touch()
+                repriced += 1
+            return repriced
+
+    def flush(self, db: Session, user_ids: Optional[Iterable[int]] = None) -> int:
+        """Write dirty carts (all, or only those of ``user_ids``) in one transaction.
+
+        Carts stay dirty until the commit succeeds, and a cart changed while
+        it was being written stays dirty for the next flush.
+        """
+        started = time.perf_counter()
+        wanted = set(user_ids) if user_ids is not None else None
+        with self._lock:
+            carts = [
+                cart for cart in list(self._carts.values()) + list(self._evicted.values())
+                if cart.dirty and (wanted is None or cart.user_id in wanted)
+            ]
+            snapshots = [
+                (cart, cart.version, [
+                    (line.menu_item_id, line.quantity, line.customizations, line.price_delta)
+                    for line in cart.items
+                ])
+                for cart in carts
+            ]
+        if not snapshots:
+            return 0
+
+        try:
+            for cart, version, lines in snapshots:
+                if lines:
+                    stmt = insert(CartItem).values([
+                        {"cart_id": cart.id, "menu_item_id": menu_item_id, "quantity": quantity,
+                         "customizations": customizations, "price_delta": price_delta}
+                        for menu_item_id, quantity, customizations, price_delta in lines
+                    ])
+                    set_ = {
+                        "quantity": stmt.excluded.quantity,
+                        "customizations": stmt.excluded.customizations,
+                        "price_delta": stmt.excluded.price_delta,
+                        "updated_at": func.now(),
+                    }
+                    db.execute(stmt.on_conflict_do_update(
+                        index_elements=[CartItem.cart_id, CartItem.menu_item_id], set_=set_
+                    ))
+                db.execute(delete(CartItem).where(
+                    CartItem.cart_id == cart.id,
+                    CartItem.menu_item_id.not_in([line[0] for line in lines])
+                ))
+                # Keep the stored version in step with the one clients have seen
+                recalculate_cart_totals(db, ShoppingCart.id == cart.id, version=version)
+            rows = db.execute(
+                select(CartItem.id, CartItem.cart_id, CartItem.menu_item_id)
+                .where(CartItem.cart_id.in_([cart.id for cart in carts]))
+            ).all()
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        real_ids = {(row.cart_id, row.menu_item_id): row.id for row in rows}
+        with self._lock:
+            for cart, version, _ in snapshots:
+                if cart.version == version:
+                    cart.dirty = False
+                for line in cart.items:
+                    real_id = real_ids.get((cart.id, line.menu_item_id))
+                    if line.id < 0 and real_id is not None:
+                        cart.aliases[line.id] = real_id
+                        line.id = real_id
+                if not cart.dirty and self._evicted.get(cart.user_id) is cart:
+                    del self._evicted[cart.user_id]
+            self.flushes += 1
+            self.flushed_carts += len(carts)
+            self.last_flush_seconds = round(time.perf_counter() - started, 4)
+        logger.debug(f"Flushed {len(carts)} guest carts")
+        return len(carts)
+
+    def evict(self, user_id: int, db: Session) -> None:
+        """Flush one user's cart and stop holding it in memory."""
+        self.flush(db, [user_id])
+        self.discard(user_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._carts.clear()
+            self._evicted.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "size": len(self._carts),
+                "maxsize": self.maxsize,
+                "dirty": sum(1 for cart in self._carts.values() if cart.dirty) + len(self._evicted),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "flushes": self.flushes,
+                "flushed_carts": self.flushed_carts,
+                "last_flush_seconds": self.last_flush_seconds,
+            }
+
+
+guest_cart_store = GuestCartStore(maxsize=GUEST_CART_STORE_SIZE, enabled=GUEST_CART_WRITE_BEHIND)
+register_metrics("guest_cart_store", guest_cart_store.stats)
+
+
+def run_guest_cart_flush() -> int:
+    """Entry point for the periodic guest cart flush job."""
+    db = SessionLocal()
+    try:
+        return guest_cart_store.flush(db)
+    finally:
+        db.close()
+
+
+class GuestCartService:
+    """CartService counterpart for guests, backed by the write-behind store.
+
+    Menu items are still validated against the database, but cart changes are
+    applied in memory and reach the database on the next flush.
+    """
+
+    def __init__(self, db: Session, store: GuestCartStore = guest_cart_store):
+        self.db = db
+        self.store = store
+
+    def _cart(self, user_id: int) -> GuestCart:
+        cart = self.store.get(user_id)
+        if cart is None:
+            evicted = self.store.put(GuestCart.from_orm(CartService(self.db).get_or_create_cart(user_id)))
+            cart = self.store.get(user_id)
+            # Carts pushed out while dirty are written now rather than on the next cycle
+            self._flush_evicted(evicted)
+        return cart
+
+    def _check_version(self, cart: GuestCart, expected_version: Optional[int]) -> None:
+        if expected_version is not None and cart.version != expected_version:
+            raise CartVersionConflict(f"Cart {cart.id} was modified by another request")
+
+    def _line_menu_items(self, cart: GuestCart, item_ids: Iterable[int]) -> Dict[int, MenuItem]:
+        """Load the menu items behind the given lines, to reprice new customizations."""
+        wanted = {cart.aliases.get(item_id, item_id) for item_id in item_ids}
+        menu_item_ids = {line.menu_item_id for line in cart.items if line.id in wanted}
+        if not menu_item_ids:
+            return {}
+        return {
+            menu_item.id: menu_item
+            for menu_item in self.db.scalars(select(MenuItem).where(MenuItem.id.in_(menu_item_ids)))
+        }
+
+    def _add_line(self, cart: GuestCart, menu_item: MenuItem, item_data: CartItemCreate) -> None:
+        price_delta = pricing_engine.price_delta(menu_item, item_data.customizations)
+        line = next((line for line in cart.items if line.menu_item_id == menu_item.id), None)
+        now = datetime.utcnow()
+        if line:
+            line.quantity += item_data.quantity
+            if item_data.customizations:
+                line.customizations = item_data.customizations
+                line.price_delta = price_delta
+                line.unit_price = (menu_item.price or 0.0) + price_delta
+            line.updated_at = now
+        else:
+            cart.items.append(GuestCartLine(
+                id=next(_temporary_ids),
+                cart_id=cart.id,
+                menu_item_id=menu_item.id,
+                quantity=item_data.quantity,
+                customizations=item_data.customizations,
+                price_delta=price_delta,
+                unit_price=(menu_item.price or 0.0) + price_delta,
+                created_at=now,
+                updated_at=now
+            ))
+
+    def _update_line(self, cart: GuestCart, item_id: int, item_update: CartItemUpdate,
+                     menu_items: Dict[int, MenuItem]) -> None:
+        line = cart.find_line(item_id)
+        price_delta = None
+        if item_update.customizations is not None:
+            menu_item = menu_items[line.menu_item_id]
+            price_delta = pricing_engine.price_delta(menu_item, item_update.customizations)
+        if item_update.quantity is not None:
+            if item_update.quantity <= 0:
+                cart.items.remove(line)
+            else:
+                line.quantity = item_update.quantity
+        if price_delta is not None:
+            line.customizations = item_update.customizations
+            line.price_delta = price_delta
+            line.unit_price = (menu_item.price or 0.0) + price_delta
+        line.updated_at = datetime.utcnow()
+
+    def _flush_evicted(self, evicted: List[int]) -> None:
+        if evicted:
+            self.store.flush(self.db, evicted)
+
+    def get_or_create_cart(self, user_id: int) -> GuestCart:
+        return self._cart(user_id)
+
+    def add_item(self, user_id: int, item_data: CartItemCreate, expected_version: Optional[int] = None) -> GuestCart:
+        menu_item = load_available_menu_items(self.db, [item_data.menu_item_id])[item_data.menu_item_id]
+        cart = self._cart(user_id)
+        with self.store.lock:
+            self._check_version(cart, expected_version)
+            self._add_line(cart, menu_item, item_data)
+            cart.touch()
+        return cart
+
+    def update_item(self, user_id: int, item_id: int, item_update: CartItemUpdate,
+                    expected_version: Optional[int] = None) -> GuestCart:
+        cart = self._cart(user_id)
+        menu_items = self._line_menu_items(cart, [item_id]) if item_update.customizations is not None else {}
+        with self.store.lock:
+            self._check_version(cart, expected_version)
+            self._update_line(cart, item_id, item_update, menu_items)
+            cart.touch()
+        return cart
+
+    def remove_item(self, user_id: int, item_id: int, expected_version: Optional[int] = None) -> GuestCart:
+        cart = self._cart(user_id)
+        with self.store.lock:
+            self._check_version(cart, expected_version)
+            cart.items.remove(cart.find_line(item_id))
+            cart.touch()
+        return cart
+
+    def clear_cart(self, user_id: int, expected_version: Optional[int] = None) -> GuestCart:
+        cart = self._cart(user_id)
+        with self.store.lock:
+            self._check_version(cart, expected_version)
+            cart.items = []
+            cart.touch()
+        return cart
+
+    def apply_batch(self, user_id: int, operations: List[CartOperation],
+                    expected_version: Optional[int] = None) -> GuestCart:
+        menu_item_ids = {op.menu_item_id for op in operations if op.op == "add"}
+        menu_items = load_available_menu_items(self.db, menu_item_ids) if menu_item_ids else {}
+        cart = self._cart(user_id)
+        menu_items.update(self._line_menu_items(cart, [
+            op.item_id for op in operations if op.op == "update" and op.customizations is not None
+        ]))
+        with self.store.lock:
+            self._check_version(cart, expected_version)
+            # Work on copies so a failing operation leaves the cart untouched
+            original = [
+                (line, line.quantity, line.customizations, line.price_delta, line.unit_price)
+                for line in cart.items
+            ]
+            items = list(cart.items)
+            try:
+                for op in operations:
+                    if op.op == "add":
+                        self._add_line(cart, menu_items[op.menu_item_id], CartItemCreate(
+                            menu_item_id=op.menu_item_id,
+                            quantity=op.quantity,
+                            customizations=op.customizations
+                        ))
+                    elif op.op == "update":
+                        self._update_line(cart, op.item_id, CartItemUpdate(
+                            quantity=op.quantity,
+                            customizations=op.customizations
+                        ), menu_items)
+                    elif op.op == "remove":
+                        cart.items.remove(cart.find_line(op.item_id))
+                    else:
+                        cart.items = []
+            except Exception:
+                for line, quantity, customizations, price_delta, unit_price in original:
+                    line.quantity = quantity
+                    line.customizations = customizations
+                    line.price_delta = price_delta
+                    line.unit_price = unit_price
+                cart.items = items
+                raise
+            cart.touch()
+        return cart
+
+    def calculate_total(self, user_id: int) -> float:
+        return self._cart(user_id).subtotal
@@ -0,0 +1,397 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from itertools import count
+from threading import RLock
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+import heapq
+import logging
+import os
+import time
+
+from backend.models.orm.order import Order, OrderItem
+from backend.models.orm.menu import MenuItem
+from backend.utils.database import SessionLocal
+from backend.utils.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+KITCHEN_COOKS = int(os.getenv("KITCHEN_COOKS", "4"))
+# Seconds of priority a ticket gains per second waited, so long dishes are not starved
+KITCHEN_AGING_FACTOR = float(os.getenv("KITCHEN_AGING_FACTOR", "0.5"))
+# Units of one menu item a cook prepares together in a single batch
+KITCHEN_BATCH_SIZE = int(os.getenv("KITCHEN_BATCH_SIZE", "4"))
+KITCHEN_DEFAULT_PREP_MINUTES = float(os.getenv("KITCHEN_DEFAULT_PREP_MINUTES", "10"))
+
+# Orders the kitchen still owes; their tickets are re-queued on startup
+OPEN_ORDER_STATUSES = ("placed", "preparing")
+
+
+@dataclass(frozen=True)
+class KitchenLine:
+    """What the kitchen needs to know about one order line."""
+    menu_item_id: int
+    name: str
+    quantity: int
+    prep_minutes: Optional[float]
+    station: Optional[int]
+
+
+class KitchenTicket:
+    __slots__ = ("id", "order_id", "menu_item_id", "name", "quantity", "prep_minutes",
+                 "station", "enqueued_at", "key", "batch_id", "done")
+
+    def __init__(self, id: int, order_id: int, line: KitchenLine, enqueued_at: float, key: float):
+        self.id = id
+        self.order_id = order_id
+        self.menu_item_id = line.menu_item_id
+        self.name = line.name
+        self.quantity = line.quantity
+        self.prep_minutes = line.prep_minutes if line.prep_minutes is not None else KITCHEN_DEFAULT_PREP_MINUTES
+        self.station = line.station
+        self.enqueued_at = enqueued_at
+        self.key = key
+        self.batch_id: Optional[int] = None
+        self.done = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "order_id": self.order_id,
+            "menu_item_id": self.menu_item_id,
+            "name": self.name,
+            "quantity": self.quantity,
+            "prep_minutes": self.prep_minutes,
+            "station": self.station,
+        }
+
+
+class KitchenBatch:
+    """Tickets for one menu item that a cook prepares together."""
+
+    __slots__ = ("id", "menu_item_id", "tickets", "prep_minutes", "started_at")
+
+    def __init__(self, id: int, tickets: List[KitchenTicket], started_at: float, batch_size: int):
+        self.id = id
+        self.menu_item_id = tickets[0].menu_item_id
+        self.tickets = tickets
+        self.prep_minutes = max(_ticket_work_minutes(ticket, batch_size) for ticket in tickets)
+        self.started_at = started_at
+
+    @property
+    def ready_at(self) -> float:
+        return self.started_at + self.prep_minutes * 60
+
+    @property
+    def order_ids(self) -> List[int]:
+        return sorted({ticket.order_id for ticket in self.tickets})
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "menu_item_id": self.menu_item_id,
+            "quantity": sum(ticket.quantity for ticket in self.tickets),
+            "order_ids": self.order_ids,
+            "tickets": [ticket.to_dict() for ticket in self.tickets],
+            "ready_in_seconds": round(max(self.ready_at - now, 0.0), 1),
+        }
+
+
+def _ticket_work_minutes(ticket: KitchenTicket, batch_size: int) -> float:
+    # A ticket larger than a batch needs several rounds at the stove
+    return ticket.prep_minutes * -(-ticket.quantity // max(batch_size, 1))
+
+
+class KitchenQueue:
+    """In-process queue of kitchen tickets, one ticket per order line.
+
+    Tickets are ordered shortest-preparation-first with aging: the heap key is
+    ``prep_seconds + aging * enqueued_at``, which ranks tickets exactly like
+    ``prep_seconds - aging * waited`` at any moment without re-keying. When a
+    cook takes the next ticket, other waiting tickets for the same menu item
+    join it (up to ``batch_size`` units) so dishes that cook together are
+    fired together. With ``policy="fifo"`` tickets are served one at a time in
+    arrival order, which is what the simulation benchmark compares against.
+
+    Outstanding prep minutes are kept per station (menu category) as tickets
+    arrive and complete, and ETAs come from replaying the current schedule
+    over the cooks, cached until the queue next changes.
+    """
+
+    def __init__(self, cooks: int = KITCHEN_COOKS, aging: float = KITCHEN_AGING_FACTOR,
+                 batch_size: int = KITCHEN_BATCH_SIZE, policy: str = "priority",
+                 clock: Callable[[], float] = time.monotonic):
+        if policy not in ("priority", "fifo"):
+            raise ValueError(f"Unknown kitchen queue policy: {policy}")
+        self.cooks = cooks
+        self.aging = aging
+        self.batch_size = batch_size if policy == "priority" else 1
+        self.policy = policy
+        self.clock = clock
+        self._heap: List[tuple] = []
+        self._waiting: Dict[int, KitchenTicket] = {}
+        self._waiting_by_item: Dict[int, List[KitchenTicket]] = defaultdict(list)
+        self._batches: Dict[int, KitchenBatch] = {}
+        self._open_tickets: Dict[int, int] = defaultdict(int)
+        self._outstanding: Dict[Optional[int], float] = defaultdict(float)
+        self._ticket_ids = count(1)
+        self._batch_ids = count(1)
+        self._lock = RLock()
+        self._eta_cache: Optional[tuple] = None
+        self.version = 0
+        self.tickets_done = 0
+        self.batches_done = 0
+        self.orders_done = 0
+
+    def _key(self, prep_minutes: float, enqueued_at: float) -> float:
+        if self.policy == "fifo":
+            return enqueued_at
+        return prep_minutes * 60 + self.aging * enqueued_at
+
+    def _changed(self) -> None:
+        self.version += 1
+        self._eta_cache = None
+
+    def submit(self, order_id: int, lines: Iterable[KitchenLine]) -> List[KitchenTicket]:
+        """Queue one ticket per line of an order."""
+        now = self.clock()
+        with self._lock:
+            tickets = []
+            for line in lines:
+                ticket = KitchenTicket(next(self._ticket_ids), order_id, line, now, 0.0)
+                ticket.key = self._key(ticket.prep_minutes, now)
+                heapq.heappush(self._heap, (ticket.key, ticket.id, ticket))
+                self._waiting[ticket.id] = ticket
+                self._waiting_by_item[ticket.menu_item_id].append(ticket)
+                self._open_tickets[order_id] += 1
+                self._outstanding[ticket.station] += _ticket_work_minutes(ticket, self.batch_size)
+                tickets.append(ticket)
+            if tickets:
+                self._changed()
+            return tickets
+
+    def _take_batch(self, first: KitchenTicket) -> List[KitchenTicket]:
+        """Pull ``first`` and the best-ranked waiting tickets for the same item."""
+        same_item = sorted(self._waiting_by_item[first.menu_item_id], key=lambda ticket: (ticket.key, ticket.id))
+        batch, units = [first], first.quantity
+        for ticket in same_item:
+            if ticket is first or units >= self.batch_size:
+                continue
+            if units + ticket.quantity > self.batch_size:
+                continue
+            batch.append(ticket)
+            units += ticket.quantity
+        for ticket in batch:
+            del self._waiting[ticket.id]
+            self._waiting_by_item[ticket.menu_item_id].remove(ticket)
+        if not self._waiting_by_item[first.menu_item_id]:
+            del self._waiting_by_item[first.menu_item_id]
+        return batch
+
+    def start_next(self) -> Optional[KitchenBatch]:
+        """Hand the next batch to a free cook, or None if all cooks are busy or nothing waits."""
+        with self._lock:
+            if len(self._batches) >= self.cooks:
+                return None
+            while self._heap:
+                _, _, ticket = heapq.heappop(self._heap)
+                # Tickets already fired with an earlier batch are skipped lazily
+                if ticket.id in self._waiting:
+                    break
+            else:
+                return None
+            batch = KitchenBatch(next(self._batch_ids), self._take_batch(ticket), self.clock(), self.batch_size)
+            for member in batch.tickets:
+                member.batch_id = batch.id
+            self._batches[batch.id] = batch
+            self._changed()
+            return batch
+
+    def complete(self, batch_id: int) -> List[int]:
+        """Mark a batch as cooked; returns the ids of orders that are now fully ready."""
+        with self._lock:
+            batch = self._batches.pop(batch_id, None)
+            if batch is None:
+                raise ValueError(f"Kitchen batch {batch_id} not found")
+            ready = []
+            for ticket in batch.tickets:
+                ticket.done = True
+                self._outstanding[ticket.station] -= _ticket_work_minutes(ticket, self.batch_size)
+                if self._outstanding[ticket.station] <= 1e-9:
+                    del self._outstanding[ticket.station]
+                self._open_tickets[ticket.order_id] -= 1
+                if not self._open_tickets[ticket.order_id]:
+                    del self._open_tickets[ticket.order_id]
+                    ready.append(ticket.order_id)
+            self.tickets_done += len(batch.tickets)
+            self.batches_done += 1
+            self.orders_done += len(ready)
+            self._changed()
+            return ready
+
+    def _schedule(self, now: float) -> Dict[int, float]:
+        """Replay the queue over the cooks and return each open order's ready time."""
+        free_at = sorted(batch.ready_at for batch in self._batches.values())
+        free_at = [max(at, now) for at in free_at] + [now] * max(self.cooks - len(free_at), 0)
+        heapq.heapify(free_at)
+
+        order_ready: Dict[int, float] = {}
+        for batch in self._batches.values():
+            for ticket in batch.tickets:
+                order_ready[ticket.order_id] = max(order_ready.get(ticket.order_id, now), batch.ready_at)
+
+        waiting = sorted(self._waiting.values(), key=lambda ticket: (ticket.key, ticket.id))
+        fired = set()
+        by_item: Dict[int, List[KitchenTicket]] = defaultdict(list)
+        for ticket in waiting:
+            by_item[ticket.menu_item_id].append(ticket)
+        for ticket in waiting:
+            if ticket.id in fired:
+                continue
+            batch, units = [ticket], ticket.quantity
+            for other in by_item[ticket.menu_item_id]:
+                if other is ticket or other.id in fired or units >= self.batch_size:
+                    continue
+                if units + other.quantity <= self.batch_size:
+                    batch.append(other)
+                    units += other.quantity
+            start = heapq.heappop(free_at) if free_at else now
+            finish = start + max(_ticket_work_minutes(member, self.batch_size) for member in batch) * 60
+            heapq.heappush(free_at, finish)
+            for member in batch:
+                fired.add(member.id)
+                order_ready[member.order_id] = max(order_ready.get(member.order_id, now), finish)
+        return order_ready
+
+    def order_etas(self) -> Dict[int, float]:
+        """Seconds until each open order is ready, assuming the current schedule holds."""
+        now = self.clock()
+        with self._lock:
+            if self._eta_cache is None:
+                self._eta_cache = (now, self._schedule(now))
+            ready_at = self._eta_cache[1]
+        # Cached ready times are absolute; only "now" moves between changes
+        return {order_id: max(at - now, 0.0) for order_id, at in ready_at.items()}
+
+    def order_eta(self, order_id: int) -> Optional[float]:
+        return self.order_etas().get(order_id)
+
+    def outstanding_minutes(self) -> Dict[Optional[int], float]:
+        """Prep minutes still owed per station, counting cooking and waiting tickets."""
+        with self._lock:
+            return dict(self._outstanding)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = self.clock()
+        etas = self.order_etas()
+        with self._lock:
+            return {
+                "version": self.version,
+                "cooks": self.cooks,
+                "depth": len(self._waiting),
+                "in_progress": [batch.to_dict(now) for batch in self._batches.values()],
+                "outstanding_minutes": {
+                    str(station): round(minutes, 2) for station, minutes in self._outstanding.items()
+                },
+                "orders": {str(order_id): round(eta, 1) for order_id, eta in sorted(etas.items())},
+                "max_eta_seconds": round(max(etas.values(), default=0.0), 1),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._heap.clear()
+            self._waiting.clear()
+            self._waiting_by_item.clear()
+            self._batches.clear()
+            self._open_tickets.clear()
+            self._outstanding.clear()
+            self._changed()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "policy": self.policy,
+                "cooks": self.cooks,
+                "depth": len(self._waiting),
+                "in_progress": len(self._batches),
+                "open_orders": len(self._open_tickets),
+                "tickets_done": self.tickets_done,
+                "batches_done": self.batches_done,
+                "orders_done": self.orders_done,
+            }
+
+
+kitchen_queue = KitchenQueue()
+register_metrics("kitchen", kitchen_queue.stats)
+
+
+class KitchenService:
+    """Keeps order statuses in the database in step with the kitchen queue."""
+
+    def __init__(self, db: Session, queue: KitchenQueue = kitchen_queue):
+        self.db = db
+        self.queue = queue
+
+    def _set_status(self, order_ids: List[int], status: str, *current: str) -> None:
+        if not order_ids:
+            return
+        criteria = [Order.id.in_(order_ids)]
+        if current:
+            criteria.append(Order.status.in_(current))
+        try:
+            self.db.execute(
+                update(Order).where(*criteria).values(status=status).execution_options(synchronize_session=False)
+            )
+            self.db.commit()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error updating order status: {str(e)}")
+            self.db.rollback()
+            raise
+
+    def start_next(self) -> Optional[KitchenBatch]:
+        batch = self.queue.start_next()
+        if batch:
+            self._set_status(batch.order_ids, "preparing", "placed")
+        return batch
+
+    def complete(self, batch_id: int) -> List[int]:
+        ready = self.queue.complete(batch_id)
+        self._set_status(ready, "ready")
+        return ready
+
+    def restore(self) -> int:
+        """Re-queue the lines of orders the kitchen has not finished, e.g. after a restart.
+
+        Which tickets of a preparing order were already cooked is not stored,
+        so all of its lines are queued again.
+        """
+        rows = self.db.execute(
+            select(
+                OrderItem.order_id, OrderItem.menu_item_id, OrderItem.name, OrderItem.quantity,
+                MenuItem.preparation_time, MenuItem.category_id
+            )
+            .join(Order, Order.id == OrderItem.order_id)
+            .join(MenuItem, MenuItem.id == OrderItem.menu_item_id)
+            .where(Order.status.in_(OPEN_ORDER_STATUSES))
+            .order_by(Order.id, OrderItem.id)
+        ).all()
+        lines: Dict[int, List[KitchenLine]] = defaultdict(list)
+        for row in rows:
+            lines[row.order_id].append(KitchenLine(
+                row.menu_item_id, row.name, row.quantity, row.preparation_time, row.category_id
+            ))
+        for order_id, order_lines in lines.items():
+            self.queue.submit(order_id, order_lines)
+        logger.info(f"Restored {len(lines)} open orders into the kitchen queue")
+        return len(lines)
+
+
+def run_kitchen_restore() -> int:
+    """Load open orders into the kitchen queue at startup."""
+    db = SessionLocal()
+    try:
+        return KitchenService(db).restore()
+    finally:
+        db.close()
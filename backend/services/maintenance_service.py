@@ -0,0 +1,278 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select, delete, exists, text
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+import logging
+import os
+import time
+
+from backend.models.orm.user import User
+from backend.models.orm.shopping_cart import ShoppingCart, CartItem
+from backend.models.orm.order import Order
+from backend.models.orm.rating import MenuItemRating, RestaurantFeedback
+from backend.services.user_service import invalidate_principal
+from backend.services.revocation_service import revocation_registry
+from backend.services.guest_cart_service import guest_cart_store
+from backend.services.rating_service import release_rating_stats
+from backend.utils.database import SessionLocal
+from backend.utils.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+GUEST_PURGE_MAX_AGE_HOURS = float(os.getenv("GUEST_PURGE_MAX_AGE_HOURS", "24"))
+GUEST_PURGE_BATCH_SIZE = int(os.getenv("GUEST_PURGE_BATCH_SIZE", "200"))
+GUEST_PURGE_INTERVAL_SECONDS = float(os.getenv("GUEST_PURGE_INTERVAL_SECONDS", "3600"))
+CART_SWEEP_MAX_AGE_HOURS = float(os.getenv("CART_SWEEP_MAX_AGE_HOURS", str(24 * 30)))
+CART_SWEEP_BATCH_SIZE = int(os.getenv("CART_SWEEP_BATCH_SIZE", "500"))
+CART_SWEEP_INTERVAL_SECONDS = float(os.getenv("CART_SWEEP_INTERVAL_SECONDS", "3600"))
+# Free pages handed back to the filesystem per sweep (0 releases all of them)
+CART_SWEEP_VACUUM_PAGES = int(os.getenv("CART_SWEEP_VACUUM_PAGES", "2000"))
+# Pause between batches so other writers can take the SQLite write lock
+MAINTENANCE_BATCH_PAUSE_SECONDS = float(os.getenv("MAINTENANCE_BATCH_PAUSE_SECONDS", "0.05"))
+
+# PRAGMA auto_vacuum values
+_AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+_last_runs: Dict[str, Dict[str, Any]] = {}
+register_metrics("maintenance", lambda: dict(_last_runs))
+
+
+class MaintenanceService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def purge_stale_guests(
+        self,
+        max_age: timedelta,
+        batch_size: int = GUEST_PURGE_BATCH_SIZE,
+        pause: float = 0.0,
+        max_batches: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Delete guest users older than ``max_age`` together with their carts,
+        cart items, ratings and feedback.
+
+        Guests who placed orders are kept so the order history stays intact.
+        Each batch of at most ``batch_size`` guests is removed in its own short
+        transaction. Returns the rows purged per table and the time per batch.
+        """
+        cutoff = datetime.utcnow() - max_age
+        report: Dict[str, Any] = {
+            "users": 0,
+            "shopping_carts": 0,
+            "cart_items": 0,
+            "menu_item_ratings": 0,
+            "restaurant_feedback": 0,
+            "batches": [],
+        }
+        started = time.perf_counter()
+
+        while max_batches is None or len(report["batches"]) < max_batches:
+            batch_started = time.perf_counter()
+            guests = self.db.execute(
+                select(User.id, User.email)
+                .where(User.is_guest == True, User.created_at < cutoff, ~_has_orders())
+                .order_by(User.created_at)
+                .limit(batch_size)
+            ).all()
+            if not guests:
+                break
+
+            user_ids = [guest.id for guest in guests]
+            try:
+                counts = self._delete_users(user_ids)
+                self.db.commit()
+            except SQLAlchemyError as e:
+                logger.error(f"Database error purging guest batch: {str(e)}")
+                self.db.rollback()
+                raise
+
+            invalidate_principal(*(guest.email for guest in guests))
+            revocation_registry.forget(*user_ids)
+            guest_cart_store.discard(*user_ids)
+            for table, count in counts.items():
+                report[table] += count
+            report["batches"].append({
+                "rows": sum(counts.values()),
+                "seconds": round(time.perf_counter() - batch_started, 4),
+            })
+
+            if len(guests) < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+
+        report["elapsed_seconds"] = round(time.perf_counter() - started, 4)
+        logger.info(
+            f"Purged {report['users']} stale guests in {len(report['batches'])} batches "
+            f"({report['elapsed_seconds']}s)"
+        )
+        return report
+
+    def sweep_abandoned_carts(
+        self,
+        max_age: timedelta,
+        batch_size: int = CART_SWEEP_BATCH_SIZE,
+        pause: float = 0.0,
+        max_batches: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Delete carts, and their lines, not changed for ``max_age``.
+
+        Oldest carts go first, found through the updated_at index, in short
+        transactions of at most ``batch_size`` carts. A cart touched between
+        being selected and deleted is left alone. Returns the rows deleted per
+        table and the time per batch.
+        """
+        cutoff = datetime.utcnow() - max_age
+        report: Dict[str, Any] = {"shopping_carts": 0, "cart_items": 0, "batches": []}
+        started = time.perf_counter()
+
+        while max_batches is None or len(report["batches"]) < max_batches:
+            batch_started = time.perf_counter()
+            carts = self.db.execute(
+                select(ShoppingCart.id, ShoppingCart.user_id)
+                .where(ShoppingCart.updated_at < cutoff)
+                .order_by(ShoppingCart.updated_at)
+                .limit(batch_size)
+            ).all()
+            if not carts:
+                break
+
+            stale_ids = (
+                select(ShoppingCart.id)
+                .where(ShoppingCart.id.in_([cart.id for cart in carts]), ShoppingCart.updated_at < cutoff)
+            )
+            try:
+                counts = {}
+                for table, statement in (
+                    ("cart_items", delete(CartItem).where(CartItem.cart_id.in_(stale_ids))),
+                    ("shopping_carts", delete(ShoppingCart).where(ShoppingCart.id.in_(stale_ids))),
+                ):
+                    result = self.db.execute(statement.execution_options(synchronize_session=False))
+                    counts[table] = result.rowcount
+                self.db.commit()
+            except SQLAlchemyError as e:
+                logger.error(f"Database error sweeping cart batch: {str(e)}")
+                self.db.rollback()
+                raise
+
+            guest_cart_store.discard(*(cart.user_id for cart in carts))
+            for table, count in counts.items():
+                report[table] += count
+            report["batches"].append({
+                "rows": sum(counts.values()),
+                "seconds": round(time.perf_counter() - batch_started, 4),
+            })
+
+            if len(carts) < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+
+        report["elapsed_seconds"] = round(time.perf_counter() - started, 4)
+        logger.info(
+            f"Swept {report['shopping_carts']} abandoned carts and {report['cart_items']} lines "
+            f"in {len(report['batches'])} batches ({report['elapsed_seconds']}s)"
+        )
+        return report
+
+    def compact_database(self, pages: int = CART_SWEEP_VACUUM_PAGES) -> Dict[str, Any]:
+        """Return free pages to the filesystem with an incremental vacuum.
+
+        Only databases created with auto_vacuum=INCREMENTAL keep the bookkeeping
+        this needs; others are reported and left as they are (converting one
+        takes a full VACUUM).
+        """
+        if self.db.get_bind().dialect.name != "sqlite":
+            return {"mode": None, "freed_pages": 0}
+        mode = _AUTO_VACUUM_MODES.get(self.db.execute(text("PRAGMA auto_vacuum")).scalar(), "unknown")
+        free_before = self.db.execute(text("PRAGMA freelist_count")).scalar()
+        if mode != "incremental":
+            logger.info(f"Skipping incremental vacuum: auto_vacuum is {mode}")
+            return {"mode": mode, "freed_pages": 0, "free_pages": free_before}
+
+        # The pragma frees one page per step and the driver's execute() only
+        # steps once; executescript() runs it to completion
+        self.db.commit()
+        self.db.connection().connection.driver_connection.executescript(
+            f"PRAGMA incremental_vacuum({int(pages)})"
+        )
+        free_after = self.db.execute(text("PRAGMA freelist_count")).scalar()
+        return {"mode": mode, "freed_pages": free_before - free_after, "free_pages": free_after}
+
+    def _delete_users(self, user_ids: List[int]) -> Dict[str, int]:
+        """Delete the given users and their carts, ratings and feedback, children first.
+
+        Users with orders are left alone, checked again here in case one
+        checked out after being selected.
+        """
+        purgeable = select(User.id).where(User.id.in_(user_ids), ~_has_orders())
+        cart_ids = select(ShoppingCart.id).where(ShoppingCart.user_id.in_(purgeable))
+        statements = [
+            ("cart_items", delete(CartItem).where(CartItem.cart_id.in_(cart_ids))),
+            ("shopping_carts", delete(ShoppingCart).where(ShoppingCart.user_id.in_(purgeable))),
+            ("menu_item_ratings", delete(MenuItemRating).where(MenuItemRating.user_id.in_(purgeable))),
+            ("restaurant_feedback", delete(RestaurantFeedback).where(RestaurantFeedback.user_id.in_(purgeable))),
+            ("users", delete(User).where(User.id.in_(purgeable))),
+        ]
+        # Ratings leave the per-item stats in the same transaction they are deleted in
+        release_rating_stats(self.db, MenuItemRating.user_id.in_(purgeable))
+        counts = {}
+        for table, statement in statements:
+            result = self.db.execute(statement.execution_options(synchronize_session=False))
+            counts[table] = result.rowcount
+        return counts
+
+
+def _has_orders():
+    return exists().where(Order.user_id == User.id)
+
+
+def run_guest_purge() -> Dict[str, Any]:
+    """Entry point for the periodic guest purge job."""
+    db = SessionLocal()
+    try:
+        report = MaintenanceService(db).purge_stale_guests(
+            max_age=timedelta(hours=GUEST_PURGE_MAX_AGE_HOURS),
+            batch_size=GUEST_PURGE_BATCH_SIZE,
+            pause=MAINTENANCE_BATCH_PAUSE_SECONDS
+        )
+        _last_runs["guest_purge"] = {
+            "finished_at": datetime.utcnow().isoformat(),
+            "users": report["users"],
+            "rows": sum(batch["rows"] for batch in report["batches"]),
+            "batches": len(report["batches"]),
+            "max_batch_seconds": max((batch["seconds"] for batch in report["batches"]), default=0.0),
+            "elapsed_seconds": report["elapsed_seconds"],
+        }
+        return report
+    finally:
+        db.close()
+
+
+def run_cart_sweep() -> Dict[str, Any]:
+    """Entry point for the periodic abandoned-cart sweep."""
+    db = SessionLocal()
+    try:
+        # Write out in-memory guest edits first so their carts count as recent
+        if guest_cart_store.enabled:
+            guest_cart_store.flush(db)
+        service = MaintenanceService(db)
+        report = service.sweep_abandoned_carts(
+            max_age=timedelta(hours=CART_SWEEP_MAX_AGE_HOURS),
+            batch_size=CART_SWEEP_BATCH_SIZE,
+            pause=MAINTENANCE_BATCH_PAUSE_SECONDS
+        )
+        report["vacuum"] = service.compact_database() if report["batches"] else None
+        _last_runs["cart_sweep"] = {
+            "finished_at": datetime.utcnow().isoformat(),
+            "shopping_carts": report["shopping_carts"],
+            "cart_items": report["cart_items"],
+            "batches": len(report["batches"]),
+            "max_batch_seconds": max((batch["seconds"] for batch in report["batches"]), default=0.0),
+            "freed_pages": report["vacuum"]["freed_pages"] if report["vacuum"] else 0,
+            "elapsed_seconds": report["elapsed_seconds"],
+        }
+        return report
+    finally:
+        db.close()
@@ -1,11 +1,21 @@
 from typing import List, Optional
 from sqlalchemy.orm import Session, joinedload
 from fastapi import HTTPException, status
-from sqlalchemy import func
+from sqlalchemy import func, select, bindparam
 
 from ..models.orm.menu import Category, MenuItem, Allergen
 from ..models.schemas.menu import CategoryCreate, CategoryUpdate, MenuItemCreate, MenuItemUpdate, AllergenCreate, AllergenUpdate, MenuItemFilters, MenuItem as MenuItemSchema
 from ..models.orm.rating import MenuItemRating
+from ..models.orm.shopping_cart import ShoppingCart, CartItem
+from .cart_service import recalculate_cart_totals
+from .guest_cart_service import guest_cart_store
+from .pricing_service import CompiledOptions, pricing_engine
+from .wait_time_service import wait_time_estimator
+
+# Prebuilt statements for the single-row lookups hit on nearly every write
+_CATEGORY_BY_ID = select(Category).where(Category.id == bindparam("category_id"))
+_MENU_ITEM_BY_ID = select(MenuItem).where(MenuItem.id == bindparam("item_id"))
+_ALLERGEN_BY_ID = select(Allergen).where(Allergen.id == bindparam("allergen_id"))
 
 class MenuService:
     @staticmethod
@@ -14,7 +24,6 @@ class MenuService:
         db.add(db_category)
         try:
             db.commit()
-            db.refresh(db_category)
         except Exception as e:
             db.rollback()
             raise HTTPException(
@@ -25,7 +34,7 @@ class MenuService:
 
     @staticmethod
     def get_category(db: Session, category_id: int) -> Category:
-        category = db.query(Category).filter(Category.id == category_id).first()
+        category = db.scalars(_CATEGORY_BY_ID, {"category_id": category_id}).first()
         if not category:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -77,14 +86,15 @@ class MenuService:
     @staticmethod
     def create_menu_item(db: Session, menu_item: MenuItemCreate) -> MenuItemSchema:
         # Verify category exists
-        MenuService.get_category(db, menu_item.category_id)
+        category = MenuService.get_category(db, menu_item.category_id)
         
         # Extract allergen_ids and remove from model_dump
         menu_item_data = menu_item.model_dump()
         allergen_ids = menu_item_data.pop('allergen_ids', None)
         
-        # Create menu item
+        # Create menu item, reusing the loaded category for the response
         db_menu_item = MenuItem(**menu_item_data)
+        db_menu_item.category = category
         
         # Add allergens if specified
         if allergen_ids:
@@ -93,11 +103,12 @@ class MenuService:
                 allergen = MenuService.get_allergen(db, allergen_id)
                 allergens.append(allergen)
             db_menu_item.allergens = allergens
+        else:
+            db_menu_item.allergens = []
         
         db.add(db_menu_item)
         try:
             db.commit()
-            db.refresh(db_menu_item)
         except Exception as e:
             db.rollback()
             raise HTTPException(
@@ -108,7 +119,7 @@ class MenuService:
 
     @staticmethod
     def get_menu_item(db: Session, item_id: int) -> MenuItem:
-        menu_item = db.query(MenuItem).filter(MenuItem.id == item_id).first()
+        menu_item = db.scalars(_MENU_ITEM_BY_ID, {"item_id": item_id}).first()
         if not menu_item:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -258,12 +269,42 @@ class MenuService:
                     allergens.append(allergen)
                 db_menu_item.allergens = allergens
             
+            price_changed = 'price' in update_data and update_data['price'] != db_menu_item.price
+            options_changed = any(
+                field in update_data and update_data[field] != getattr(db_menu_item, field)
+                for field in ('customization_options', 'customization_prices')
+            )
+            prep_changed = any(
+                field in update_data and update_data[field] != getattr(db_menu_item, field)
+                for field in ('preparation_time', 'category_id')
+            )
             for field, value in update_data.items():
                 setattr(db_menu_item, field, value)
             
             try:
+                if options_changed:
+                    # Reprice existing selections; choices no longer offered add nothing
+                    compiled = CompiledOptions.from_menu_item(db_menu_item)
+                    for cart_item in db.scalars(
+                        select(CartItem).where(CartItem.menu_item_id == menu_item_id, CartItem.customizations.isnot(None))
+                    ):
+                        cart_item.price_delta = compiled.price_delta(cart_item.customizations, strict=False)
+                if price_changed or options_changed:
+                    # Keep the subtotals of carts holding this item in step
+                    db.flush()
+                    recalculate_cart_totals(
+                        db,
+                        ShoppingCart.id.in_(select(CartItem.cart_id).where(CartItem.menu_item_id == menu_item_id))
+                    )
                 db.commit()
+                if options_changed:
+                    pricing_engine.invalidate(menu_item_id)
+                if prep_changed:
+                    wait_time_estimator.invalidate(menu_item_id)
                 db.refresh(db_menu_item)
+                if price_changed or options_changed:
+                    # Guest carts held in memory are repriced the same way
+                    guest_cart_store.reprice(db_menu_item)
                 return MenuItemSchema.from_orm(db_menu_item)
             except Exception as e:
                 db.rollback()
@@ -320,7 +361,7 @@ class MenuService:
     @staticmethod
     def get_allergen(db: Session, allergen_id: int) -> Allergen:
         """Get a specific allergen by ID."""
-        allergen = db.query(Allergen).filter(Allergen.id == allergen_id).first()
+        allergen = db.scalars(_ALLERGEN_BY_ID, {"allergen_id": allergen_id}).first()
         if not allergen:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
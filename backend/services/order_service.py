@@ -0,0 +1,143 @@
+from typing import List, Optional, Tuple
+from sqlalchemy import select, insert, delete, bindparam
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+import logging
+
+from backend.models.orm.order import Order, OrderItem
+from backend.models.orm.shopping_cart import ShoppingCart, CartItem
+from backend.models.orm.menu import MenuItem
+from backend.services.cart_service import CartVersionConflict, recalculate_cart_totals
+from backend.services.guest_cart_service import guest_cart_store
+from backend.services.kitchen_service import KitchenLine, kitchen_queue
+
+logger = logging.getLogger(__name__)
+
+_CART_BY_USER = select(ShoppingCart.id, ShoppingCart.version).where(ShoppingCart.user_id == bindparam("user_id"))
+# Cart lines with the menu columns copied into the order, in one query
+_CHECKOUT_LINES = (
+    select(
+        CartItem.menu_item_id, CartItem.quantity, CartItem.customizations, CartItem.price_delta,
+        MenuItem.name, MenuItem.price, MenuItem.is_available, MenuItem.preparation_time, MenuItem.category_id
+    )
+    .join(MenuItem, MenuItem.id == CartItem.menu_item_id)
+    .where(CartItem.cart_id == bindparam("cart_id"))
+    .order_by(CartItem.id)
+)
+_ORDER_BY_ID = select(Order).where(Order.id == bindparam("order_id")).options(selectinload(Order.items))
+_ORDER_BY_KEY = (
+    select(Order)
+    .where(Order.user_id == bindparam("user_id"), Order.idempotency_key == bindparam("idempotency_key"))
+    .options(selectinload(Order.items))
+)
+
+class OrderService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _load_order(self, order_id: int) -> Optional[Order]:
+        stmt = _ORDER_BY_ID.execution_options(populate_existing=True)
+        return self.db.scalars(stmt, {"order_id": order_id}).first()
+
+    def _find_by_key(self, user_id: int, idempotency_key: str) -> Optional[Order]:
+        return self.db.scalars(_ORDER_BY_KEY, {"user_id": user_id, "idempotency_key": idempotency_key}).first()
+
+    def checkout(self, user_id: int, idempotency_key: Optional[str] = None,
+                 expected_version: Optional[int] = None) -> Tuple[Order, bool]:
+        """Turn the user's cart into an order and empty the cart, in one transaction.
+
+        Prices and names are copied from the menu at this moment. Returns the
+        order and whether it was created; a request repeating an earlier
+        ``idempotency_key`` gets that earlier order back instead of a new one.
+        The cart's version is checked when the cart is emptied, so two
+        checkouts racing for the same cart cannot both succeed.
+        """
+        if idempotency_key:
+            existing = self._find_by_key(user_id, idempotency_key)
+            if existing:
+                return existing, False
+        if guest_cart_store.enabled:
+            # The database copy must hold every guest edit before it is read
+            guest_cart_store.evict(user_id, self.db)
+
+        try:
+            cart = self.db.execute(_CART_BY_USER, {"user_id": user_id}).first()
+            if cart is None:
+                raise ValueError("Cart is empty")
+            if expected_version is not None and cart.version != expected_version:
+                raise CartVersionConflict(f"Cart {cart.id} was modified by another request")
+
+            lines = self.db.execute(_CHECKOUT_LINES, {"cart_id": cart.id}).all()
+            if not lines:
+                raise ValueError("Cart is empty")
+            for line in lines:
+                if not line.is_available:
+                    raise ValueError(f"Menu item {line.menu_item_id} is not available")
+
+            order = Order(
+                user_id=user_id,
+                idempotency_key=idempotency_key,
+                subtotal=sum((line.price + line.price_delta) * line.quantity for line in lines),
+                item_count=sum(line.quantity for line in lines)
+            )
+            self.db.add(order)
+            self.db.flush()
+
+            # A list of parameter sets runs as a single executemany
+            self.db.execute(insert(OrderItem), [
+                {
+                    "order_id": order.id,
+                    "menu_item_id": line.menu_item_id,
+                    "name": line.name,
+                    "quantity": line.quantity,
+                    "unit_price": line.price,
+                    "price_delta": line.price_delta,
+                    "customizations": line.customizations,
+                }
+                for line in lines
+            ])
+            self.db.execute(
+                delete(CartItem).where(CartItem.cart_id == cart.id).execution_options(synchronize_session=False)
+            )
+            if not recalculate_cart_totals(self.db, ShoppingCart.id == cart.id, ShoppingCart.version == cart.version):
+                raise CartVersionConflict(f"Cart {cart.id} was modified by another request")
+            self.db.commit()
+
+        except IntegrityError:
+            self.db.rollback()
+            # A concurrent retry with the same key won the insert
+            if idempotency_key:
+                existing = self._find_by_key(user_id, idempotency_key)
+                if existing:
+                    return existing, False
+            raise
+        except (ValueError, CartVersionConflict):
+            self.db.rollback()
+            raise
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in checkout: {str(e)}")
+            self.db.rollback()
+            raise
+
+        logger.info(f"User {user_id} placed order {order.id} ({order.item_count} items)")
+        kitchen_queue.submit(order.id, [
+            KitchenLine(line.menu_item_id, line.name, line.quantity, line.preparation_time, line.category_id)
+            for line in lines
+        ])
+        return self._load_order(order.id), True
+
+    def get_order(self, user_id: int, order_id: int) -> Order:
+        order = self._load_order(order_id)
+        if not order or order.user_id != user_id:
+            raise ValueError(f"Order {order_id} not found")
+        return order
+
+    def get_orders(self, user_id: int, skip: int = 0, limit: int = 50) -> List[Order]:
+        return self.db.scalars(
+            select(Order)
+            .where(Order.user_id == user_id)
+            .options(selectinload(Order.items))
+            .order_by(Order.id.desc())
+            .offset(skip)
+            .limit(limit)
+        ).all()
@@ -0,0 +1,123 @@
+from typing import Any, Dict, FrozenSet, Optional
+import logging
+import os
+
+from backend.models.orm.menu import MenuItem
+from backend.utils.cache import TTLCache
+from backend.utils.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+PRICING_CACHE_SIZE = int(os.getenv("PRICING_CACHE_SIZE", "2048"))
+PRICING_CACHE_TTL_SECONDS = float(os.getenv("PRICING_CACHE_TTL_SECONDS", "3600"))
+
+# Free-text keys carried alongside the chosen options (special instructions);
+# they are stored as given and never validated or priced
+FREE_TEXT_KEYS = frozenset({"notes"})
+
+
+class InvalidCustomization(ValueError):
+    """Raised when chosen customizations are not offered by the menu item."""
+
+
+class CompiledOptions:
+    """A menu item's customization options, compiled for constant-time lookups.
+
+    ``choices`` maps each option to the frozen set of values it accepts and
+    ``deltas`` maps option -> value -> price change. Both are built once per
+    version of the menu item (its ``updated_at``), so validating and pricing a
+    selection costs one set lookup per chosen value.
+    """
+
+    __slots__ = ("menu_item_id", "version", "choices", "deltas")
+
+    def __init__(self, menu_item_id: int, version: Any,
+                 choices: Dict[str, FrozenSet[str]], deltas: Dict[str, Dict[str, float]]):
+        self.menu_item_id = menu_item_id
+        self.version = version
+        self.choices = choices
+        self.deltas = deltas
+
+    @classmethod
+    def from_menu_item(cls, menu_item: MenuItem) -> "CompiledOptions":
+        options = menu_item.customization_options or {}
+        prices = menu_item.customization_prices or {}
+        choices = {option: frozenset(values or ()) for option, values in options.items()}
+        deltas = {
+            option: {value: float(delta) for value, delta in (prices.get(option) or {}).items()
+                     if value in choices[option] and delta}
+            for option in choices
+        }
+        return cls(menu_item.id, menu_item.updated_at, choices,
+                   {option: values for option, values in deltas.items() if values})
+
+    def price_delta(self, customizations: Optional[Dict[str, Any]], strict: bool = True) -> float:
+        """Validate ``customizations`` and return the price change they add per unit.
+
+        With ``strict`` unknown options and values raise InvalidCustomization;
+        otherwise they are skipped, which is how existing lines are repriced
+        after the item's options change.
+        """
+        delta = 0.0
+        for option, value in customizations.items():
+            if option in FREE_TEXT_KEYS:
+                continue
+            if not self.choices:
+                if strict:
+                    raise InvalidCustomization("This item does not support customization")
+                break
+            allowed = self.choices.get(option)
+            if allowed is None:
+                if strict:
+                    raise InvalidCustomization(f"Invalid customization option: {option}")
+                continue
+            option_deltas = self.deltas.get(option, {})
+            for v in (value if isinstance(value, list) else (value,)):
+                if not isinstance(v, str) or v not in allowed:
+                    if strict:
+                        raise InvalidCustomization(f"Invalid value '{v}' for option '{option}'")
+                    continue
+                delta += option_deltas.get(v, 0.0)
+        return delta
+
+
+class PricingEngine:
+    """Cache of compiled customization options, keyed by menu item id.
+
+    An entry is only used while its version matches the menu item's
+    ``updated_at``; MenuService also invalidates entries when options or
+    prices are edited, since timestamps only have second resolution.
+    """
+
+    def __init__(self, maxsize: int = PRICING_CACHE_SIZE, ttl: float = PRICING_CACHE_TTL_SECONDS):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.compilations = 0
+
+    def compiled(self, menu_item: MenuItem) -> CompiledOptions:
+        compiled = self._cache.get(menu_item.id)
+        if compiled is None or compiled.version != menu_item.updated_at:
+            compiled = CompiledOptions.from_menu_item(menu_item)
+            self._cache.set(menu_item.id, compiled)
+            self.compilations += 1
+        return compiled
+
+    def price_delta(self, menu_item: MenuItem, customizations: Optional[Dict[str, Any]],
+                    strict: bool = True) -> float:
+        """Validate a selection for ``menu_item`` and return its per-unit price change."""
+        if not customizations:
+            return 0.0
+        return self.compiled(menu_item).price_delta(customizations, strict)
+
+    def invalidate(self, *menu_item_ids: int) -> None:
+        for menu_item_id in menu_item_ids:
+            self._cache.invalidate(menu_item_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._cache.stats(), "compilations": self.compilations}
+
+
+pricing_engine = PricingEngine()
+register_metrics("pricing", pricing_engine.stats)
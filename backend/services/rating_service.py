@@ -1,11 +1,99 @@
-from typing import List, Optional, Dict
+from collections import defaultdict
+from typing import List, Optional, Dict, Sequence, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy import func, select, update, case, bindparam, literal, String
+from sqlalchemy.dialects.sqlite import insert
+import logging
 
-from backend.models.orm.rating import MenuItemRating, RestaurantFeedback
+from backend.models.orm.menu import MenuItem
+from backend.models.orm.rating import MenuItemRating, MenuItemRatingStats, RestaurantFeedback
 from backend.models.schemas.rating import MenuItemRatingCreate, RestaurantFeedbackCreate
 
+logger = logging.getLogger(__name__)
+
+_STATS_COLUMNS = ("rating_count", "rating_sum", "stars_1", "stars_2", "stars_3", "stars_4", "stars_5")
+
+def _stats_upsert():
+    stmt = insert(MenuItemRatingStats)
+    return stmt.on_conflict_do_update(
+        index_elements=[MenuItemRatingStats.menu_item_id],
+        set_={
+            **{column: getattr(MenuItemRatingStats, column) + getattr(stmt.excluded, column)
+               for column in _STATS_COLUMNS},
+            "updated_at": func.now(),
+        }
+    )
+
+# Adds the given counts to an item's stats row, creating the row on first use
+_STATS_UPSERT = _stats_upsert()
+
+# The caller's existing rating of the item, if any
+_EXISTING_RATING = (
+    select(MenuItemRating.id)
+    .where(MenuItemRating.user_id == bindparam("rater_id"), MenuItemRating.menu_item_id == bindparam("rated_item_id"))
+)
+_PREVIOUS_RATING = (
+    select(MenuItemRating.rating)
+    .where(MenuItemRating.user_id == bindparam("rater_id"), MenuItemRating.menu_item_id == bindparam("rated_item_id"))
+    .scalar_subquery()
+)
+# Takes the caller's existing rating out of the item's stats; matches no row
+# when there is nothing to replace. Being a write, it also takes SQLite's write
+# lock, so the rating cannot change again before the upsert that follows.
+_RELEASE_PREVIOUS_RATING = (
+    update(MenuItemRatingStats)
+    .where(MenuItemRatingStats.menu_item_id == bindparam("rated_item_id"), _PREVIOUS_RATING.isnot(None))
+    .values(
+        rating_count=MenuItemRatingStats.rating_count - 1,
+        rating_sum=MenuItemRatingStats.rating_sum - _PREVIOUS_RATING,
+        **{
+            f"stars_{star}": getattr(MenuItemRatingStats, f"stars_{star}") - case((_PREVIOUS_RATING == star, 1), else_=0)
+            for star in range(1, 6)
+        },
+        updated_at=func.now()
+    )
+    .execution_options(synchronize_session=False)
+)
+
+def _star_delta(old: Optional[int] = None, new: Optional[int] = None) -> List[int]:
+    """Histogram change for a rating going from ``old`` to ``new`` stars (None: no rating)."""
+    stars = [0] * 5
+    if old:
+        stars[old - 1] -= 1
+    if new:
+        stars[new - 1] += 1
+    return stars
+
+def adjust_rating_stats(db: Session, deltas: Dict[int, Sequence[int]]) -> None:
+    """Apply per-item histogram changes (index 0 is one star) to menu_item_rating_stats.
+
+    Count and sum follow from the histogram. Runs inside the caller's
+    transaction, so stats commit or roll back with the ratings themselves.
+    """
+    params = [
+        {
+            "menu_item_id": menu_item_id,
+            "rating_count": sum(stars),
+            "rating_sum": sum(star * n for star, n in enumerate(stars, 1)),
+            **{f"stars_{star}": n for star, n in enumerate(stars, 1)},
+        }
+        for menu_item_id, stars in deltas.items() if any(stars)
+    ]
+    if params:
+        db.execute(_STATS_UPSERT, params)
+
+def release_rating_stats(db: Session, *criteria) -> None:
+    """Take the ratings matching ``criteria`` out of the stats, before they are bulk-deleted."""
+    deltas = defaultdict(lambda: [0] * 5)
+    for menu_item_id, rating, total in db.execute(
+        select(MenuItemRating.menu_item_id, MenuItemRating.rating, func.count())
+        .where(*criteria)
+        .group_by(MenuItemRating.menu_item_id, MenuItemRating.rating)
+    ):
+        deltas[menu_item_id][rating - 1] -= total
+    adjust_rating_stats(db, deltas)
+
 class RatingService:
     def __init__(self, db: Session):
         self.db = db
@@ -20,13 +108,51 @@ class RatingService:
                 comment=rating.comment
             )
             self.db.add(db_rating)
+            self.db.flush()
+            adjust_rating_stats(self.db, {rating.menu_item_id: _star_delta(new=rating.rating)})
             self.db.commit()
-            self.db.refresh(db_rating)
             return db_rating
         except IntegrityError:
             self.db.rollback()
             raise ValueError("User has already rated this menu item")
 
+    def upsert_menu_item_rating(self, user_id: int, menu_item_id: int,
+                                rating: MenuItemRatingCreate) -> Tuple[MenuItemRating, bool]:
+        """Create or replace the user's rating of a menu item in one transaction.
+
+        Returns the rating and whether it was created. The row is written with
+        a single INSERT ... SELECT ... ON CONFLICT DO UPDATE; the item's stats
+        lose the previous rating, if any, and gain the new one. Raises
+        ValueError if the menu item does not exist.
+        """
+        params = {"rater_id": user_id, "rated_item_id": menu_item_id}
+        try:
+            self.db.execute(_RELEASE_PREVIOUS_RATING, params)
+            # Read under the write lock the release took, so no rating can appear in between
+            created = self.db.execute(_EXISTING_RATING, params).first() is None
+            # Inserting from the menu item's row writes nothing when the item does not exist
+            stmt = insert(MenuItemRating).from_select(
+                ["user_id", "menu_item_id", "rating", "comment"],
+                select(
+                    literal(user_id), MenuItem.id, literal(rating.rating), literal(rating.comment, String)
+                ).where(MenuItem.id == menu_item_id)
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[MenuItemRating.user_id, MenuItemRating.menu_item_id],
+                set_={"rating": stmt.excluded.rating, "comment": stmt.excluded.comment, "updated_at": func.now()}
+            ).returning(MenuItemRating)
+            db_rating = self.db.scalars(stmt.execution_options(populate_existing=True)).one_or_none()
+            if db_rating is None:
+                self.db.rollback()
+                raise ValueError(f"Menu item {menu_item_id} not found")
+            adjust_rating_stats(self.db, {menu_item_id: _star_delta(new=rating.rating)})
+            self.db.commit()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in upsert_menu_item_rating: {str(e)}")
+            self.db.rollback()
+            raise
+        return db_rating, created
+
     def get_menu_item_ratings(self, menu_item_id: int) -> List[MenuItemRating]:
         """Get all ratings for a specific menu item."""
         return self.db.query(MenuItemRating).filter(MenuItemRating.menu_item_id == menu_item_id).all()
@@ -38,12 +164,23 @@ class RatingService:
             MenuItemRating.menu_item_id == menu_item_id
         ).first()
 
+    def get_user_menu_item_ratings(self, user_id: int, menu_item_ids: List[int]) -> Dict[int, int]:
+        """Get a user's ratings for several menu items, keyed by menu item id."""
+        return dict(self.db.execute(
+            select(MenuItemRating.menu_item_id, MenuItemRating.rating).where(
+                MenuItemRating.user_id == user_id,
+                MenuItemRating.menu_item_id.in_(menu_item_ids)
+            )
+        ).all())
+
     def update_menu_item_rating(self, user_id: int, menu_item_id: int, rating: MenuItemRatingCreate) -> MenuItemRating:
         """Update a user's rating for a menu item."""
         db_rating = self.get_user_menu_item_rating(user_id, menu_item_id)
         if not db_rating:
             raise ValueError("Rating not found")
 
+        if db_rating.rating != rating.rating:
+            adjust_rating_stats(self.db, {menu_item_id: _star_delta(db_rating.rating, rating.rating)})
         db_rating.rating = rating.rating
         db_rating.comment = rating.comment
         self.db.commit()
@@ -56,6 +193,7 @@ class RatingService:
         if not db_rating:
             return False
 
+        adjust_rating_stats(self.db, {menu_item_id: _star_delta(old=db_rating.rating)})
         self.db.delete(db_rating)
         self.db.commit()
         return True
@@ -108,36 +246,38 @@ class RatingService:
             .limit(limit)\
             .all()
 
+    def _rating_stats(self, *criteria) -> List[MenuItemRatingStats]:
+        # Stats change through Core upserts, so never trust a copy already in the session
+        return self.db.scalars(
+            select(MenuItemRatingStats).where(*criteria).execution_options(populate_existing=True)
+        ).all()
+
+    def get_menu_item_rating_stats(self, menu_item_id: int) -> Dict[str, any]:
+        """Get the average, count and 1-5 star distribution for a menu item."""
+        stats = next(iter(self._rating_stats(MenuItemRatingStats.menu_item_id == menu_item_id)), None)
+        return {
+            'menu_item_id': menu_item_id,
+            'average': stats.average if stats else 0.0,
+            'total': stats.rating_count if stats else 0,
+            'distribution': stats.distribution if stats else {star: 0 for star in range(1, 6)}
+        }
+
     def get_menu_item_average_rating(self, menu_item_id: int) -> Dict[str, any]:
         """Get the average rating and total number of ratings for a menu item."""
-        result = self.db.query(
-            func.avg(MenuItemRating.rating).label('average'),
-            func.count(MenuItemRating.id).label('total')
-        ).filter(
-            MenuItemRating.menu_item_id == menu_item_id
-        ).first()
-        
+        stats = self.get_menu_item_rating_stats(menu_item_id)
         return {
-            'average_rating': round(float(result.average), 1) if result.average else 0.0,
-            'total_ratings': result.total
+            'average_rating': stats['average'],
+            'total_ratings': stats['total']
         }
 
     def get_menu_items_average_ratings(self, menu_item_ids: List[int]) -> Dict[int, Dict[str, any]]:
         """Get average ratings for multiple menu items at once."""
-        results = self.db.query(
-            MenuItemRating.menu_item_id,
-            func.avg(MenuItemRating.rating).label('average'),
-            func.count(MenuItemRating.id).label('total')
-        ).filter(
-            MenuItemRating.menu_item_id.in_(menu_item_ids)
-        ).group_by(
-            MenuItemRating.menu_item_id
-        ).all()
-        
         return {
-            r.menu_item_id: {
-                'average_rating': round(float(r.average), 1),
-                'total_ratings': r.total
+            stats.menu_item_id: {
+                'average_rating': stats.average,
+                'total_ratings': stats.rating_count
             }
-            for r in results
+            for stats in self._rating_stats(
+                MenuItemRatingStats.menu_item_id.in_(menu_item_ids), MenuItemRatingStats.rating_count > 0
+            )
         }
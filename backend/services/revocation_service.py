@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Set
+from sqlalchemy import select, func, or_
+from sqlalchemy.orm import Session
+import logging
+import os
+import time
+
+from backend.models.orm.user import User
+from backend.utils.database import SessionLocal
+from backend.utils.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "5"))
+# Rows are re-read this far behind the watermark so a write whose updated_at
+# was stamped before a slower transaction committed is not skipped
+REVOCATION_REFRESH_OVERLAP_SECONDS = float(os.getenv("REVOCATION_REFRESH_OVERLAP_SECONDS", "10"))
+
+
+class TokenRevocationRegistry:
+    """In-memory mirror of users' token versions and deactivations.
+
+    Only users that have ever revoked tokens (token_version > 0) or are
+    deactivated are held, so checking a token never touches the database.
+    Writes in this process are applied immediately through ``record``; writes
+    from other processes are picked up by ``refresh``, which reads users
+    changed since the last run using the updated_at index. Revocation
+    therefore takes effect everywhere within one refresh interval.
+    """
+
+    def __init__(self, overlap_seconds: float = REVOCATION_REFRESH_OVERLAP_SECONDS):
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self._versions: Dict[int, int] = {}
+        self._inactive: Set[int] = set()
+        self._watermark: Optional[datetime] = None
+        self._listeners: List[Callable[..., None]] = []
+        self._lock = Lock()
+        self.refreshes = 0
+        self.rows_read = 0
+        self.last_refresh_at: Optional[float] = None
+
+    def is_revoked(self, user_id: int, token_version: int) -> bool:
+        """Whether a token carrying ``token_version`` for ``user_id`` is no longer valid."""
+        return user_id in self._inactive or token_version < self._versions.get(user_id, 0)
+
+    def record(self, user_id: int, token_version: int, is_active: bool) -> None:
+        """Apply a user's current token version and active flag.
+
+        States older than the one already known are ignored, so a lagging
+        refresh cannot undo a newer local write.
+        """
+        token_version = token_version or 0
+        with self._lock:
+            if token_version < self._versions.get(user_id, 0):
+                return
+            if token_version:
+                self._versions[user_id] = token_version
+            else:
+                self._versions.pop(user_id, None)
+            if is_active:
+                self._inactive.discard(user_id)
+            else:
+                self._inactive.add(user_id)
+
+    def subscribe(self, listener: Callable[..., None]) -> None:
+        """Call ``listener(*emails)`` with the users each refresh saw change.
+
+        UserService uses this to drop cached principals that other processes
+        made stale.
+        """
+        self._listeners.append(listener)
+
+    def forget(self, *user_ids: int) -> None:
+        """Drop deleted users."""
+        with self._lock:
+            for user_id in user_ids:
+                self._versions.pop(user_id, None)
+                self._inactive.discard(user_id)
+
+    def refresh(self, db: Session) -> int:
+        """Pull users changed since the last refresh; the first call loads every revoked user."""
+        columns = select(User.id, User.email, User.token_version, User.is_active, User.updated_at)
+        if self._watermark is None:
+            stmt = columns.where(or_(User.token_version > 0, User.is_active == False))
+            watermark = db.scalar(select(func.max(User.updated_at)))
+        else:
+            stmt = columns.where(User.updated_at >= self._watermark - self.overlap)
+            watermark = self._watermark
+
+        rows = db.execute(stmt).all()
+        for row in rows:
+            self.record(row.id, row.token_version, row.is_active)
+            if watermark is None or row.updated_at > watermark:
+                watermark = row.updated_at
+        if rows:
+            for listener in self._listeners:
+                listener(*(row.email for row in rows))
+
+        with self._lock:
+            self._watermark = watermark or datetime.utcnow()
+            self.refreshes += 1
+            self.rows_read += len(rows)
+            self.last_refresh_at = time.monotonic()
+        return len(rows)
+
+    def clear(self) -> None:
+        """Forget every user and start over with a full load."""
+        with self._lock:
+            self._versions.clear()
+            self._inactive.clear()
+            self._watermark = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "versioned_users": len(self._versions),
+                "inactive_users": len(self._inactive),
+                "refreshes": self.refreshes,
+                "rows_read": self.rows_read,
+                "seconds_since_refresh": (
+                    round(time.monotonic() - self.last_refresh_at, 3)
+                    if self.last_refresh_at is not None else None
+                ),
+            }
+
+
+revocation_registry = TokenRevocationRegistry()
+register_metrics("token_revocation", revocation_registry.stats)
+
+
+def run_revocation_refresh() -> int:
+    """Entry point for the periodic revocation refresh job."""
+    db = SessionLocal()
+    try:
+        return revocation_registry.refresh(db)
+    finally:
+        db.close()
@@ -1,18 +1,49 @@
 from datetime import datetime
 from typing import Optional, Tuple
+from sqlalchemy import select, bindparam
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from passlib.context import CryptContext
 import uuid
 import logging
+import os
 
 from backend.models.orm.user import User
 from backend.models.schemas.user import UserCreate, UserUpdate
+from backend.utils.cache import TTLCache
+from backend.utils.metrics import register_metrics
+from backend.utils.password_hashing import pwd_context, password_pool
+from backend.services.revocation_service import revocation_registry
+from backend.services.guest_cart_service import guest_cart_store
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Statements for the hot single-row lookups are built once at import time so
+# SQLAlchemy can reuse their cached compiled form on every call.
+_USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+_USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+_USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
+
+# Resolved principals (UserResponse snapshots) keyed by email, so authenticated
+# requests don't reload the user row. Writes that change what a principal looks
+# like must call invalidate_principal().
+principal_cache = TTLCache(
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "300"))
+)
+register_metrics("principal_cache", principal_cache.stats)
+
+# Guests sign in with a token only; this value never verifies as a bcrypt hash
+GUEST_PASSWORD_HASH = "!guest"
+
+def invalidate_principal(*emails: str) -> None:
+    """Drop cached principals for the given emails."""
+    for email in emails:
+        if email:
+            principal_cache.invalidate(email)
+
+# Users changed by other processes reach this one through the revocation refresh
+revocation_registry.subscribe(invalidate_principal)
 
 class UserService:
     def __init__(self, db: Session):
@@ -20,18 +51,18 @@ class UserService:
 
     def get_user(self, user_id: int) -> Optional[User]:
         """Get user by ID."""
-        return self.db.query(User).filter(User.id == user_id).first()
+        return self.db.scalars(_USER_BY_ID, {"user_id": user_id}).first()
 
     def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email."""
-        return self.db.query(User).filter(User.email == email).first()
+        return self.db.scalars(_USER_BY_EMAIL, {"email": email}).first()
 
     def get_user_by_username(self, username: str) -> Optional[User]:
         """Get user by username."""
-        return self.db.query(User).filter(User.username == username).first()
+        return self.db.scalars(_USER_BY_USERNAME, {"username": username}).first()
 
-    def create_user(self, user_data: UserCreate) -> User:
-        """Create a new user."""
+    def create_user(self, user_data: UserCreate, password_hash: Optional[str] = None) -> User:
+        """Create a new user, hashing the password here unless ``password_hash`` is given."""
         # Check if email or username already exists
         if self.get_user_by_email(user_data.email):
             raise ValueError("Email already registered")
@@ -42,7 +73,7 @@ class UserService:
         db_user = User(
             username=user_data.username,
             email=user_data.email,
-            password_hash=self._get_password_hash(user_data.password),
+            password_hash=password_hash or self._get_password_hash(user_data.password),
             first_name=user_data.first_name,
             last_name=user_data.last_name,
             role=user_data.role,
@@ -55,23 +86,33 @@ class UserService:
         try:
             self.db.add(db_user)
             self.db.commit()
-            self.db.refresh(db_user)
             return db_user
         except IntegrityError:
             self.db.rollback()
             raise ValueError("Error creating user")
 
-    def update_user(self, user_id: int, user_data: UserUpdate) -> Optional[User]:
-        """Update user details."""
+    async def create_user_async(self, user_data: UserCreate) -> User:
+        """Create a new user, hashing the password on the hashing pool.
+
+        Raises HashingPoolBusy when the pool is saturated.
+        """
+        return self.create_user(user_data, password_hash=await password_pool.hash(user_data.password))
+
+    def update_user(self, user_id: int, user_data: UserUpdate, password_hash: Optional[str] = None) -> Optional[User]:
+        """Update user details, hashing a new password here unless ``password_hash`` is given."""
         db_user = self.get_user(user_id)
         if not db_user:
             return None
 
         update_data = user_data.model_dump(exclude_unset=True)
+        previous_email = db_user.email
         
         # Handle password update separately
         if "password" in update_data:
-            update_data["password_hash"] = self._get_password_hash(update_data.pop("password"))
+            password = update_data.pop("password")
+            update_data["password_hash"] = password_hash or self._get_password_hash(password)
+            # A new password revokes every token issued with the old one
+            db_user.token_version = (db_user.token_version or 0) + 1
 
         # Check email uniqueness if being updated
         if "email" in update_data and update_data["email"] != db_user.email:
@@ -92,20 +133,42 @@ class UserService:
         try:
             self.db.commit()
             self.db.refresh(db_user)
+            invalidate_principal(previous_email, db_user.email)
+            revocation_registry.record(db_user.id, db_user.token_version, db_user.is_active)
             return db_user
         except IntegrityError:
             self.db.rollback()
             raise ValueError("Error updating user")
 
+    async def update_user_async(self, user_id: int, user_data: UserUpdate) -> Optional[User]:
+        """Update user details, hashing a new password on the hashing pool.
+
+        Raises HashingPoolBusy when the pool is saturated.
+        """
+        password_hash = await password_pool.hash(user_data.password) if user_data.password else None
+        return self.update_user(user_id, user_data, password_hash=password_hash)
+
     def authenticate_user(self, email: str, password: str) -> Optional[User]:
         """Authenticate a user by email and password"""
         user = self.get_user_by_email(email)
-        if not user or not user.is_active:
+        if not user or not user.is_active or user.is_guest:
             return None
         if not self.verify_password(password, user.password_hash):
             return None
         return user
 
+    async def authenticate_user_async(self, email: str, password: str) -> Optional[User]:
+        """Authenticate a user, verifying the password on the hashing pool.
+
+        Raises HashingPoolBusy when the pool is saturated.
+        """
+        user = self.get_user_by_email(email)
+        if not user or not user.is_active or user.is_guest:
+            return None
+        if not await password_pool.verify(password, user.password_hash):
+            return None
+        return user
+
     def deactivate_user(self, user_id: int) -> Optional[User]:
         """Deactivate a user account."""
         db_user = self.get_user(user_id)
@@ -113,52 +176,50 @@ class UserService:
             return None
 
         db_user.is_active = False
+        # Revoke every token issued so far
+        db_user.token_version = (db_user.token_version or 0) + 1
         db_user.updated_at = datetime.utcnow()
 
         try:
             self.db.commit()
             self.db.refresh(db_user)
+            invalidate_principal(db_user.email)
+            revocation_registry.record(db_user.id, db_user.token_version, db_user.is_active)
             return db_user
         except IntegrityError:
             self.db.rollback()
             raise ValueError("Error deactivating user")
 
     def create_guest_user(self) -> User:
-        """Create a new guest user with auto-generated credentials."""
+        """Create a new guest user.
+
+        Guests authenticate with a signed token only, so no password is generated
+        or hashed; the row carries an unusable password hash instead.
+        """
         try:
-            # Generate unique guest credentials
             timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-            unique_id = str(uuid.uuid4())[:8]
+            unique_id = uuid.uuid4().hex[:8]
             guest_username = f"guest_{timestamp}_{unique_id}"
-            guest_email = f"{guest_username}@guest.local"
-            guest_password = unique_id  # Use unique_id as password
-            password_hash = pwd_context.hash(guest_password)
+            now = datetime.utcnow()
 
-            logger.debug(f"Creating guest user with username: {guest_username}")
-            logger.debug(f"Guest user email: {guest_email}")
-
-            # Create guest user instance
             guest_user = User(
                 username=guest_username,
-                email=guest_email,
-                password_hash=password_hash,
+                email=f"{guest_username}@guest.local",
+                password_hash=GUEST_PASSWORD_HASH,
                 first_name="Guest",
                 last_name="User",
                 role="customer",
                 is_guest=True,
-                is_admin=False,  # Explicitly set is_admin for guest users
+                is_admin=False,
                 is_active=True,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
+                created_at=now,
+                updated_at=now
             )
 
-            logger.debug(f"Guest user object created: {guest_user.__dict__}")
-
             self.db.add(guest_user)
             self.db.commit()
-            self.db.refresh(guest_user)
 
-            logger.info(f"Guest user created successfully: {guest_user.to_dict()}")
+            logger.info(f"Guest user created: {guest_user.id}")
             return guest_user
 
         except IntegrityError as e:
@@ -171,16 +232,53 @@ class UserService:
             raise ValueError(f"Error creating guest user: {str(e)}")
 
     def authenticate_guest(self) -> Tuple[User, str]:
-        """Create and authenticate a new guest user, returning the user and their credentials."""
+        """Create a new guest user, returning the user and its guest session id."""
+        guest_user = self.create_guest_user()
+        session_id = guest_user.username.split('_')[2]  # Get unique_id part
+        return guest_user, session_id
+
+    def upgrade_guest_user(self, guest_id: int, user_data: UserCreate, password_hash: Optional[str] = None) -> User:
+        """Turn a guest into a full user, keeping its id (and so its cart and ratings)."""
+        db_user = self.get_user(guest_id)
+        if not db_user or not db_user.is_guest or not db_user.is_active:
+            raise ValueError("Guest session not found")
+
+        if self.get_user_by_email(user_data.email):
+            raise ValueError("Email already registered")
+        if self.get_user_by_username(user_data.username):
+            raise ValueError("Username already taken")
+
+        # The cart is served from the database from now on
+        guest_cart_store.evict(guest_id, self.db)
+
+        previous_email = db_user.email
+        db_user.username = user_data.username
+        db_user.email = user_data.email
+        db_user.password_hash = password_hash or self._get_password_hash(user_data.password)
+        db_user.first_name = user_data.first_name
+        db_user.last_name = user_data.last_name
+        db_user.role = user_data.role
+        db_user.phone_number = user_data.phone_number
+        db_user.is_guest = False
+        # Guest tokens claim is_guest, so they must not outlive the upgrade
+        db_user.token_version = (db_user.token_version or 0) + 1
+        db_user.updated_at = datetime.utcnow()
+
         try:
-            logger.debug("Starting guest user authentication process")
-            guest_user = self.create_guest_user()
-            password = guest_user.username.split('_')[2]  # Get unique_id part
-            logger.info(f"Guest user authenticated successfully: {guest_user.email}")
-            return guest_user, password
-        except Exception as e:
-            logger.error(f"Error in guest authentication: {str(e)}", exc_info=True)
-            raise
+            self.db.commit()
+            invalidate_principal(previous_email, db_user.email)
+            revocation_registry.record(db_user.id, db_user.token_version, db_user.is_active)
+            return db_user
+        except IntegrityError:
+            self.db.rollback()
+            raise ValueError("Error creating user")
+
+    async def upgrade_guest_user_async(self, guest_id: int, user_data: UserCreate) -> User:
+        """Upgrade a guest, hashing the new password on the hashing pool.
+
+        Raises HashingPoolBusy when the pool is saturated.
+        """
+        return self.upgrade_guest_user(guest_id, user_data, password_hash=await password_pool.hash(user_data.password))
 
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -0,0 +1,114 @@
+from typing import Any, Dict, Iterable, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+import logging
+import os
+
+from backend.models.orm.menu import MenuItem
+from backend.services.kitchen_service import KitchenQueue, kitchen_queue, KITCHEN_DEFAULT_PREP_MINUTES
+from backend.utils.cache import TTLCache
+from backend.utils.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+PREP_PROFILE_CACHE_SIZE = int(os.getenv("PREP_PROFILE_CACHE_SIZE", "2048"))
+PREP_PROFILE_CACHE_TTL_SECONDS = float(os.getenv("PREP_PROFILE_CACHE_TTL_SECONDS", "3600"))
+
+# (prep minutes, station) of a menu item
+PrepProfile = Tuple[float, Optional[int]]
+
+
+class WaitTimeEstimator:
+    """Estimates how long a cart would take if it were ordered now.
+
+    The kitchen load comes from the kitchen queue's outstanding prep minutes
+    per station, which it adjusts as orders are checked out and batches are
+    cooked, so no aggregate query is needed. Each menu item's preparation
+    time and station are cached here; lines of user carts carry their menu
+    item already, and guest lines missing from the cache are loaded by
+    primary key. An estimate therefore costs O(items in cart).
+    """
+
+    def __init__(self, queue: KitchenQueue = kitchen_queue, maxsize: int = PREP_PROFILE_CACHE_SIZE,
+                 ttl: float = PREP_PROFILE_CACHE_TTL_SECONDS):
+        self.queue = queue
+        self._profiles = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.estimates = 0
+
+    @staticmethod
+    def _profile_of(menu_item: Any) -> PrepProfile:
+        prep = menu_item.preparation_time
+        return (float(prep) if prep is not None else KITCHEN_DEFAULT_PREP_MINUTES, menu_item.category_id)
+
+    def profiles(self, db: Session, lines: Iterable[Any]) -> Dict[int, PrepProfile]:
+        """Prep profile for the menu item behind each cart line."""
+        profiles, missing = {}, set()
+        for line in lines:
+            menu_item = getattr(line, "menu_item", None)
+            if menu_item is not None:
+                profiles[line.menu_item_id] = self._profile_of(menu_item)
+                continue
+            profile = self._profiles.get(line.menu_item_id)
+            if profile is None:
+                missing.add(line.menu_item_id)
+            else:
+                profiles[line.menu_item_id] = profile
+        if missing:
+            for row in db.execute(
+                select(MenuItem.id, MenuItem.preparation_time, MenuItem.category_id).where(MenuItem.id.in_(missing))
+            ):
+                profiles[row.id] = self._profile_of(row)
+                self._profiles.set(row.id, profiles[row.id])
+        return profiles
+
+    def estimate(self, db: Session, cart: Any) -> Dict[str, Any]:
+        """Minutes until a cart ordered now would be ready.
+
+        Work already queued is shared by all cooks before the cart's tickets
+        start; the cart's own tickets then run in parallel, so they take at
+        least as long as the slowest one and at least their total spread over
+        the cooks.
+        """
+        backlog = self.queue.outstanding_minutes()
+        cooks = max(self.queue.cooks, 1)
+        batch_size = max(self.queue.batch_size, 1)
+        profiles = self.profiles(db, cart.items)
+
+        lines, total_work, longest = [], 0.0, 0.0
+        for line in cart.items:
+            prep, station = profiles.get(line.menu_item_id, (KITCHEN_DEFAULT_PREP_MINUTES, None))
+            work = prep * -(-line.quantity // batch_size)
+            total_work += work
+            longest = max(longest, work)
+            lines.append({
+                "menu_item_id": line.menu_item_id,
+                "quantity": line.quantity,
+                "prep_minutes": prep,
+                "station": station,
+                "station_backlog_minutes": round(backlog.get(station, 0.0), 2),
+            })
+
+        queue_wait = sum(backlog.values()) / cooks
+        prep_minutes = max(longest, total_work / cooks)
+        self.estimates += 1
+        return {
+            "cart_version": cart.version,
+            "queue_wait_minutes": round(queue_wait, 2),
+            "prep_minutes": round(prep_minutes, 2),
+            "eta_minutes": round(queue_wait + prep_minutes, 2) if lines else 0.0,
+            "lines": lines,
+        }
+
+    def invalidate(self, *menu_item_ids: int) -> None:
+        for menu_item_id in menu_item_ids:
+            self._profiles.invalidate(menu_item_id)
+
+    def clear(self) -> None:
+        self._profiles.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._profiles.stats(), "estimates": self.estimates}
+
+
+wait_time_estimator = WaitTimeEstimator()
+register_metrics("wait_time", wait_time_estimator.stats)
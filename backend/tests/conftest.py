@@ -2,7 +2,7 @@ import os
 os.environ["TESTING"] = "1"  # Set testing environment before any imports
 
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
 from pathlib import Path
@@ -13,7 +13,14 @@ from backend.models.orm.menu import Category, MenuItem, Allergen
 from backend.models.orm.user import User
 from backend.models.orm.shopping_cart import ShoppingCart, CartItem
 from backend.models.orm.rating import MenuItemRating, RestaurantFeedback
-from backend.utils.auth import create_access_token
+from backend.utils.auth import create_access_token, verified_token_cache
+from backend.services.user_service import principal_cache
+from backend.services.revocation_service import revocation_registry
+from backend.services.guest_cart_service import guest_cart_store
+from backend.services.pricing_service import pricing_engine
+from backend.services.kitchen_service import kitchen_queue
+from backend.services.wait_time_service import wait_time_estimator
+from backend.utils.rate_limit import reset_rate_limits
 from httpx import AsyncClient
 
 # Get the absolute path to the backend directory
@@ -52,6 +59,15 @@ def override_get_db():
 @pytest.fixture(autouse=True)
 def cleanup_database():
     """Clean up database before each test"""
+    # Process-wide caches must not leak principals between tests
+    principal_cache.clear()
+    revocation_registry.clear()
+    guest_cart_store.clear()
+    pricing_engine.clear()
+    kitchen_queue.clear()
+    wait_time_estimator.clear()
+    verified_token_cache.clear()
+    reset_rate_limits()
     session = TestingSessionLocal()
     try:
         for table in reversed(Base.metadata.sorted_tables):
@@ -70,6 +86,43 @@ def db_session():
     finally:
         db.close()
 
+class StatementCounter:
+    """Records the SQL statements sent to the database inside ``with counter:``."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+        # Statements sent with executemany (one round trip for many rows)
+        self.executemany = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+        if executemany:
+            self.executemany.append(statement)
+
+    def __enter__(self):
+        self.statements, self.executemany = [], []
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    @property
+    def writes(self):
+        return [statement for statement in self.statements if not statement.lstrip().upper().startswith("SELECT")]
+
+    def count(self, call) -> int:
+        """Run ``call`` and return how many statements it sent."""
+        with self:
+            call()
+        return len(self.statements)
+
+@pytest.fixture
+def statement_counter(db_session):
+    """Counts the statements run on the test database"""
+    return StatementCounter(db_session.get_bind())
+
 @pytest.fixture
 def client(db_session):
     """Get a test client"""
@@ -150,6 +203,21 @@ def sample_cart(db_session, test_user):
     db_session.refresh(cart)
     return cart
 
+@pytest.fixture
+def cart_with_lines(db_session, sample_category):
+    """Factory filling a user's cart with ``lines`` distinct menu items, one unit each."""
+    category_id = sample_category.id
+
+    def make(user_id, lines):
+        cart = ShoppingCart(user_id=user_id)
+        db_session.add(cart)
+        for i in range(lines):
+            menu_item = MenuItem(name=f"Line {i}", price=5.0, category_id=category_id)
+            cart.items.append(CartItem(menu_item=menu_item, quantity=1))
+        db_session.commit()
+        return cart
+    return make
+
 @pytest.fixture
 def sample_cart_item(db_session, sample_cart, sample_menu_item):
     """Create a sample cart item for testing."""
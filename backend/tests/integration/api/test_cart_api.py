@@ -211,3 +211,119 @@ def test_get_cart_total(
     assert response.status_code == 200
     total = float(response.json())
     assert total == test_menu_item.price * 2
+
+def test_get_cart_with_login_token(client: Client, db_session: Session):
+    """Test that tokens issued at login carry claims the cart routes accept"""
+    user_data = {
+        "username": "claimsuser",
+        "email": "claims@example.com",
+        "password": "strongpass123",
+        "first_name": "Claims",
+        "last_name": "User",
+        "role": "customer"
+    }
+    client.post("/api/users/register", json=user_data)
+    login_response = client.post(
+        "/api/users/login",
+        json={"email": user_data["email"], "password": user_data["password"]}
+    )
+    token = login_response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get("/api/cart", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["user_id"] == login_response.json()["user"]["id"]
+
+@pytest.mark.parametrize("lines", [1, 8])
+def test_get_cart_query_count_is_bounded(client: Client, test_user: User, cart_with_lines, statement_counter, lines: int):
+    """Test that reading a cart costs at most two queries whatever its size"""
+    from backend.utils.auth import build_token_claims
+
+    cart_with_lines(test_user.id, lines)
+    headers = {"Authorization": f"Bearer {create_access_token(data=build_token_claims(test_user))}"}
+
+    assert statement_counter.count(lambda: client.get("/api/cart", headers=headers)) <= 2
+
+def test_cart_batch_applies_operations_in_order(client: Client, db_session: Session, test_user: User, sample_category):
+    """Test that a batch of cart operations is applied in one request"""
+    from backend.utils.auth import build_token_claims
+
+    first = MenuItem(name="Batch One", price=4.0, category_id=sample_category.id)
+    second = MenuItem(name="Batch Two", price=6.0, category_id=sample_category.id)
+    db_session.add_all([first, second])
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(data=build_token_claims(test_user))}"}
+
+    existing = client.post("/api/cart/items", headers=headers,
+                           json={"menu_item_id": first.id, "quantity": 1}).json()["items"][0]
+
+    response = client.post("/api/cart/batch", headers=headers, json={"operations": [
+        {"op": "add", "menu_item_id": second.id, "quantity": 2},
+        {"op": "update", "item_id": existing["id"], "quantity": 3},
+        {"op": "add", "menu_item_id": second.id, "quantity": 1},
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    quantities = {item["menu_item_id"]: item["quantity"] for item in data["items"]}
+    assert quantities == {first.id: 3, second.id: 3}
+    assert data["subtotal"] == pytest.approx(3 * 4.0 + 3 * 6.0)
+    assert data["item_count"] == 6
+
+def test_cart_batch_is_all_or_nothing(client: Client, db_session: Session, test_user: User, test_menu_item: MenuItem):
+    """Test that a failing operation leaves the cart untouched"""
+    from backend.utils.auth import build_token_claims
+
+    headers = {"Authorization": f"Bearer {create_access_token(data=build_token_claims(test_user))}"}
+    response = client.post("/api/cart/batch", headers=headers, json={"operations": [
+        {"op": "add", "menu_item_id": test_menu_item.id, "quantity": 2},
+        {"op": "remove", "item_id": 999999},
+    ]})
+    assert response.status_code == 400
+
+    cart = client.get("/api/cart", headers=headers).json()
+    assert cart["items"] == []
+    assert cart["subtotal"] == 0
+
+    response = client.post("/api/cart/batch", headers=headers, json={"operations": [
+        {"op": "add", "menu_item_id": 999999, "quantity": 1},
+    ]})
+    assert response.status_code == 400
+    assert "not found" in response.json()["detail"]
+
+def test_cart_writes_with_stale_if_match_conflict(client: Client, db_session: Session, test_user: User, test_menu_item: MenuItem):
+    """Test that two editors holding the same version cannot both write"""
+    from backend.utils.auth import build_token_claims
+
+    headers = {"Authorization": f"Bearer {create_access_token(data=build_token_claims(test_user))}"}
+    added = client.post("/api/cart/items", headers=headers,
+                        json={"menu_item_id": test_menu_item.id, "quantity": 1})
+    etag = added.headers["ETag"]
+    item_id = added.json()["items"][0]["id"]
+    assert client.get("/api/cart", headers=headers).headers["ETag"] == etag
+
+    # First tab wins and gets a new version
+    first = client.put(f"/api/cart/items/{item_id}", headers={**headers, "If-Match": etag},
+                       json={"customizations": {"notes": "no onions"}})
+    assert first.status_code == 200
+    assert first.headers["ETag"] != etag
+
+    # Second tab still holds the old version
+    second = client.put(f"/api/cart/items/{item_id}", headers={**headers, "If-Match": etag},
+                        json={"customizations": {"notes": "extra onions"}})
+    assert second.status_code == 409
+    cart = client.get("/api/cart", headers=headers).json()
+    assert cart["items"][0]["customizations"] == {"notes": "no onions"}
+
+    # Writes without If-Match keep last-writer-wins behaviour
+    assert client.delete("/api/cart", headers=headers).status_code == 200
+
+def test_get_cart_eta(client: Client, db_session: Session, test_user: User, test_menu_item: MenuItem):
+    """Test estimating the wait for the cart's contents"""
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': test_user.email})}"}
+    assert client.get("/api/cart/eta").status_code == 401
+    assert client.get("/api/cart/eta", headers=headers).json()["eta_minutes"] == 0
+
+    client.post("/api/cart/items", headers=headers, json={"menu_item_id": test_menu_item.id, "quantity": 1})
+    data = client.get("/api/cart/eta", headers=headers).json()
+    assert data["lines"][0]["menu_item_id"] == test_menu_item.id
+    assert data["eta_minutes"] == data["lines"][0]["prep_minutes"]
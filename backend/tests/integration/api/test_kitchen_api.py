@@ -0,0 +1,67 @@
+import json
+import pytest
+from httpx import Client
+from sqlalchemy.orm import Session
+
+from backend.api.routes.kitchen import queue_events
+from backend.models.orm.user import User
+from backend.models.orm.menu import MenuItem
+from backend.services.kitchen_service import KitchenLine, kitchen_queue
+from backend.utils.auth import create_access_token
+
+pytestmark = pytest.mark.usefixtures("db_session")
+
+def _headers(user: User) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+
+def test_queue_shows_checked_out_orders(client: Client, test_user: User, test_menu_item: MenuItem):
+    headers = _headers(test_user)
+    client.post("/api/cart/items", headers=headers, json={"menu_item_id": test_menu_item.id, "quantity": 1})
+    order_id = client.post("/api/orders/checkout", headers=headers).json()["id"]
+
+    queue = client.get("/api/kitchen/queue").json()
+    assert queue["depth"] == 1
+    assert str(order_id) in queue["orders"]
+    assert queue["max_eta_seconds"] > 0
+
+def test_batches_are_staff_only(client: Client, test_user: User):
+    assert client.post("/api/kitchen/batches/next").status_code == 401
+    assert client.post("/api/kitchen/batches/next", headers=_headers(test_user)).status_code == 403
+
+def test_staff_cooks_an_order(client: Client, db_session: Session, test_user: User, test_menu_item: MenuItem):
+    headers = _headers(test_user)
+    client.post("/api/cart/items", headers=headers, json={"menu_item_id": test_menu_item.id, "quantity": 2})
+    order_id = client.post("/api/orders/checkout", headers=headers).json()["id"]
+
+    cook = User(username="cook", email="cook@example.com", password_hash="x",
+                first_name="Line", last_name="Cook", role="staff")
+    db_session.add(cook)
+    db_session.commit()
+    staff = _headers(cook)
+
+    batch = client.post("/api/kitchen/batches/next", headers=staff).json()
+    assert batch["order_ids"] == [order_id]
+    assert client.get(f"/api/orders/{order_id}", headers=headers).json()["status"] == "preparing"
+    assert client.post("/api/kitchen/batches/next", headers=staff).status_code == 204
+
+    response = client.post(f"/api/kitchen/batches/{batch['id']}/complete", headers=staff)
+    assert response.json()["ready_order_ids"] == [order_id]
+    assert client.get(f"/api/orders/{order_id}", headers=headers).json()["status"] == "ready"
+    assert client.post(f"/api/kitchen/batches/{batch['id']}/complete", headers=staff).status_code == 404
+
+@pytest.mark.asyncio
+async def test_queue_stream_sends_snapshot_on_change():
+    class _Request:
+        polls = 0
+
+        async def is_disconnected(self):
+            self.polls += 1
+            return self.polls > 3
+
+    kitchen_queue.submit(1, [KitchenLine(1, "Soup", 1, 6, None)])
+    events = [event async for event in queue_events(_Request(), poll=0, refresh=60)]
+
+    # One snapshot on connect; unchanged polls send nothing
+    assert len(events) == 1
+    assert events[0].startswith("event: queue\ndata: ")
+    assert json.loads(events[0].split("data: ", 1)[1])["depth"] == 1
@@ -1,4 +1,5 @@
 from typing import List
+import pytest
 
 def test_create_category(client):
     response = client.post(
@@ -648,3 +649,30 @@ def test_get_menu(client, sample_category, sample_menu_item):
         assert "category" in menu_item
         assert isinstance(menu_item["category"], str)
         assert menu_item["category"] == sample_category.name
+
+def test_customize_menu_item_is_read_only(client, db_session, sample_menu_item, statement_counter):
+    """Test that customizing prices the selection without writing the shared menu row"""
+    client.patch(
+        f"/api/menu/items/{sample_menu_item.id}",
+        json={
+            "customization_options": {"size": ["small", "large"]},
+            "customization_prices": {"size": {"large": 2.5}}
+        }
+    )
+    db_session.refresh(sample_menu_item)
+    price, updated_at = sample_menu_item.price, sample_menu_item.updated_at
+
+    with statement_counter:
+        response = client.post(
+            f"/api/menu/items/{sample_menu_item.id}/customize",
+            json={"size": "large"}
+        )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["selected_customization"] == {"size": "large"}
+    assert data["price_delta"] == pytest.approx(2.5)
+    assert data["unit_price"] == pytest.approx(price + 2.5)
+    assert statement_counter.writes == []
+    db_session.refresh(sample_menu_item)
+    assert sample_menu_item.updated_at == updated_at
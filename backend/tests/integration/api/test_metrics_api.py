@@ -0,0 +1,32 @@
+import pytest
+from httpx import Client
+from sqlalchemy.orm import Session
+
+from backend.models.orm.user import User
+from backend.utils.auth import create_access_token
+
+pytestmark = pytest.mark.usefixtures("db_session")
+
+def _headers(user: User) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+
+def test_metrics_are_staff_only(client: Client, db_session: Session, test_user: User):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers=_headers(test_user)).status_code == 403
+
+    manager = User(username="manager", email="manager@example.com", password_hash="x",
+                   first_name="Floor", last_name="Manager", role="staff")
+    db_session.add(manager)
+    db_session.commit()
+    response = client.get("/metrics", headers=_headers(manager))
+    assert response.status_code == 200
+    assert "password_hashing" in response.json()
+
+def test_metrics_scrape_token(client: Client, monkeypatch):
+    from backend.api import app as app_module
+
+    assert client.get("/metrics", headers={"X-Metrics-Token": "guess"}).status_code == 401
+
+    monkeypatch.setattr(app_module, "METRICS_SCRAPE_TOKEN", "scrape-secret")
+    assert client.get("/metrics", headers={"X-Metrics-Token": "scrape-secret"}).status_code == 200
+    assert client.get("/metrics", headers={"X-Metrics-Token": "guess"}).status_code == 401
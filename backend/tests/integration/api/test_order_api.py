@@ -0,0 +1,72 @@
+import pytest
+from httpx import Client
+from sqlalchemy.orm import Session
+
+from backend.models.orm.user import User
+from backend.models.orm.menu import MenuItem
+from backend.utils.auth import create_access_token
+
+pytestmark = pytest.mark.usefixtures("db_session")
+
+def _headers(user: User) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+
+def test_checkout_unauthorized(client: Client):
+    response = client.post("/api/orders/checkout")
+    assert response.status_code == 401
+
+def test_checkout_empty_cart(client: Client, test_user: User):
+    response = client.post("/api/orders/checkout", headers=_headers(test_user))
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cart is empty"
+
+def test_checkout_with_idempotency_key(client: Client, test_user: User, test_menu_item: MenuItem):
+    headers = _headers(test_user)
+    client.post("/api/cart/items", headers=headers, json={"menu_item_id": test_menu_item.id, "quantity": 3})
+
+    keyed = {**headers, "Idempotency-Key": "checkout-1"}
+    response = client.post("/api/orders/checkout", headers=keyed)
+    assert response.status_code == 201
+    order = response.json()
+    assert order["item_count"] == 3
+    assert order["items"][0]["line_total"] == pytest.approx(test_menu_item.price * 3)
+    assert client.get("/api/cart", headers=headers).json()["items"] == []
+
+    retry = client.post("/api/orders/checkout", headers=keyed)
+    assert retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json()["id"] == order["id"]
+
+    orders = client.get("/api/orders", headers=headers).json()
+    assert [o["id"] for o in orders] == [order["id"]]
+    assert client.get(f"/api/orders/{order['id']}", headers=headers).json()["id"] == order["id"]
+
+def test_checkout_with_stale_if_match_conflicts(client: Client, test_user: User, test_menu_item: MenuItem):
+    headers = _headers(test_user)
+    reviewed = client.post("/api/cart/items", headers=headers, json={"menu_item_id": test_menu_item.id, "quantity": 1})
+    etag = reviewed.headers["ETag"]
+    # The cart changes after the customer reviewed it
+    client.post("/api/cart/items", headers=headers, json={"menu_item_id": test_menu_item.id, "quantity": 4})
+
+    response = client.post("/api/orders/checkout", headers={**headers, "If-Match": etag})
+    assert response.status_code == 409
+    assert len(client.get("/api/cart", headers=headers).json()["items"]) == 1
+
+    current = client.get("/api/cart", headers=headers).headers["ETag"]
+    response = client.post("/api/orders/checkout", headers={**headers, "If-Match": current})
+    assert response.status_code == 201
+    assert response.json()["item_count"] == 5
+
+    assert client.post("/api/orders/checkout", headers={**headers, "If-Match": "not-a-version"}).status_code == 400
+
+def test_get_other_users_order(client: Client, db_session: Session, test_user: User, test_menu_item: MenuItem):
+    headers = _headers(test_user)
+    client.post("/api/cart/items", headers=headers, json={"menu_item_id": test_menu_item.id, "quantity": 1})
+    order_id = client.post("/api/orders/checkout", headers=headers).json()["id"]
+
+    other = User(username="other", email="other@example.com", password_hash="x",
+                 first_name="Other", last_name="User", role="customer")
+    db_session.add(other)
+    db_session.commit()
+    response = client.get(f"/api/orders/{order_id}", headers=_headers(other))
+    assert response.status_code == 404
@@ -24,6 +24,16 @@ def test_rate_menu_item(client, test_user_token, test_menu_item):
     assert data["rating"] == 4
     assert data["comment"] == "Great dish!"
 
+def test_rate_missing_menu_item(client, test_user_token):
+    """Test rating a menu item that does not exist"""
+    response = client.post(
+        "/api/ratings/menu-items/9999",
+        json={"menu_item_id": 9999, "rating": 4},
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+
+    assert response.status_code == 404
+
 def test_duplicate_menu_item_rating(client, test_user_token, test_menu_item):
     """Test that a user cannot rate the same menu item twice"""
     rating_data = {
@@ -188,3 +198,44 @@ def test_invalid_feedback_category(client, test_user_token):
     )
 
     assert response.status_code == 422  # Validation error
+
+def test_menu_item_rating_distribution(client, test_user_token, test_menu_item):
+    """Test the average, distribution and count endpoints"""
+    client.post(
+        f"/api/ratings/menu-items/{test_menu_item.id}",
+        json={"menu_item_id": test_menu_item.id, "rating": 3},
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+
+    response = client.get(f"/api/ratings/menu-items/{test_menu_item.id}/distribution")
+    assert response.status_code == 200
+    assert response.json() == {
+        "menu_item_id": test_menu_item.id,
+        "average": 3.0,
+        "total": 1,
+        "distribution": {"1": 0, "2": 0, "3": 1, "4": 0, "5": 0}
+    }
+    assert client.get(f"/api/ratings/menu-items/{test_menu_item.id}/average").json() == {"average": 3.0, "total": 1}
+    assert client.get(f"/api/ratings/menu-items/{test_menu_item.id}/count").json() == {"total": 1}
+
+def test_get_menu_items_average_ratings(client, test_user_token, test_menu_item):
+    """Test fetching averages for several menu items in one request"""
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    client.post(
+        f"/api/ratings/menu-items/{test_menu_item.id}",
+        json={"menu_item_id": test_menu_item.id, "rating": 4},
+        headers=headers
+    )
+    missing_id = test_menu_item.id + 1000
+
+    response = client.get(f"/api/ratings/menu-items/averages?ids={test_menu_item.id},{missing_id}", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == [
+        {"menu_item_id": test_menu_item.id, "average": 4.0, "total": 1, "user_rating": 4},
+        {"menu_item_id": missing_id, "average": 0.0, "total": 0, "user_rating": None},
+    ]
+
+    # Anonymous callers get the averages without their own ratings
+    anonymous = client.get(f"/api/ratings/menu-items/averages?ids={test_menu_item.id}").json()
+    assert anonymous[0]["user_rating"] is None
+    assert client.get("/api/ratings/menu-items/averages?ids=1,abc").status_code == 400
@@ -141,6 +141,31 @@ def test_deactivate_user(client: TestClient, db_session: Session):
     assert response.status_code == 401
     assert "Not authenticated or user is deactivated" in response.json()["detail"]
 
+def test_stale_token_rejected_on_me(client: TestClient, db_session: Session):
+    """Test that a token revoked by a password change no longer works on /me"""
+    user_data = {
+        "username": "staletoken",
+        "email": "stale@example.com",
+        "password": "strongpass123",
+        "first_name": "Stale",
+        "last_name": "Token",
+        "role": "customer"
+    }
+    client.post("/api/users/register", json=user_data)
+    token = client.post(
+        "/api/users/login",
+        json={"email": user_data["email"], "password": user_data["password"]}
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/users/me", headers=headers).status_code == 200
+
+    response = client.put("/api/users/me", headers=headers, json={"password": "newstrongpass456"})
+    assert response.status_code == 200
+
+    assert client.get("/api/users/me", headers=headers).status_code == 401
+    assert client.put("/api/users/me", headers=headers, json={"email": "hijack@example.com"}).status_code == 401
+    assert client.delete("/api/users/me", headers=headers).status_code == 401
+
 def test_guest_login(client: TestClient, db_session: Session):
     """Test guest user login functionality"""
     response = client.post("/api/users/guest-login")
@@ -207,3 +232,173 @@ def test_guest_user_deactivation(client: TestClient, db_session: Session):
     me_response = client.get("/api/users/me", headers=headers)
     assert me_response.status_code == 401
     assert "Not authenticated or user is deactivated" in me_response.json()["detail"]
+
+def test_guest_login_does_not_hash_password(client: TestClient, db_session: Session):
+    """Test that guest sessions are token-only and cannot log in with a password"""
+    from backend.models.orm.user import User
+    from backend.services.user_service import GUEST_PASSWORD_HASH
+
+    response = client.post("/api/users/guest-login")
+    assert response.status_code == 200
+    guest = db_session.get(User, response.json()["user"]["id"])
+    assert guest.password_hash == GUEST_PASSWORD_HASH
+
+    login_response = client.post(
+        "/api/users/login",
+        json={"email": guest.email, "password": guest.username.split("_")[2]}
+    )
+    assert login_response.status_code == 401
+
+def test_register_upgrades_guest_session(client: TestClient, db_session: Session):
+    """Test that registering with a guest token converts the guest into a full user"""
+    guest_response = client.post("/api/users/guest-login")
+    guest = guest_response.json()["user"]
+    headers = {"Authorization": f"Bearer {guest_response.json()['access_token']}"}
+
+    user_data = {
+        "username": "upgraded",
+        "email": "upgraded@example.com",
+        "password": "strongpass123",
+        "first_name": "Up",
+        "last_name": "Graded",
+        "role": "customer"
+    }
+    response = client.post("/api/users/register", json=user_data, headers=headers)
+    assert response.status_code == 201
+    data = response.json()
+    assert data["id"] == guest["id"]
+    assert data["is_guest"] is False
+    assert data["email"] == "upgraded@example.com"
+
+    # The guest token is revoked; the new credentials work
+    assert client.get("/api/cart", headers=headers).status_code == 401
+    login_response = client.post(
+        "/api/users/login",
+        json={"email": user_data["email"], "password": user_data["password"]}
+    )
+    assert login_response.status_code == 200
+    assert login_response.json()["user"]["id"] == guest["id"]
+
+def test_password_hashing_uses_pool(client: TestClient, db_session: Session, monkeypatch):
+    """Test that registration and password changes hash on the bounded pool"""
+    from backend.utils.password_hashing import password_pool
+
+    user_data = {
+        "username": "pooled",
+        "email": "pooled@example.com",
+        "password": "strongpass123",
+        "first_name": "Pool",
+        "last_name": "User",
+        "role": "customer"
+    }
+    completed = password_pool.stats()["completed"]
+    assert client.post("/api/users/register", json=user_data).status_code == 201
+    assert password_pool.stats()["completed"] == completed + 1
+
+    token = client.post(
+        "/api/users/login", json={"email": user_data["email"], "password": user_data["password"]}
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # A saturated pool turns hashing requests away instead of queueing them
+    monkeypatch.setattr(password_pool, "max_pending", 0)
+    response = client.put("/api/users/me", json={"password": "newpass12345"}, headers=headers)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    response = client.post("/api/users/register", json={**user_data, "username": "other", "email": "other@example.com"})
+    assert response.status_code == 503
+
+def test_login_throttled_per_email(client: TestClient, db_session: Session):
+    """Test that repeated logins for one email are rejected before any password check"""
+    from backend.utils.rate_limit import login_email_limiter
+    from backend.utils.password_hashing import password_pool
+
+    credentials = {"email": "victim@example.com", "password": "wrongpass123"}
+    for _ in range(login_email_limiter.burst):
+        assert client.post("/api/users/login", json=credentials).status_code == 401
+
+    hashed_before = password_pool.stats()["completed"]
+    response = client.post("/api/users/login", json=credentials)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert password_pool.stats()["completed"] == hashed_before
+    assert login_email_limiter.stats()["blocked"] >= 1
+
+def test_guest_login_throttled_per_ip(client: TestClient, db_session: Session):
+    """Test that guest session creation is limited per client address"""
+    from backend.models.orm.user import User
+    from backend.utils.rate_limit import guest_login_ip_limiter
+
+    for _ in range(guest_login_ip_limiter.burst):
+        assert client.post("/api/users/guest-login").status_code == 200
+
+    response = client.post("/api/users/guest-login")
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+    assert db_session.query(User).count() == guest_login_ip_limiter.burst
+
+def test_guest_login_throttled_per_forwarded_ip(monkeypatch):
+    """Test that clients behind a trusted proxy get separate guest login limits"""
+    import ipaddress
+    from fastapi import HTTPException
+    from starlette.requests import Request
+    from backend.utils import rate_limit
+
+    monkeypatch.setattr(rate_limit, "TRUSTED_PROXIES", (ipaddress.ip_network("10.0.0.0/8"),))
+
+    def request(peer, forwarded):
+        return Request({
+            "type": "http",
+            "client": (peer, 443),
+            "headers": [(b"x-forwarded-for", forwarded.encode())],
+        })
+
+    for _ in range(rate_limit.guest_login_ip_limiter.burst):
+        rate_limit.enforce_guest_login_rate(request("10.0.0.5", "203.0.113.7"))
+    with pytest.raises(HTTPException) as exc:
+        rate_limit.enforce_guest_login_rate(request("10.0.0.5", "203.0.113.7"))
+    assert exc.value.status_code == 429
+
+    # A second client behind the same proxy still has its own burst, and a
+    # spoofed leftmost entry does not change which bucket is used
+    rate_limit.enforce_guest_login_rate(request("10.0.0.5", "203.0.113.8"))
+    with pytest.raises(HTTPException):
+        rate_limit.enforce_guest_login_rate(request("10.0.0.5", "198.51.100.1, 203.0.113.7"))
+
+    # Without a trusted peer the header is ignored
+    assert rate_limit.client_ip(request("192.0.2.1", "203.0.113.9")) == "192.0.2.1"
+
+def test_spoofed_forwarded_for_shares_one_guest_bucket(db_session: Session, monkeypatch):
+    """Test that entries a client writes into X-Forwarded-For do not get it a fresh limit"""
+    import ipaddress
+    from backend.api.app import app
+    from backend.utils import rate_limit
+    from backend.utils.database import get_db
+
+    monkeypatch.setattr(rate_limit, "TRUSTED_PROXIES", (ipaddress.ip_network("10.0.0.0/8"),))
+
+    async def behind_proxy(scope, receive, send):
+        # Requests reach the app from the proxy's address, as they do on Render
+        if scope["type"] == "http":
+            scope = {**scope, "client": ("10.0.0.5", 50000)}
+        await app(scope, receive, send)
+
+    app.dependency_overrides[get_db] = lambda: db_session
+    try:
+        proxied = TestClient(behind_proxy)
+        burst = rate_limit.guest_login_ip_limiter.burst
+        for i in range(burst):
+            response = proxied.post("/api/users/guest-login", headers={
+                "X-Forwarded-For": f"198.51.100.{i}, 203.0.113.7"
+            })
+            assert response.status_code == 200
+        response = proxied.post("/api/users/guest-login", headers={
+            "X-Forwarded-For": "1.1.1.1, 203.0.113.7"
+        })
+        assert response.status_code == 429
+
+        # The address the proxy appended decides the bucket
+        response = proxied.post("/api/users/guest-login", headers={"X-Forwarded-For": "203.0.113.8"})
+        assert response.status_code == 200
+    finally:
+        app.dependency_overrides.clear()
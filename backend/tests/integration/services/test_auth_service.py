@@ -95,3 +95,263 @@ async def test_get_current_user(db_session):
     current_user = await get_current_user(token, db_session)
     assert current_user.id == user.id
     assert current_user.email == user.email
+
+@pytest.mark.asyncio
+async def test_get_current_user_uses_principal_cache(db_session, statement_counter):
+    """Test that repeated authentication is served without touching the database"""
+    from backend.utils.auth import create_access_token, get_current_user
+
+    user_service = UserService(db_session)
+    user = user_service.create_user(UserCreate(
+        username="cacheduser",
+        email="cached@example.com",
+        password="testpassword",
+        first_name="Cached",
+        last_name="User",
+        role="customer"
+    ))
+    token = create_access_token(data={"sub": user.email})
+
+    # First call resolves and caches the principal
+    assert (await get_current_user(token, db_session)).id == user.id
+
+    with statement_counter:
+        current_user = await get_current_user(token, db_session)
+
+    assert current_user.id == user.id
+    assert statement_counter.statements == []
+
+@pytest.mark.asyncio
+async def test_deactivate_user_invalidates_principal_cache(db_session):
+    """Test that deactivation takes effect immediately despite the principal cache"""
+    from backend.utils.auth import create_access_token, get_current_user
+
+    user_service = UserService(db_session)
+    user = user_service.create_user(UserCreate(
+        username="deactivated",
+        email="deactivated@example.com",
+        password="testpassword",
+        first_name="Gone",
+        last_name="User",
+        role="customer"
+    ))
+    token = create_access_token(data={"sub": user.email})
+    assert await get_current_user(token, db_session) is not None
+
+    user_service.deactivate_user(user.id)
+    assert await get_current_user(token, db_session) is None
+
+@pytest.mark.asyncio
+async def test_update_user_invalidates_principal_cache(db_session):
+    """Test that profile updates are visible on the next request"""
+    from backend.models.schemas.user import UserUpdate
+    from backend.utils.auth import create_access_token, get_current_user
+
+    user_service = UserService(db_session)
+    user = user_service.create_user(UserCreate(
+        username="renamed",
+        email="renamed@example.com",
+        password="testpassword",
+        first_name="Old",
+        last_name="Name",
+        role="customer"
+    ))
+    token = create_access_token(data={"sub": user.email})
+    assert (await get_current_user(token, db_session)).first_name == "Old"
+
+    user_service.update_user(user.id, UserUpdate(first_name="New"))
+    assert (await get_current_user(token, db_session)).first_name == "New"
+
+@pytest.mark.asyncio
+async def test_get_current_principal_from_claims(db_session, statement_counter):
+    """Test that claim-carrying tokens authenticate without loading the user row"""
+    from backend.utils.auth import create_access_token, build_token_claims, get_current_principal
+
+    user_service = UserService(db_session)
+    user = user_service.create_user(UserCreate(
+        username="claimsuser",
+        email="claims@example.com",
+        password="testpassword",
+        first_name="Claims",
+        last_name="User",
+        role="customer"
+    ))
+    token = create_access_token(data=build_token_claims(user))
+
+    with statement_counter:
+        principal = await get_current_principal(token, db_session)
+        again = await get_current_principal(token, db_session)
+
+    assert principal.id == user.id
+    assert principal.email == user.email
+    assert principal.role == "customer"
+    assert principal.is_guest is False
+    assert again == principal
+    # Revocation is checked against the in-memory registry
+    assert statement_counter.statements == []
+
+@pytest.mark.asyncio
+async def test_get_current_principal_rejects_revoked_token(db_session):
+    """Test that deactivation revokes claim-carrying tokens"""
+    from backend.utils.auth import create_access_token, build_token_claims, get_current_principal
+
+    user_service = UserService(db_session)
+    user = user_service.create_user(UserCreate(
+        username="revoked",
+        email="revoked@example.com",
+        password="testpassword",
+        first_name="Revoked",
+        last_name="User",
+        role="customer"
+    ))
+    token = create_access_token(data=build_token_claims(user))
+    assert await get_current_principal(token, db_session) is not None
+
+    user_service.deactivate_user(user.id)
+    assert await get_current_principal(token, db_session) is None
+
+@pytest.mark.asyncio
+async def test_authenticate_user_async(db_session):
+    """Test authentication with the password verified on the hashing pool"""
+    user_service = UserService(db_session)
+    user = user_service.create_user(UserCreate(
+        username="asyncauth",
+        email="asyncauth@example.com",
+        password="testpassword",
+        first_name="Async",
+        last_name="Auth",
+        role="customer"
+    ))
+
+    authenticated = await user_service.authenticate_user_async("asyncauth@example.com", "testpassword")
+    assert authenticated.id == user.id
+    assert await user_service.authenticate_user_async("asyncauth@example.com", "wrong") is None
+
+@pytest.mark.asyncio
+async def test_password_hash_pool_rejects_when_saturated():
+    """Test that excess hashing work is rejected instead of queued"""
+    import threading
+    from backend.utils.password_hashing import PasswordHashPool, HashingPoolBusy
+
+    pool = PasswordHashPool(workers=1, max_pending=1)
+    release = threading.Event()
+    blocked = asyncio.ensure_future(pool.run(release.wait))
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(HashingPoolBusy):
+        await pool.run(lambda: None)
+    assert pool.stats()["rejected"] == 1
+
+    release.set()
+    await blocked
+    assert pool.stats()["completed"] == 1
+
+def test_token_bucket_refills_and_evicts(monkeypatch):
+    """Test token bucket refill over time and LRU eviction of idle keys"""
+    from backend.utils import rate_limit
+
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    limiter = rate_limit.TokenBucketLimiter(rate=1.0, burst=2, maxsize=2)
+
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") == pytest.approx(1.0)
+    now[0] += 1.0
+    assert limiter.acquire("a") == 0
+
+    limiter.acquire("b")
+    limiter.acquire("c")
+    stats = limiter.stats()
+    assert stats["keys"] == 2
+    assert stats["evictions"] == 1
+    assert stats["blocked"] == 1
+
+def test_decode_access_token_caches_verified_claims():
+    """Test that a verified token is decoded once and served from cache afterwards"""
+    from backend.utils.auth import create_access_token, decode_access_token, verified_token_cache
+
+    token = create_access_token({"sub": "cached@example.com"})
+    assert decode_access_token(token)["sub"] == "cached@example.com"
+    assert decode_access_token(token)["sub"] == "cached@example.com"
+    assert verified_token_cache.stats()["hits"] >= 1
+
+    # Invalid or expired tokens are rejected and never cached
+    size = len(verified_token_cache)
+    assert decode_access_token(token[:-2] + "xx") is None
+    assert decode_access_token(create_access_token({"sub": "old@example.com"}, timedelta(seconds=-1))) is None
+    assert len(verified_token_cache) == size
+
+@pytest.mark.asyncio
+async def test_password_change_revokes_existing_tokens(db_session):
+    """Test that changing the password revokes tokens issued before the change"""
+    from backend.models.schemas.user import UserUpdate
+    from backend.utils.auth import create_access_token, build_token_claims, get_current_principal
+
+    user_service = UserService(db_session)
+    user = user_service.create_user(UserCreate(
+        username="rotated",
+        email="rotated@example.com",
+        password="testpassword",
+        first_name="Rotated",
+        last_name="User",
+        role="customer"
+    ))
+    old_token = create_access_token(data=build_token_claims(user))
+
+    user = user_service.update_user(user.id, UserUpdate(password="newpassword123"))
+    new_token = create_access_token(data=build_token_claims(user))
+
+    assert await get_current_principal(old_token, db_session) is None
+    assert await get_current_principal(new_token, db_session) is not None
+
+def test_revocation_registry_refresh_picks_up_external_writes(db_session):
+    """Test that revocations written by another process arrive through refresh"""
+    from backend.services.revocation_service import TokenRevocationRegistry
+
+    registry = TokenRevocationRegistry(overlap_seconds=1)
+    active = User(username="active", email="active@example.com", password_hash="x",
+                  first_name="A", last_name="User", role="customer")
+    revoked = User(username="revoked", email="revoked@example.com", password_hash="x",
+                   first_name="R", last_name="User", role="customer", token_version=2)
+    db_session.add_all([active, revoked])
+    db_session.commit()
+
+    # Initial load only holds users with revoked tokens
+    assert registry.refresh(db_session) == 1
+    assert registry.is_revoked(revoked.id, 1)
+    assert not registry.is_revoked(revoked.id, 2)
+    assert not registry.is_revoked(active.id, 0)
+
+    # Deactivation by a direct write (bypassing this process's service)
+    active.is_active = False
+    active.updated_at = datetime.utcnow()
+    db_session.commit()
+    registry.refresh(db_session)
+    assert registry.is_revoked(active.id, 0)
+    assert registry.stats()["inactive_users"] == 1
+
+    # A lagging refresh never rolls back a newer version recorded locally
+    registry.record(revoked.id, 5, True)
+    registry.refresh(db_session)
+    assert registry.is_revoked(revoked.id, 4)
+
+def test_revocation_refresh_invalidates_cached_principals(db_session):
+    """Test that a refresh drops principals cached before another process changed the user"""
+    from backend.services.revocation_service import TokenRevocationRegistry
+    from backend.services.user_service import principal_cache, invalidate_principal
+
+    registry = TokenRevocationRegistry(overlap_seconds=1)
+    registry.subscribe(invalidate_principal)
+    user = User(username="cached", email="cached@example.com", password_hash="x",
+                first_name="C", last_name="User", role="customer")
+    db_session.add(user)
+    db_session.commit()
+    registry.refresh(db_session)
+    principal_cache.set("cached@example.com", object())
+
+    user.is_active = False
+    user.updated_at = datetime.utcnow()
+    db_session.commit()
+    registry.refresh(db_session)
+    assert principal_cache.get("cached@example.com") is None
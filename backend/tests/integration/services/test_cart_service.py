@@ -155,6 +155,77 @@ def test_calculate_total(db_session, test_user, sample_menu_item):
     total = service.calculate_total(test_user.id)
     assert total == sample_menu_item.price * 2
 
+def test_cart_totals_follow_every_mutation(db_session, test_user, sample_menu_item):
+    service = CartService(db_session)
+    price = sample_menu_item.price
+
+    cart = service.add_item(test_user.id, CartItemCreate(menu_item_id=sample_menu_item.id, quantity=2))
+    assert cart.item_count == 2
+    assert cart.subtotal == pytest.approx(price * 2)
+
+    item_id = cart.items[0].id
+    cart = service.update_item(test_user.id, item_id, CartItemUpdate(quantity=5))
+    assert cart.item_count == 5
+    assert cart.subtotal == pytest.approx(price * 5)
+
+    cart = service.remove_item(test_user.id, item_id)
+    assert cart.item_count == 0
+    assert cart.subtotal == 0
+
+    service.add_item(test_user.id, CartItemCreate(menu_item_id=sample_menu_item.id, quantity=1))
+    cart = service.clear_cart(test_user.id)
+    assert cart.item_count == 0
+    assert service.calculate_total(test_user.id) == 0
+
+def test_calculate_total_is_single_query(db_session, test_user, sample_menu_item, statement_counter):
+    service = CartService(db_session)
+    service.add_item(test_user.id, CartItemCreate(menu_item_id=sample_menu_item.id, quantity=3))
+    user_id, price = test_user.id, sample_menu_item.price
+
+    with statement_counter:
+        total = service.calculate_total(user_id)
+
+    assert total == pytest.approx(price * 3)
+    assert len(statement_counter.statements) == 1
+
+def test_menu_price_change_updates_cart_subtotals(db_session, test_user, sample_menu_item):
+    from backend.services.menu_service import MenuService
+    from backend.models.schemas.menu import MenuItemUpdate
+
+    service = CartService(db_session)
+    service.add_item(test_user.id, CartItemCreate(menu_item_id=sample_menu_item.id, quantity=2))
+
+    MenuService.update_menu_item(db_session, sample_menu_item.id, MenuItemUpdate(price=12.5))
+    assert service.calculate_total(test_user.id) == pytest.approx(25.0)
+
+@pytest.mark.parametrize("lines", [1, 8])
+def test_cart_render_takes_two_queries(db_session, test_user, cart_with_lines, statement_counter, lines):
+    user_id = test_user.id
+    cart_with_lines(user_id, lines)
+    db_session.expunge_all()
+    service = CartService(db_session)
+
+    assert statement_counter.count(lambda: service.get_or_create_cart(user_id).to_dict()) <= 2
+
+def test_cart_mutation_query_count_is_constant(db_session, test_user, cart_with_lines, statement_counter):
+    from backend.models.orm.user import User
+
+    service = CartService(db_session)
+    counts = []
+    for lines in (1, 8):
+        user = User(username=f"lines{lines}", email=f"lines{lines}@example.com", password_hash="x",
+                    first_name="Lines", last_name="User", role="customer")
+        db_session.add(user)
+        db_session.commit()
+        user_id = user.id
+        item_id = cart_with_lines(user_id, lines).items[0].id
+        db_session.expunge_all()
+
+        counts.append(statement_counter.count(lambda: service.update_item(
+            user_id, item_id, CartItemUpdate(quantity=3)
+        ).to_dict()))
+    assert counts[0] == counts[1]
+
 def test_database_error_handling(db_session, test_user):
     service = CartService(db_session)
     
@@ -165,3 +236,111 @@ def test_database_error_handling(db_session, test_user):
     
     with pytest.raises(SQLAlchemyError):
         service.get_or_create_cart(test_user.id)
+
+def test_concurrent_adds_do_not_lose_updates(db_session, test_user, sample_menu_item):
+    import threading
+    from sqlalchemy.orm import sessionmaker
+    from backend.models.orm.shopping_cart import ShoppingCart, CartItem
+
+    Session = sessionmaker(bind=db_session.get_bind())
+    user_id, menu_item_id = test_user.id, sample_menu_item.id
+    threads, adds_per_thread = 8, 10
+    errors = []
+
+    def worker():
+        session = Session()
+        try:
+            service = CartService(session)
+            for _ in range(adds_per_thread):
+                service.add_item(user_id, CartItemCreate(menu_item_id=menu_item_id, quantity=1))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            session.close()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+
+    assert errors == []
+    db_session.expire_all()
+    assert db_session.query(ShoppingCart).filter_by(user_id=user_id).count() == 1
+    lines = db_session.query(CartItem).filter_by(menu_item_id=menu_item_id).all()
+    assert len(lines) == 1
+    assert lines[0].quantity == threads * adds_per_thread
+    assert CartService(db_session).calculate_total(user_id) == pytest.approx(
+        sample_menu_item.price * threads * adds_per_thread
+    )
+
+def test_version_compare_and_swap(db_session, test_user, sample_menu_item):
+    from backend.services.cart_service import CartVersionConflict
+
+    service = CartService(db_session)
+    cart = service.add_item(test_user.id, CartItemCreate(menu_item_id=sample_menu_item.id, quantity=1))
+    version, item_id = cart.version, cart.items[0].id
+
+    cart = service.update_item(test_user.id, item_id, CartItemUpdate(quantity=2), expected_version=version)
+    assert cart.version == version + 1
+
+    with pytest.raises(CartVersionConflict):
+        service.update_item(test_user.id, item_id, CartItemUpdate(quantity=5), expected_version=version)
+    with pytest.raises(CartVersionConflict):
+        service.add_item(test_user.id, CartItemCreate(menu_item_id=sample_menu_item.id, quantity=1),
+                         expected_version=version)
+    assert service.get_or_create_cart(test_user.id).items[0].quantity == 2
+
+def _priced_item(db_session, menu_item):
+    menu_item.customization_options = {"size": ["small", "large"], "extras": ["cheese", "bacon"]}
+    menu_item.customization_prices = {"size": {"large": 2.0}, "extras": {"cheese": 0.5, "bacon": 1.5}}
+    db_session.commit()
+    return menu_item.id, menu_item.price
+
+def test_customizations_are_validated_and_priced(db_session, test_user, sample_menu_item):
+    menu_item_id, price = _priced_item(db_session, sample_menu_item)
+    service = CartService(db_session)
+
+    cart = service.add_item(test_user.id, CartItemCreate(
+        menu_item_id=menu_item_id, quantity=2,
+        customizations={"size": "large", "extras": ["cheese", "bacon"], "notes": "well done"}
+    ))
+    assert cart.items[0].price_delta == pytest.approx(4.0)
+    assert service.calculate_total(test_user.id) == pytest.approx((price + 4.0) * 2)
+
+    cart = service.update_item(test_user.id, cart.items[0].id, CartItemUpdate(customizations={"size": "small"}))
+    assert cart.items[0].price_delta == 0.0
+    assert service.calculate_total(test_user.id) == pytest.approx(price * 2)
+
+    with pytest.raises(ValueError, match="Invalid value 'huge'"):
+        service.add_item(test_user.id, CartItemCreate(
+            menu_item_id=menu_item_id, quantity=1, customizations={"size": "huge"}
+        ))
+    with pytest.raises(ValueError, match="Invalid customization option"):
+        service.update_item(test_user.id, cart.items[0].id, CartItemUpdate(customizations={"sauce": "bbq"}))
+    assert service.get_or_create_cart(test_user.id).items[0].quantity == 2
+
+def test_compiled_options_are_reused_until_menu_item_changes(db_session, test_user, sample_menu_item):
+    from backend.services.menu_service import MenuService
+    from backend.services.pricing_service import pricing_engine
+    from backend.models.schemas.menu import MenuItemUpdate
+
+    menu_item_id, price = _priced_item(db_session, sample_menu_item)
+    service = CartService(db_session)
+    pricing_engine.clear()
+    compilations = pricing_engine.compilations
+    for _ in range(3):
+        service.add_item(test_user.id, CartItemCreate(
+            menu_item_id=menu_item_id, quantity=1, customizations={"size": "large"}
+        ))
+    assert pricing_engine.compilations == compilations + 1
+
+    # Repricing an option updates the lines already holding it
+    MenuService.update_menu_item(db_session, menu_item_id, MenuItemUpdate(
+        customization_prices={"size": {"large": 3.0}}
+    ))
+    assert service.calculate_total(test_user.id) == pytest.approx((price + 3.0) * 3)
+    service.add_item(test_user.id, CartItemCreate(
+        menu_item_id=menu_item_id, quantity=1, customizations={"size": "large"}
+    ))
+    assert service.calculate_total(test_user.id) == pytest.approx((price + 3.0) * 4)
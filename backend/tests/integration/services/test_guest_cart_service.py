@@ -0,0 +1,175 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from backend.services.guest_cart_service import GuestCartService, GuestCartStore
+from backend.services.cart_service import CartService
+from backend.models.schemas.cart import CartItemCreate, CartItemUpdate
+from backend.models.orm.shopping_cart import CartItem
+from backend.models.orm.user import User
+
+def _guest(db_session: Session, name: str = "guest") -> int:
+    user = User(username=name, email=f"{name}@example.com", password_hash="!guest",
+                first_name="Guest", last_name="User", role="customer", is_guest=True)
+    db_session.add(user)
+    db_session.commit()
+    return user.id
+
+def test_guest_mutations_stay_in_memory_until_flush(db_session: Session, sample_menu_item, statement_counter):
+    store = GuestCartStore(maxsize=10, enabled=True)
+    service = GuestCartService(db_session, store)
+    user_id, menu_item_id, price = _guest(db_session), sample_menu_item.id, sample_menu_item.price
+    service.get_or_create_cart(user_id)
+
+    with statement_counter:
+        cart = service.add_item(user_id, CartItemCreate(menu_item_id=menu_item_id, quantity=2))
+    assert statement_counter.writes == []
+    temp_id = cart.items[0].id
+    assert temp_id < 0
+    assert cart.subtotal == pytest.approx(price * 2)
+    assert db_session.query(CartItem).count() == 0
+
+    assert store.flush(db_session) == 1
+    line = db_session.query(CartItem).one()
+    assert line.quantity == 2
+    assert cart.items[0].id == line.id
+
+    # Clients holding the temporary id can still address the line
+    service.update_item(user_id, temp_id, CartItemUpdate(quantity=4))
+    store.flush(db_session)
+    db_session.expire_all()
+    assert db_session.query(CartItem).one().quantity == 4
+    assert CartService(db_session).calculate_total(user_id) == pytest.approx(price * 4)
+    assert CartService(db_session).get_or_create_cart(user_id).version == cart.version
+
+def test_flush_coalesces_changes_and_removes_lines(db_session: Session, sample_menu_item):
+    store = GuestCartStore(maxsize=10, enabled=True)
+    service = GuestCartService(db_session, store)
+    user_id, menu_item_id = _guest(db_session), sample_menu_item.id
+
+    for _ in range(5):
+        service.add_item(user_id, CartItemCreate(menu_item_id=menu_item_id, quantity=1))
+    store.flush(db_session)
+    assert db_session.query(CartItem).one().quantity == 5
+
+    service.clear_cart(user_id)
+    store.flush(db_session)
+    assert db_session.query(CartItem).count() == 0
+    assert store.flush(db_session) == 0
+
+def test_eviction_flushes_dirty_cart(db_session: Session, sample_menu_item):
+    store = GuestCartStore(maxsize=1, enabled=True)
+    service = GuestCartService(db_session, store)
+    first, second = _guest(db_session, "first"), _guest(db_session, "second")
+    menu_item_id = sample_menu_item.id
+
+    service.add_item(first, CartItemCreate(menu_item_id=menu_item_id, quantity=3))
+    service.get_or_create_cart(second)
+
+    assert store.stats()["evictions"] == 1
+    assert store.stats()["dirty"] == 0
+    db_session.expire_all()
+    assert db_session.query(CartItem).one().quantity == 3
+
+def test_guest_cart_api_uses_store_when_enabled(client, db_session: Session, sample_menu_item, monkeypatch):
+    from backend.services.guest_cart_service import guest_cart_store
+
+    monkeypatch.setattr(guest_cart_store, "enabled", True)
+    login = client.post("/api/users/guest-login").json()
+    headers = {"Authorization": f"Bearer {login['access_token']}"}
+
+    response = client.post("/api/cart/items", headers=headers,
+                           json={"menu_item_id": sample_menu_item.id, "quantity": 2})
+    assert response.status_code == 200
+    assert response.json()["item_count"] == 2
+    assert client.get("/api/cart/total", headers=headers).json() == pytest.approx(sample_menu_item.price * 2)
+    assert db_session.query(CartItem).count() == 0
+
+    guest_cart_store.flush(db_session)
+    assert db_session.query(CartItem).count() == 1
+
+def test_guest_lines_carry_customization_prices(db_session: Session, sample_menu_item):
+    sample_menu_item.customization_options = {"size": ["small", "large"]}
+    sample_menu_item.customization_prices = {"size": {"large": 2.0}}
+    db_session.commit()
+    store = GuestCartStore(maxsize=10, enabled=True)
+    service = GuestCartService(db_session, store)
+    user_id, menu_item_id, price = _guest(db_session), sample_menu_item.id, sample_menu_item.price
+
+    cart = service.add_item(user_id, CartItemCreate(menu_item_id=menu_item_id, quantity=2,
+                                                    customizations={"size": "large"}))
+    assert cart.subtotal == pytest.approx((price + 2.0) * 2)
+    with pytest.raises(ValueError):
+        service.update_item(user_id, cart.items[0].id, CartItemUpdate(customizations={"size": "huge"}))
+
+    store.flush(db_session)
+    assert CartService(db_session).calculate_total(user_id) == pytest.approx(cart.subtotal)
+
+def test_menu_update_reprices_held_guest_carts(db_session: Session, sample_menu_item):
+    from backend.services.guest_cart_service import guest_cart_store
+    from backend.services.menu_service import MenuService
+    from backend.models.schemas.menu import MenuItemUpdate
+
+    sample_menu_item.customization_options = {"size": ["small", "large"]}
+    sample_menu_item.customization_prices = {"size": {"large": 2.0}}
+    db_session.commit()
+    service = GuestCartService(db_session, guest_cart_store)
+    user_id, menu_item_id = _guest(db_session), sample_menu_item.id
+    cart = service.add_item(user_id, CartItemCreate(menu_item_id=menu_item_id, quantity=2,
+                                                    customizations={"size": "large"}))
+    guest_cart_store.flush(db_session)
+    version = cart.version
+
+    MenuService.update_menu_item(db_session, menu_item_id, MenuItemUpdate(
+        price=20.0, customization_prices={"size": {"large": 3.0}}
+    ))
+
+    assert cart.subtotal == pytest.approx(23.0 * 2)
+    assert cart.version == version + 1
+    assert guest_cart_store.flush(db_session) == 1
+    db_session.expire_all()
+    line = db_session.query(CartItem).one()
+    assert line.price_delta == pytest.approx(3.0)
+    assert CartService(db_session).calculate_total(user_id) == pytest.approx(23.0 * 2)
+
+def test_failed_flush_keeps_cart_dirty(db_session: Session, sample_menu_item, monkeypatch):
+    from sqlalchemy.exc import OperationalError
+
+    store = GuestCartStore(maxsize=10, enabled=True)
+    service = GuestCartService(db_session, store)
+    user_id = _guest(db_session)
+    service.add_item(user_id, CartItemCreate(menu_item_id=sample_menu_item.id, quantity=2))
+
+    def fail():
+        raise OperationalError("COMMIT", {}, Exception("disk I/O error"))
+    with monkeypatch.context() as patch:
+        patch.setattr(db_session, "commit", fail)
+        with pytest.raises(OperationalError):
+            store.flush(db_session)
+
+    assert store.stats()["dirty"] == 1
+    assert db_session.query(CartItem).count() == 0
+    assert store.flush(db_session) == 1
+    assert db_session.query(CartItem).one().quantity == 2
+    assert store.stats()["dirty"] == 0
+
+def test_apply_batch_restores_cart_on_unexpected_error(db_session: Session, sample_menu_item, monkeypatch):
+    from backend.models.schemas.cart import CartOperation
+
+    store = GuestCartStore(maxsize=10, enabled=True)
+    service = GuestCartService(db_session, store)
+    user_id = _guest(db_session)
+    cart = service.add_item(user_id, CartItemCreate(menu_item_id=sample_menu_item.id, quantity=2))
+    line_id, version = cart.items[0].id, cart.version
+
+    def fail(*args):
+        raise RuntimeError("pricing unavailable")
+    monkeypatch.setattr(service, "_add_line", fail)
+    with pytest.raises(RuntimeError):
+        service.apply_batch(user_id, [
+            CartOperation(op="update", item_id=line_id, quantity=5),
+            CartOperation(op="add", menu_item_id=sample_menu_item.id, quantity=1),
+        ])
+
+    cart = service.get_or_create_cart(user_id)
+    assert [(line.id, line.quantity) for line in cart.items] == [(line_id, 2)]
+    assert cart.version == version
@@ -0,0 +1,120 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from backend.services.cart_service import CartService
+from backend.services.kitchen_service import KitchenLine, KitchenQueue, KitchenService, kitchen_queue
+from backend.services.order_service import OrderService
+from backend.models.schemas.cart import CartItemCreate
+from backend.models.orm.order import Order
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def _line(menu_item_id: int, prep: float, quantity: int = 1, station: int = 1) -> KitchenLine:
+    return KitchenLine(menu_item_id, f"Item {menu_item_id}", quantity, prep, station)
+
+def test_shortest_prep_first_with_aging():
+    clock = _Clock()
+    queue = KitchenQueue(cooks=1, aging=0.5, batch_size=1, clock=clock)
+    queue.submit(1, [_line(1, 20)])
+    clock.now = 60
+    queue.submit(2, [_line(2, 5)])
+
+    # The short dish jumps the long one that has only waited a minute
+    assert queue.start_next().order_ids == [2]
+    assert queue.start_next() is None  # the only cook is busy
+    assert queue.complete(1) == [2]
+
+    # After waiting long enough the long dish outranks a newly arrived short one
+    clock.now = 60 * 60
+    queue.submit(3, [_line(3, 5)])
+    assert queue.start_next().order_ids == [1]
+
+def test_same_item_tickets_are_batched():
+    clock = _Clock()
+    queue = KitchenQueue(cooks=2, batch_size=3, clock=clock)
+    queue.submit(1, [_line(7, 8), _line(9, 4)])
+    queue.submit(2, [_line(7, 8, quantity=2)])
+    queue.submit(3, [_line(7, 8)])
+
+    assert queue.start_next().menu_item_id == 9
+    batch = queue.start_next()
+    # Item 7 for orders 1 and 2 fills the batch; order 3 waits for the next one
+    assert batch.menu_item_id == 7
+    assert batch.order_ids == [1, 2]
+    assert sum(ticket.quantity for ticket in batch.tickets) == 3
+    assert queue.snapshot()["depth"] == 1
+
+    with pytest.raises(ValueError):
+        queue.complete(99)
+
+def test_fifo_policy_serves_arrival_order():
+    clock = _Clock()
+    queue = KitchenQueue(cooks=1, policy="fifo", clock=clock)
+    queue.submit(1, [_line(1, 20)])
+    queue.submit(2, [_line(1, 5)])
+    batch = queue.start_next()
+    assert batch.order_ids == [1]
+    assert len(batch.tickets) == 1
+
+def test_etas_and_station_backlog_follow_the_schedule():
+    clock = _Clock()
+    queue = KitchenQueue(cooks=1, batch_size=1, clock=clock)
+    queue.submit(1, [_line(1, 10, station=1), _line(2, 5, station=2)])
+    queue.submit(2, [_line(3, 2, station=2)])
+
+    assert queue.outstanding_minutes() == {1: 10, 2: 7}
+    # One cook: 2 min, then 5 min, then 10 min
+    assert queue.order_etas() == {2: 120, 1: 17 * 60}
+
+    batch = queue.start_next()
+    clock.now = 60
+    assert queue.order_eta(2) == 60
+    assert queue.complete(batch.id) == [2]
+    assert queue.outstanding_minutes() == {1: 10, 2: 5}
+    assert queue.snapshot()["orders"] == {"1": 15 * 60.0}
+
+def test_tickets_larger_than_a_batch_take_several_rounds():
+    clock = _Clock()
+    queue = KitchenQueue(cooks=1, batch_size=2, clock=clock)
+    queue.submit(1, [_line(1, 10, quantity=5)])
+
+    # Five units at two per round is three rounds of ten minutes
+    assert queue.outstanding_minutes() == {1: 30}
+    assert queue.order_etas() == {1: 30 * 60}
+    batch = queue.start_next()
+    assert batch.prep_minutes == 30
+    assert batch.ready_at == 30 * 60
+    assert queue.snapshot()["orders"] == {"1": 30 * 60.0}
+
+def test_checkout_feeds_kitchen_and_tracks_order_status(db_session: Session, test_user, sample_menu_item):
+    user_id = test_user.id
+    CartService(db_session).add_item(user_id, CartItemCreate(menu_item_id=sample_menu_item.id, quantity=2))
+    order, _ = OrderService(db_session).checkout(user_id)
+    order_id = order.id
+
+    assert kitchen_queue.snapshot()["depth"] == 1
+    assert order_id in kitchen_queue.order_etas()
+
+    service = KitchenService(db_session)
+    batch = service.start_next()
+    assert batch.order_ids == [order_id]
+    assert db_session.get(Order, order_id).status == "preparing"
+
+    assert service.complete(batch.id) == [order_id]
+    db_session.expire_all()
+    assert db_session.get(Order, order_id).status == "ready"
+    assert kitchen_queue.order_etas() == {}
+
+def test_restore_requeues_open_orders(db_session: Session, test_user, sample_menu_item):
+    user_id = test_user.id
+    CartService(db_session).add_item(user_id, CartItemCreate(menu_item_id=sample_menu_item.id, quantity=1))
+    order_id = OrderService(db_session).checkout(user_id)[0].id
+    kitchen_queue.clear()
+
+    assert KitchenService(db_session).restore() == 1
+    assert list(kitchen_queue.order_etas()) == [order_id]
@@ -0,0 +1,172 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+
+from backend.services.maintenance_service import MaintenanceService
+from backend.services.user_service import principal_cache
+from backend.models.orm.user import User
+from backend.models.orm.shopping_cart import ShoppingCart, CartItem
+from backend.models.orm.rating import MenuItemRating
+
+def _make_user(db_session: Session, name: str, is_guest: bool, age: timedelta) -> User:
+    user = User(
+        username=name,
+        email=f"{name}@example.com",
+        password_hash="!guest" if is_guest else "hashed_password",
+        first_name="Test",
+        last_name="User",
+        role="customer",
+        is_guest=is_guest,
+        created_at=datetime.utcnow() - age
+    )
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+@pytest.fixture
+def maintenance_service(db_session: Session) -> MaintenanceService:
+    return MaintenanceService(db_session)
+
+def test_purge_stale_guests_removes_dependent_rows(db_session: Session, maintenance_service: MaintenanceService, sample_menu_item):
+    stale = _make_user(db_session, "stale_guest", True, timedelta(days=2))
+    cart = ShoppingCart(user_id=stale.id)
+    db_session.add(cart)
+    db_session.commit()
+    db_session.add(CartItem(cart_id=cart.id, menu_item_id=sample_menu_item.id, quantity=2))
+    db_session.add(MenuItemRating(user_id=stale.id, menu_item_id=sample_menu_item.id, rating=4))
+    db_session.commit()
+    stale_id = stale.id
+    principal_cache.set(stale.email, object())
+
+    report = maintenance_service.purge_stale_guests(max_age=timedelta(hours=24))
+
+    assert report["users"] == 1
+    assert report["shopping_carts"] == 1
+    assert report["cart_items"] == 1
+    assert report["menu_item_ratings"] == 1
+    assert db_session.get(User, stale_id) is None
+    assert db_session.query(CartItem).count() == 0
+    assert principal_cache.get("stale_guest@example.com") is None
+
+def test_purge_stale_guests_releases_rating_stats(db_session: Session, maintenance_service: MaintenanceService, sample_menu_item):
+    from backend.services.rating_service import RatingService
+    from backend.models.schemas.rating import MenuItemRatingCreate
+
+    stale = _make_user(db_session, "stale_guest", True, timedelta(days=2))
+    member = _make_user(db_session, "member", False, timedelta(days=2))
+    service = RatingService(db_session)
+    menu_item_id = sample_menu_item.id
+    service.create_menu_item_rating(MenuItemRatingCreate(menu_item_id=menu_item_id, rating=1), stale.id)
+    service.create_menu_item_rating(MenuItemRatingCreate(menu_item_id=menu_item_id, rating=5), member.id)
+
+    maintenance_service.purge_stale_guests(max_age=timedelta(hours=24))
+
+    stats = service.get_menu_item_rating_stats(menu_item_id)
+    assert (stats["total"], stats["average"]) == (1, 5.0)
+    assert stats["distribution"][1] == 0
+
+def test_purge_stale_guests_keeps_guests_with_orders(db_session: Session, maintenance_service: MaintenanceService, sample_menu_item):
+    from backend.models.orm.order import Order, OrderItem
+
+    ordered = _make_user(db_session, "ordered_guest", True, timedelta(days=2))
+    _make_user(db_session, "idle_guest", True, timedelta(days=2))
+    order = Order(user_id=ordered.id, subtotal=sample_menu_item.price, item_count=1)
+    db_session.add(order)
+    db_session.commit()
+    db_session.add(OrderItem(order_id=order.id, menu_item_id=sample_menu_item.id, name=sample_menu_item.name,
+                             quantity=1, unit_price=sample_menu_item.price))
+    db_session.commit()
+    ordered_id = ordered.id
+
+    report = maintenance_service.purge_stale_guests(max_age=timedelta(hours=24))
+
+    assert report["users"] == 1
+    assert "orders" not in report
+    assert db_session.get(User, ordered_id) is not None
+    assert db_session.query(Order).filter(Order.user_id == ordered_id).count() == 1
+    assert db_session.query(OrderItem).count() == 1
+
+    # A guest who checks out between being selected and deleted is kept too
+    assert maintenance_service._delete_users([ordered_id])["users"] == 0
+
+def test_purge_stale_guests_keeps_recent_guests_and_members(db_session: Session, maintenance_service: MaintenanceService):
+    _make_user(db_session, "fresh_guest", True, timedelta(hours=1))
+    _make_user(db_session, "old_member", False, timedelta(days=30))
+
+    report = maintenance_service.purge_stale_guests(max_age=timedelta(hours=24))
+
+    assert report["users"] == 0
+    assert report["batches"] == []
+    assert db_session.query(User).count() == 2
+
+def test_purge_stale_guests_in_batches(db_session: Session, maintenance_service: MaintenanceService):
+    for i in range(5):
+        _make_user(db_session, f"guest_{i}", True, timedelta(days=3))
+
+    report = maintenance_service.purge_stale_guests(max_age=timedelta(hours=24), batch_size=2)
+
+    assert report["users"] == 5
+    assert [batch["rows"] for batch in report["batches"]] == [2, 2, 1]
+    assert db_session.query(User).count() == 0
+
+def test_purge_stale_guests_respects_max_batches(db_session: Session, maintenance_service: MaintenanceService):
+    for i in range(5):
+        _make_user(db_session, f"guest_{i}", True, timedelta(days=3))
+
+    report = maintenance_service.purge_stale_guests(max_age=timedelta(hours=24), batch_size=2, max_batches=1)
+
+    assert report["users"] == 2
+    assert db_session.query(User).count() == 3
+
+def _make_cart(db_session: Session, user: User, menu_item_id: int, age: timedelta) -> int:
+    cart = ShoppingCart(user_id=user.id)
+    db_session.add(cart)
+    db_session.commit()
+    db_session.add(CartItem(cart_id=cart.id, menu_item_id=menu_item_id, quantity=1))
+    db_session.commit()
+    cart.updated_at = datetime.utcnow() - age
+    db_session.commit()
+    return cart.id
+
+def test_sweep_abandoned_carts_in_batches(db_session: Session, maintenance_service: MaintenanceService, sample_menu_item):
+    menu_item_id = sample_menu_item.id
+    stale_ids = [
+        _make_cart(db_session, _make_user(db_session, f"idle_{i}", False, timedelta(days=60)),
+                   menu_item_id, timedelta(days=45))
+        for i in range(5)
+    ]
+    active_id = _make_cart(db_session, _make_user(db_session, "active", False, timedelta(days=60)),
+                           menu_item_id, timedelta(hours=1))
+
+    report = maintenance_service.sweep_abandoned_carts(max_age=timedelta(days=30), batch_size=2)
+
+    assert report["shopping_carts"] == 5
+    assert report["cart_items"] == 5
+    assert len(report["batches"]) == 3
+    remaining = [cart_id for (cart_id,) in db_session.query(ShoppingCart.id)]
+    assert remaining == [active_id]
+    assert db_session.query(CartItem).filter(CartItem.cart_id.in_(stale_ids)).count() == 0
+    # Users are kept; only their carts go
+    assert db_session.query(User).count() == 6
+
+def test_compact_database_reclaims_free_pages(tmp_path):
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import sessionmaker
+
+    engine = create_engine(f"sqlite:///{tmp_path}/compact.db")
+    with engine.begin() as conn:
+        conn.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+        conn.execute(text("CREATE TABLE blobs (id INTEGER PRIMARY KEY, data BLOB)"))
+        conn.execute(text("INSERT INTO blobs (data) VALUES (zeroblob(100000))"))
+        conn.execute(text("DELETE FROM blobs"))
+
+    db = sessionmaker(bind=engine)()
+    try:
+        report = MaintenanceService(db).compact_database(pages=0)
+    finally:
+        db.close()
+        engine.dispose()
+
+    assert report["mode"] == "incremental"
+    assert report["freed_pages"] > 0
+    assert report["free_pages"] == 0
@@ -0,0 +1,106 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from backend.services.cart_service import CartService, CartVersionConflict
+from backend.services.order_service import OrderService
+from backend.models.schemas.cart import CartItemCreate
+from backend.models.orm.order import Order, OrderItem
+
+def _fill(db_session: Session, user_id: int, menu_item_id: int, quantity: int = 2):
+    return CartService(db_session).add_item(user_id, CartItemCreate(menu_item_id=menu_item_id, quantity=quantity))
+
+def test_checkout_snapshots_prices_and_empties_cart(db_session: Session, test_user, sample_menu_item):
+    from backend.services.menu_service import MenuService
+    from backend.models.schemas.menu import MenuItemUpdate
+
+    user_id, menu_item_id, price = test_user.id, sample_menu_item.id, sample_menu_item.price
+    version = _fill(db_session, user_id, menu_item_id).version
+
+    order, created = OrderService(db_session).checkout(user_id)
+
+    assert created
+    assert order.status == "placed"
+    assert order.item_count == 2
+    assert order.subtotal == pytest.approx(price * 2)
+    assert [(line.menu_item_id, line.quantity, line.unit_price) for line in order.items] == [(menu_item_id, 2, price)]
+    cart = CartService(db_session).get_or_create_cart(user_id)
+    assert cart.items == []
+    assert cart.subtotal == 0.0
+    assert cart.version == version + 1
+
+    # Later menu edits do not touch placed orders
+    MenuService.update_menu_item(db_session, menu_item_id, MenuItemUpdate(price=price + 5))
+    assert OrderService(db_session).get_order(user_id, order.id).items[0].line_total == pytest.approx(price * 2)
+
+def test_checkout_replays_idempotency_key(db_session: Session, test_user, sample_menu_item):
+    user_id, menu_item_id = test_user.id, sample_menu_item.id
+    service = OrderService(db_session)
+    _fill(db_session, user_id, menu_item_id)
+
+    order, created = service.checkout(user_id, idempotency_key="abc")
+    replay, replayed_created = service.checkout(user_id, idempotency_key="abc")
+
+    assert created and not replayed_created
+    assert replay.id == order.id
+    assert db_session.query(Order).count() == 1
+    # The key is per user, and a fresh key needs a non-empty cart
+    with pytest.raises(ValueError, match="Cart is empty"):
+        service.checkout(user_id, idempotency_key="def")
+
+def test_checkout_rejects_stale_cart_version(db_session: Session, test_user, sample_menu_item):
+    user_id = test_user.id
+    version = _fill(db_session, user_id, sample_menu_item.id).version
+
+    with pytest.raises(CartVersionConflict):
+        OrderService(db_session).checkout(user_id, expected_version=version - 1)
+    assert db_session.query(Order).count() == 0
+    assert len(CartService(db_session).get_or_create_cart(user_id).items) == 1
+
+def test_checkout_inserts_order_lines_with_executemany(db_session: Session, test_user, sample_category, statement_counter):
+    from backend.models.orm.menu import MenuItem
+
+    user_id = test_user.id
+    items = [MenuItem(name=f"Dish {i}", price=5.0 + i, category_id=sample_category.id) for i in range(6)]
+    db_session.add_all(items)
+    db_session.commit()
+    for item in items:
+        _fill(db_session, user_id, item.id, quantity=1)
+
+    with statement_counter:
+        order, _ = OrderService(db_session).checkout(user_id)
+
+    inserts = [statement for statement in statement_counter.statements if statement.startswith("INSERT INTO order_items")]
+    # All six lines go in one executemany call
+    assert len(inserts) == 1
+    assert inserts[0] in statement_counter.executemany
+    assert len(order.items) == 6
+    assert order.subtotal == pytest.approx(sum(5.0 + i for i in range(6)))
+
+def test_concurrent_checkouts_place_one_order(db_session: Session, test_user, sample_menu_item):
+    import threading
+    from sqlalchemy.orm import sessionmaker
+
+    Session = sessionmaker(bind=db_session.get_bind())
+    user_id = test_user.id
+    _fill(db_session, user_id, sample_menu_item.id)
+    results, errors = [], []
+
+    def worker(key):
+        session = Session()
+        try:
+            results.append(OrderService(session).checkout(user_id, idempotency_key=key)[0].id)
+        except (ValueError, CartVersionConflict) as e:
+            errors.append(e)
+        finally:
+            session.close()
+
+    workers = [threading.Thread(target=worker, args=(f"key-{i}",)) for i in range(6)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+
+    assert len(results) == 1
+    assert len(errors) == 5
+    assert db_session.query(Order).count() == 1
+    assert db_session.query(OrderItem).count() == 1
@@ -145,3 +145,106 @@ def test_get_recent_feedback(db_session: Session, rating_service: RatingService,
     recent_feedback = rating_service.get_recent_feedback(limit=1)
     assert len(recent_feedback) == 1
     assert recent_feedback[0].feedback_text == "Recent feedback"
+
+def test_menu_item_rating_stats_follow_writes(db_session: Session, rating_service: RatingService, test_user: User, sample_menu_item):
+    from backend.models.schemas.rating import MenuItemRatingCreate
+
+    other = User(username="other", email="other@example.com", password_hash="hashedpass123",
+                 first_name="Other", last_name="User", role="customer")
+    db_session.add(other)
+    db_session.commit()
+    user_id, other_id, menu_item_id = test_user.id, other.id, sample_menu_item.id
+
+    rating_service.create_menu_item_rating(MenuItemRatingCreate(menu_item_id=menu_item_id, rating=4), user_id)
+    rating_service.create_menu_item_rating(MenuItemRatingCreate(menu_item_id=menu_item_id, rating=1), other_id)
+    with pytest.raises(ValueError):
+        rating_service.create_menu_item_rating(MenuItemRatingCreate(menu_item_id=menu_item_id, rating=5), user_id)
+
+    stats = rating_service.get_menu_item_rating_stats(menu_item_id)
+    assert (stats["total"], stats["average"]) == (2, 2.5)
+    assert stats["distribution"] == {1: 1, 2: 0, 3: 0, 4: 1, 5: 0}
+
+    rating_service.update_menu_item_rating(user_id, menu_item_id, MenuItemRatingCreate(menu_item_id=menu_item_id, rating=5))
+    assert rating_service.delete_menu_item_rating(other_id, menu_item_id)
+    stats = rating_service.get_menu_item_rating_stats(menu_item_id)
+    assert (stats["total"], stats["average"]) == (1, 5.0)
+    assert stats["distribution"] == {1: 0, 2: 0, 3: 0, 4: 0, 5: 1}
+    assert rating_service.get_menu_item_average_rating(menu_item_id) == {"average_rating": 5.0, "total_ratings": 1}
+    assert rating_service.get_menu_items_average_ratings([menu_item_id, 999]) == {
+        menu_item_id: {"average_rating": 5.0, "total_ratings": 1}
+    }
+
+def test_upsert_menu_item_rating(db_session: Session, rating_service: RatingService, test_user: User, sample_menu_item,
+                                 statement_counter):
+    from backend.models.schemas.rating import MenuItemRatingCreate
+
+    user_id, menu_item_id = test_user.id, sample_menu_item.id
+    rating, created = rating_service.upsert_menu_item_rating(
+        user_id, menu_item_id, MenuItemRatingCreate(menu_item_id=menu_item_id, rating=2, comment="Bland")
+    )
+    assert created
+    rating_id = rating.id
+
+    with statement_counter:
+        rating, created = rating_service.upsert_menu_item_rating(
+            user_id, menu_item_id, MenuItemRatingCreate(menu_item_id=menu_item_id, rating=5, comment="Better now")
+        )
+    statements = statement_counter.statements
+
+    assert not created
+    assert (rating.id, rating.rating, rating.comment) == (rating_id, 5, "Better now")
+    # Release the old stars, check for a previous rating under the write lock,
+    # upsert the row, add the new stars
+    assert len(statements) == 4
+    assert statements[0].lstrip().upper().startswith("UPDATE")
+    assert [s for s in statements if s.lstrip().upper().startswith("SELECT")] == [statements[1]]
+    stats = rating_service.get_menu_item_rating_stats(menu_item_id)
+    assert (stats["total"], stats["average"]) == (1, 5.0)
+    assert stats["distribution"] == {1: 0, 2: 0, 3: 0, 4: 0, 5: 1}
+
+def test_upsert_rating_without_stats_row_is_not_a_creation(db_session: Session, rating_service: RatingService,
+                                                          test_user: User, sample_menu_item):
+    from backend.models.orm.rating import MenuItemRatingStats
+    from backend.models.schemas.rating import MenuItemRatingCreate
+
+    menu_item_id = sample_menu_item.id
+    rating_service.upsert_menu_item_rating(test_user.id, menu_item_id, MenuItemRatingCreate(menu_item_id=menu_item_id, rating=2))
+    # As for items rated before the stats table was backfilled
+    db_session.query(MenuItemRatingStats).delete()
+    db_session.commit()
+
+    rating, created = rating_service.upsert_menu_item_rating(
+        test_user.id, menu_item_id, MenuItemRatingCreate(menu_item_id=menu_item_id, rating=4)
+    )
+    assert not created
+    assert rating.rating == 4
+
+def test_upsert_rating_for_missing_menu_item(db_session: Session, rating_service: RatingService, test_user: User):
+    from backend.models.orm.rating import MenuItemRating, MenuItemRatingStats
+    from backend.models.schemas.rating import MenuItemRatingCreate
+
+    with pytest.raises(ValueError, match="not found"):
+        rating_service.upsert_menu_item_rating(test_user.id, 9999, MenuItemRatingCreate(menu_item_id=9999, rating=4))
+
+    assert db_session.query(MenuItemRating).count() == 0
+    assert db_session.query(MenuItemRatingStats).count() == 0
+
+def test_upsert_rating_rolls_back_on_database_error(db_session: Session, rating_service: RatingService,
+                                                    test_user: User, sample_menu_item, monkeypatch):
+    from sqlalchemy.exc import OperationalError
+    from backend.models.schemas.rating import MenuItemRatingCreate
+    from backend.services import rating_service as rating_module
+
+    menu_item_id = sample_menu_item.id
+    rating_service.upsert_menu_item_rating(test_user.id, menu_item_id, MenuItemRatingCreate(menu_item_id=menu_item_id, rating=2))
+
+    def fail(*args):
+        raise OperationalError("UPDATE menu_item_rating_stats", {}, Exception("database is locked"))
+    monkeypatch.setattr(rating_module, "adjust_rating_stats", fail)
+    with pytest.raises(OperationalError):
+        rating_service.upsert_menu_item_rating(test_user.id, menu_item_id, MenuItemRatingCreate(menu_item_id=menu_item_id, rating=5))
+
+    # The released stars and the new row were rolled back together
+    assert rating_service.get_user_menu_item_rating(test_user.id, menu_item_id).rating == 2
+    stats = rating_service.get_menu_item_rating_stats(menu_item_id)
+    assert (stats["total"], stats["average"]) == (1, 2.0)
@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from backend.services.cart_service import CartService
+from backend.services.guest_cart_service import GuestCartService, GuestCartStore
+from backend.services.kitchen_service import KitchenLine, kitchen_queue
+from backend.services.order_service import OrderService
+from backend.services.wait_time_service import wait_time_estimator
+from backend.models.schemas.cart import CartItemCreate
+from backend.models.orm.user import User
+
+def test_estimate_uses_kitchen_backlog_without_queries(db_session: Session, test_user, sample_menu_item, statement_counter):
+    station = sample_menu_item.category_id
+    cart = CartService(db_session).add_item(test_user.id, CartItemCreate(menu_item_id=sample_menu_item.id, quantity=2))
+    kitchen_queue.submit(99, [KitchenLine(1, "Stew", 1, 40, station)])
+
+    with statement_counter:
+        eta = wait_time_estimator.estimate(db_session, cart)
+
+    assert statement_counter.statements == []
+    cooks = kitchen_queue.cooks
+    assert eta["queue_wait_minutes"] == pytest.approx(40 / cooks)
+    # Two units of a 15 minute dish cook together in one batch
+    assert eta["prep_minutes"] == 15
+    assert eta["eta_minutes"] == pytest.approx(40 / cooks + 15)
+    assert eta["lines"][0]["station_backlog_minutes"] == 40
+
+def test_checkout_raises_the_estimate_for_the_next_cart(db_session: Session, test_user, sample_menu_item):
+    service = CartService(db_session)
+    service.add_item(test_user.id, CartItemCreate(menu_item_id=sample_menu_item.id, quantity=1))
+    before = wait_time_estimator.estimate(db_session, service.get_or_create_cart(test_user.id))
+
+    OrderService(db_session).checkout(test_user.id)
+    cart = service.add_item(test_user.id, CartItemCreate(menu_item_id=sample_menu_item.id, quantity=1))
+    after = wait_time_estimator.estimate(db_session, cart)
+
+    assert before["queue_wait_minutes"] == 0
+    assert after["queue_wait_minutes"] == pytest.approx(15 / kitchen_queue.cooks)
+
+def test_guest_cart_profiles_are_cached(db_session: Session, sample_menu_item, statement_counter):
+    guest = User(username="guest", email="guest@example.com", password_hash="!guest",
+                 first_name="Guest", last_name="User", role="customer", is_guest=True)
+    db_session.add(guest)
+    db_session.commit()
+    service = GuestCartService(db_session, GuestCartStore(maxsize=10, enabled=True))
+    cart = service.add_item(guest.id, CartItemCreate(menu_item_id=sample_menu_item.id, quantity=1))
+
+    with statement_counter:
+        eta = wait_time_estimator.estimate(db_session, cart)
+    assert len(statement_counter.statements) == 1
+    assert eta["eta_minutes"] == 15
+
+    with statement_counter:
+        wait_time_estimator.estimate(db_session, cart)
+    assert statement_counter.statements == []
@@ -1,6 +1,6 @@
 import pytest
 from datetime import datetime
-from backend.services.user_service import UserService
+from backend.services.user_service import UserService, GUEST_PASSWORD_HASH
 from backend.models.schemas.user import UserCreate
 
 def test_create_guest_user(db_session):
@@ -37,7 +37,8 @@ def test_guest_user_unique_credentials(db_session):
 
     assert guest1.username != guest2.username
     assert guest1.email != guest2.email
-    assert guest1.password_hash != guest2.password_hash
+    # Guests are token-only: no password is generated or hashed
+    assert guest1.password_hash == guest2.password_hash == GUEST_PASSWORD_HASH
 
 def test_guest_user_format(db_session):
     """Test the format of guest user credentials"""
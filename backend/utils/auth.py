@@ -5,17 +5,28 @@ from fastapi.security import OAuth2PasswordBearer
 from fastapi.security.utils import get_authorization_scheme_param
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
+import hashlib
 import os
+import time
 
 from backend.utils.database import get_db
-from backend.services.user_service import UserService
-from backend.models.schemas.user import UserResponse
+from backend.services.user_service import UserService, principal_cache
+from backend.services.revocation_service import revocation_registry
+from backend.models.schemas.user import UserResponse, Principal
+from backend.utils.cache import TTLCache
+from backend.utils.metrics import register_metrics
 
 # Use environment variable for production, fallback to dev key for local development
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Decoded claims of recently verified tokens, keyed by the token's SHA-256
+# digest and kept no longer than the token's own expiry
+VERIFIED_TOKEN_CACHE_SIZE = int(os.getenv("VERIFIED_TOKEN_CACHE_SIZE", "8192"))
+verified_token_cache = TTLCache(maxsize=VERIFIED_TOKEN_CACHE_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+register_metrics("verified_token_cache", verified_token_cache.stats)
+
 class OptionalOAuth2PasswordBearer(OAuth2PasswordBearer):
     async def __call__(self, request: Request) -> Optional[str]:
         authorization: str = request.headers.get("Authorization")
@@ -40,6 +51,40 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def build_token_claims(user) -> dict:
+    """Claims that let requests authenticate without loading the user row"""
+    return {
+        "sub": user.email,
+        "uid": user.id,
+        "role": user.role,
+        "is_admin": bool(user.is_admin),
+        "is_guest": bool(user.is_guest),
+        "ver": user.token_version or 0,
+    }
+
+def decode_access_token(token: str) -> Optional[dict]:
+    """Verify a token and return its claims, or None if it is invalid or expired.
+
+    Claims are cached until the token expires so repeated requests with the
+    same token skip the signature check. Callers must not mutate the result.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    payload = verified_token_cache.get(key)
+    if payload is not None:
+        return payload
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
+    exp = payload.get("exp")
+    if exp is not None:
+        ttl = exp - time.time()
+        if ttl > 0:
+            verified_token_cache.set(key, payload, ttl=ttl)
+    return payload
+
 async def get_current_user(
     token: Optional[str] = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
@@ -48,17 +93,81 @@ async def get_current_user(
     if not token:
         return None
         
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-    except JWTError:
+    payload = decode_access_token(token)
+    if payload is None:
         return None
-        
+    email: str = payload.get("sub")
+    if email is None:
+        return None
+    # Tokens revoked by a password change or deactivation are refused before
+    # the principal cache is consulted, on every worker
+    user_id = payload.get("uid")
+    if user_id is not None and revocation_registry.is_revoked(user_id, payload.get("ver", 0)):
+        return None
+
+    principal = principal_cache.get(email)
+    if principal is not None:
+        return principal
+
     service = UserService(db)
     user = service.get_user_by_email(email)
     if user is None or not user.is_active:
         return None
-        
-    return user
+
+    principal = UserResponse.model_validate(user)
+    principal_cache.set(email, principal)
+    return principal
+
+async def require_current_user(
+    current_user: Optional[UserResponse] = Depends(get_current_user)
+) -> UserResponse:
+    """Like get_current_user, but answers 401 when there is no valid user"""
+    if current_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated or user is deactivated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return current_user
+
+async def get_current_principal(
+    token: Optional[str] = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> Optional[Principal]:
+    """Get the authenticated caller from token claims, or None if not authenticated.
+
+    Tokens carrying a ``uid`` claim are resolved from claims alone and checked
+    against the in-memory revocation registry, so they never touch the
+    database. Older tokens fall back to get_current_user.
+    """
+    if not token:
+        return None
+
+    payload = decode_access_token(token)
+    if payload is None:
+        return None
+
+    user_id = payload.get("uid")
+    if user_id is None:
+        user = await get_current_user(token, db)
+        if user is None:
+            return None
+        return Principal(
+            id=user.id,
+            email=user.email,
+            role=user.role,
+            is_admin=user.is_admin,
+            is_guest=user.is_guest
+        )
+
+    if revocation_registry.is_revoked(user_id, payload.get("ver", 0)):
+        return None
+
+    return Principal(
+        id=user_id,
+        email=payload.get("sub"),
+        role=payload.get("role", "customer"),
+        is_admin=payload.get("is_admin", False),
+        is_guest=payload.get("is_guest", False),
+        token_version=payload.get("ver", 0)
+    )
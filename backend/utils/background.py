@@ -0,0 +1,37 @@
+from typing import Callable, Dict
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Periodic maintenance tasks started with the application, keyed by name
+_tasks: Dict[str, asyncio.Task] = {}
+
+
+async def _run_periodically(name: str, interval: float, job: Callable[[], object]) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            # Jobs do blocking database work, keep them off the event loop
+            await asyncio.to_thread(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Background task {name} failed: {str(e)}", exc_info=True)
+
+
+def start_periodic_task(name: str, interval: float, job: Callable[[], object]) -> None:
+    """Run ``job`` every ``interval`` seconds on a worker thread until shutdown."""
+    if name in _tasks and not _tasks[name].done():
+        return
+    logger.info(f"Starting background task {name} (every {interval}s)")
+    _tasks[name] = asyncio.get_running_loop().create_task(_run_periodically(name, interval, job))
+
+
+async def stop_background_tasks() -> None:
+    """Cancel every running periodic task."""
+    tasks = list(_tasks.values())
+    _tasks.clear()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,30 @@
+from threading import Lock
+from typing import Any, Callable, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+# In-process metric providers, keyed by name. Each provider returns a dict
+# snapshot when /metrics is requested.
+_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+_lock = Lock()
+
+
+def register_metrics(name: str, provider: Callable[[], Dict[str, Any]]) -> None:
+    """Register (or replace) a metrics provider under ``name``."""
+    with _lock:
+        _providers[name] = provider
+
+
+def collect_metrics() -> Dict[str, Dict[str, Any]]:
+    """Return a snapshot from every registered provider."""
+    with _lock:
+        providers = dict(_providers)
+    snapshot = {}
+    for name, provider in providers.items():
+        try:
+            snapshot[name] = provider()
+        except Exception as e:
+            logger.error(f"Error collecting metrics for {name}: {str(e)}")
+            snapshot[name] = {"error": str(e)}
+    return snapshot
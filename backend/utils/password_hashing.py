@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Dict
+import asyncio
+import logging
+import os
+
+from passlib.context import CryptContext
+
+from backend.utils.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class HashingPoolBusy(Exception):
+    """Raised when the password hashing pool already has too much queued work."""
+
+
+class PasswordHashPool:
+    """Runs bcrypt hashing and verification on a dedicated, bounded thread pool.
+
+    bcrypt releases the GIL, so the work runs in parallel with the event loop.
+    At most ``max_pending`` jobs may be queued or running at once; beyond that
+    callers get HashingPoolBusy immediately instead of waiting unboundedly.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = Lock()
+        self._pending = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _track(self, fn: Callable, *args) -> Any:
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self.completed += 1
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run ``fn(*args)`` on the pool, or raise HashingPoolBusy if saturated."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                logger.warning(f"Password hashing pool saturated ({self._pending} pending)")
+                raise HashingPoolBusy("Too many concurrent password operations")
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._track, fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self.run(pwd_context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(pwd_context.verify, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "running": self._running,
+                "queue_depth": self._pending - self._running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+
+password_pool = PasswordHashPool(
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+)
+register_metrics("password_hashing", password_pool.stats)
@@ -0,0 +1,191 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, Optional
+import ipaddress
+import logging
+import math
+import os
+import time
+
+from fastapi import HTTPException, Request, status
+
+from backend.utils.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucketLimiter:
+    """In-process token-bucket rate limiter with one bucket per key.
+
+    Each key may spend up to ``burst`` requests at once and regains ``rate``
+    tokens per second. Buckets are kept in an LRU of at most ``maxsize`` keys,
+    so a flood of distinct keys cannot grow memory without bound; an evicted
+    key simply starts again with a full bucket.
+    """
+
+    def __init__(self, rate: float, burst: int, maxsize: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        # key -> [tokens, last refill timestamp]
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = Lock()
+        self.allowed = 0
+        self.blocked = 0
+        self.evictions = 0
+
+    def acquire(self, key: Hashable) -> float:
+        """Take a token for ``key``.
+
+        Returns 0 when the request may proceed, otherwise the number of
+        seconds until a token becomes available.
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(self.burst), now]
+                self._buckets[key] = bucket
+                while len(self._buckets) > self.maxsize:
+                    self._buckets.popitem(last=False)
+                    self.evictions += 1
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+                self._buckets.move_to_end(key)
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                self.allowed += 1
+                return 0.0
+            self.blocked += 1
+            return (1 - bucket[0]) / self.rate if self.rate > 0 else float("inf")
+
+    def reset(self) -> None:
+        """Forget every bucket (counters are kept)."""
+        with self._lock:
+            self._buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "keys": len(self._buckets),
+                "maxsize": self.maxsize,
+                "rate_per_second": self.rate,
+                "burst": self.burst,
+                "allowed": self.allowed,
+                "blocked": self.blocked,
+                "evictions": self.evictions,
+            }
+
+
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+
+# Comma-separated addresses or networks of reverse proxies whose
+# X-Forwarded-For header is believed (render.yaml sets Render's internal
+# network). Without it every client behind the proxy shares one bucket. Do not
+# also run uvicorn with --proxy-headers: it would hand this module the
+# leftmost, client-written entry as the peer address.
+TRUSTED_PROXIES = tuple(
+    ipaddress.ip_network(value.strip(), strict=False)
+    for value in os.getenv("TRUSTED_PROXIES", "").split(",") if value.strip()
+)
+
+login_ip_limiter = TokenBucketLimiter(
+    rate=float(os.getenv("LOGIN_IP_LIMIT_PER_MINUTE", "30")) / 60,
+    burst=int(os.getenv("LOGIN_IP_BURST", "10")),
+    maxsize=RATE_LIMIT_MAX_KEYS
+)
+login_email_limiter = TokenBucketLimiter(
+    rate=float(os.getenv("LOGIN_EMAIL_LIMIT_PER_MINUTE", "10")) / 60,
+    burst=int(os.getenv("LOGIN_EMAIL_BURST", "5")),
+    maxsize=RATE_LIMIT_MAX_KEYS
+)
+guest_login_ip_limiter = TokenBucketLimiter(
+    rate=float(os.getenv("GUEST_LOGIN_IP_LIMIT_PER_MINUTE", "10")) / 60,
+    burst=int(os.getenv("GUEST_LOGIN_IP_BURST", "10")),
+    maxsize=RATE_LIMIT_MAX_KEYS
+)
+
+register_metrics("rate_limit", lambda: {
+    "login_ip": login_ip_limiter.stats(),
+    "login_email": login_email_limiter.stats(),
+    "guest_login_ip": guest_login_ip_limiter.stats(),
+})
+
+
+def check_login_rate(client_ip: str, email: Optional[str] = None) -> float:
+    """Apply the per-IP and per-email login limits.
+
+    Returns 0 when the attempt may proceed, otherwise the Retry-After delay
+    in seconds.
+    """
+    retry_after = login_ip_limiter.acquire(client_ip)
+    if not retry_after and email:
+        retry_after = login_email_limiter.acquire(email.strip().lower())
+    if retry_after:
+        logger.warning(f"Login throttled for ip={client_ip} email={email}")
+    return retry_after
+
+
+def check_guest_login_rate(client_ip: str) -> float:
+    """Apply the per-IP guest login limit, returning the Retry-After delay or 0."""
+    retry_after = guest_login_ip_limiter.acquire(client_ip)
+    if retry_after:
+        logger.warning(f"Guest login throttled for ip={client_ip}")
+    return retry_after
+
+
+def _is_trusted_proxy(address: str, trusted_proxies) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies)
+
+
+def client_ip(request: Request, trusted_proxies=None) -> str:
+    """The address to rate-limit a request by.
+
+    X-Forwarded-For is only read when the request arrives from a trusted
+    proxy. Entries are taken from the right, skipping trusted proxies; the
+    first other address is the one the outermost trusted proxy saw, so
+    values a client writes into the header itself are never used.
+    """
+    trusted_proxies = TRUSTED_PROXIES if trusted_proxies is None else trusted_proxies
+    peer = request.client.host if request.client else "unknown"
+    forwarded = request.headers.get("x-forwarded-for")
+    if not forwarded or not _is_trusted_proxy(peer, trusted_proxies):
+        return peer
+    for address in reversed([value.strip() for value in forwarded.split(",") if value.strip()]):
+        if not _is_trusted_proxy(address, trusted_proxies):
+            return address
+    return peer
+
+
+def _too_many_requests(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many login attempts, please retry later",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+def enforce_login_rate(request: Request, email: Optional[str] = None) -> None:
+    """Raise 429 if the caller's IP or the target email is over its login limit."""
+    retry_after = check_login_rate(client_ip(request), email)
+    if retry_after:
+        raise _too_many_requests(retry_after)
+
+
+def enforce_guest_login_rate(request: Request) -> None:
+    """Raise 429 if the caller's IP is over its guest login limit."""
+    retry_after = check_guest_login_rate(client_ip(request))
+    if retry_after:
+        raise _too_many_requests(retry_after)
+
+
+def reset_rate_limits() -> None:
+    """Clear every login bucket."""
+    for limiter in (login_ip_limiter, login_email_limiter, guest_login_ip_limiter):
+        limiter.reset()
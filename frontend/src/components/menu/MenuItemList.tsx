@@ -404,16 +404,12 @@ export const MenuItemList: React.FC = () => {
       console.log('Loaded menu items:', menuItems);
       console.log('Loaded categories:', categoryList);
       
-      // Fetch all average ratings at once
-      const ratingsPromises = menuItems.map(item => 
-        ratingService.getAverageRating(item.id)
-          .then(average => ({ id: item.id, average: average.average, total: average.total }))
-      );
-      const ratings = await Promise.all(ratingsPromises);
+      // Fetch all average ratings in as few requests as the batch limit allows
+      const ratings = await ratingService.getAverageRatings(menuItems.map(item => item.id));
       
       // Update items with their ratings
       const itemsWithRatings = menuItems.map(item => {
-        const rating = ratings.find(r => r.id === item.id);
+        const rating = ratings[item.id];
         return {
           ...item,
           average_rating: rating?.average || 0,
@@ -19,6 +19,7 @@ export const API_ROUTES = {
       create: (itemId: number) => `/api/ratings/menu-items/${itemId}`,
       user: (itemId: number) => `/api/ratings/menu-items/${itemId}/user`,
       average: (itemId: number) => `/api/ratings/menu-items/${itemId}/average`,
+      averages: '/api/ratings/menu-items/averages',
     },
     restaurant: {
       base: '/api/ratings/restaurant-feedback',
@@ -29,6 +30,10 @@ export const API_ROUTES = {
   },
 } as const;
 
+// Most menu item ids one averages request may carry; the same limit is
+// MAX_BATCH_RATING_IDS in backend/api/routes/ratings.py
+export const MAX_BATCH_RATING_IDS = 200;
+
 // HTTP Status codes
 export const HTTP_STATUS = {
   OK: 200,
@@ -60,14 +60,10 @@ const Menu: React.FC = () => {
       const items = await menuService.getMenuItems();
       setMenuItems(items);
       
-      // Fetch all average ratings at once
-      const ratingsPromises = items.map(item => 
-        ratingService.getAverageRating(item.id)
-          .then(average => ({ id: item.id, average: average.average }))
-      );
-      const ratings = await Promise.all(ratingsPromises);
-      const ratingsMap = ratings.reduce((acc, { id, average }) => {
-        acc[id] = average;
+      // Fetch all average ratings in as few requests as the batch limit allows
+      const ratings = await ratingService.getAverageRatings(items.map(item => item.id));
+      const ratingsMap = items.reduce((acc, item) => {
+        acc[item.id] = ratings[item.id]?.average || 0;
         return acc;
       }, {} as Record<number, number>);
       setItemAverageRatings(ratingsMap);
@@ -1,5 +1,5 @@
 import { api } from './api';
-import { Cart, CartItem, AddToCartRequest, UpdateCartItemRequest, CartTotal } from '../types/cart';
+import { Cart, CartItem, AddToCartRequest, UpdateCartItemRequest, CartTotal, CartOperation, CartEta } from '../types/cart';
 
 class CartService {
   async getCart(): Promise<Cart> {
@@ -26,10 +26,20 @@ class CartService {
     return response.data;
   }
 
+  async applyBatch(operations: CartOperation[]): Promise<Cart> {
+    const response = await api.post('/api/cart/batch', { operations });
+    return response.data;
+  }
+
   async getTotal(): Promise<CartTotal> {
     const response = await api.get('/api/cart/total');
     return response.data;
   }
+
+  async getEta(): Promise<CartEta> {
+    const response = await api.get('/api/cart/eta');
+    return response.data;
+  }
 }
 
 export const cartService = new CartService();
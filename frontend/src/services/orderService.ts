@@ -1 +1,24 @@
- 
\ No newline at end of file
+import { api } from './api';
+import { Order } from '../types/order';
+
+class OrderService {
+  // Reuse the same key when retrying a checkout so it is placed only once
+  async checkout(idempotencyKey: string): Promise<Order> {
+    const response = await api.post('/api/orders/checkout', undefined, {
+      headers: { 'Idempotency-Key': idempotencyKey },
+    });
+    return response.data;
+  }
+
+  async getOrders(): Promise<Order[]> {
+    const response = await api.get('/api/orders');
+    return response.data;
+  }
+
+  async getOrder(orderId: number): Promise<Order> {
+    const response = await api.get(`/api/orders/${orderId}`);
+    return response.data;
+  }
+}
+
+export const orderService = new OrderService();
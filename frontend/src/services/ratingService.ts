@@ -1,5 +1,5 @@
 import { api } from './api';
-import { API_ROUTES } from '../constants/api';
+import { API_ROUTES, MAX_BATCH_RATING_IDS } from '../constants/api';
 
 export interface MenuItemRating {
   id: number;
@@ -16,6 +16,11 @@ export interface RatingAverage {
   total: number;
 }
 
+export interface RatingSummary extends RatingAverage {
+  menu_item_id: number;
+  user_rating: number | null;
+}
+
 export interface CreateMenuItemRating {
   menu_item_id: number;
   rating: number;
@@ -78,6 +83,27 @@ class RatingService {
       return { average: 0, total: 0 };
     }
   }
+
+  async getAverageRatings(menuItemIds: number[]): Promise<Record<number, RatingSummary>> {
+    const chunks: number[][] = [];
+    for (let i = 0; i < menuItemIds.length; i += MAX_BATCH_RATING_IDS) {
+      chunks.push(menuItemIds.slice(i, i + MAX_BATCH_RATING_IDS));
+    }
+    try {
+      const responses = await Promise.all(chunks.map(ids =>
+        api.get(API_ROUTES.ratings.menuItems.averages, { params: { ids: ids.join(',') } })
+      ));
+      return responses
+        .flatMap(response => response.data as RatingSummary[])
+        .reduce((acc, summary) => {
+          acc[summary.menu_item_id] = summary;
+          return acc;
+        }, {} as Record<number, RatingSummary>);
+    } catch (error) {
+      console.error('Error fetching average ratings:', error);
+      throw error;
+    }
+  }
 }
 
 export const ratingService = new RatingService(); 
\ No newline at end of file
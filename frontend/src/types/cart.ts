@@ -3,6 +3,7 @@ export interface CartItem {
   menu_item_id: number;
   quantity: number;
   customization_choices?: { [key: string]: string };
+  price_delta?: number;
   unit_price: number;
   subtotal: number;
   menu_item: {
@@ -34,8 +35,32 @@ export interface UpdateCartItemRequest {
   customization_choices?: { [key: string]: string };
 }
 
+export interface CartOperation {
+  op: 'add' | 'update' | 'remove' | 'clear';
+  menu_item_id?: number;
+  item_id?: number;
+  quantity?: number;
+  customizations?: { [key: string]: unknown };
+}
+
 export interface CartTotal {
   subtotal: number;
   tax: number;
   total: number;
 }
+
+export interface CartEtaLine {
+  menu_item_id: number;
+  quantity: number;
+  prep_minutes: number;
+  station?: number | null;
+  station_backlog_minutes: number;
+}
+
+export interface CartEta {
+  cart_version: number;
+  queue_wait_minutes: number;
+  prep_minutes: number;
+  eta_minutes: number;
+  lines: CartEtaLine[];
+}
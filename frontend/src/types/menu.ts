@@ -18,6 +18,9 @@ export interface MenuItem {
   customization_options: {
     [key: string]: string[];
   };
+  customization_prices?: {
+    [key: string]: { [value: string]: number };
+  };
   image_url?: string;
   created_at: string;
   updated_at: string;
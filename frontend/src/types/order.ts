@@ -0,0 +1,22 @@
+export interface OrderItem {
+  id: number;
+  order_id: number;
+  menu_item_id: number;
+  name: string;
+  quantity: number;
+  unit_price: number;
+  price_delta: number;
+  customizations?: { [key: string]: unknown };
+  line_total: number;
+}
+
+export interface Order {
+  id: number;
+  user_id: number;
+  status: string;
+  items: OrderItem[];
+  subtotal: number;
+  item_count: number;
+  created_at: string;
+  updated_at: string;
+}